@@ -1,61 +1,34 @@
-import math
+import argparse
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from owlready2 import get_ontology, OwlReadyOntologyParsingError
+
+from attempt_log import AttemptLogWriter
+from attempt_store import DEFAULT_ATTEMPT_DB, AttemptStore
+from exercise_bank import ExerciseBank
+from gui_render import DimensionInputs, FrameTimer, TextView
+from metrics import METRICS
+from ontology_index import recorded_misconception
+from ontology_manager import OntologyManager, parse_curricula
+from ontology_reload import ContentState, OntologyWatcher
+from scheduler import Scheduler
+from student_model import StudentModel
+from tutor_core import OntologyContentError, parse_answer, parse_dims
 
 ONTOLOGY_PATH = r"/Users/kolapoyusuf/Documents/AIC/areaperimeter.rdf"
-TOLERANCE = 0.01
-
-
-def get_first(lst, default=None):
-    return lst[0] if lst else default
-
-
-class StudentModel:
-    def __init__(self):
-        self.total = 0
-        self.correct = 0
-        self.incorrect = 0
-        self.by_shape = {}
-        self.wrong_by_shape = {}
-
-    def record(self, shape_name: str, is_correct: bool):
-        self.total += 1
-        self.by_shape[shape_name] = self.by_shape.get(shape_name, 0) + 1
-        if is_correct:
-            self.correct += 1
-        else:
-            self.incorrect += 1
-            self.wrong_by_shape[shape_name] = self.wrong_by_shape.get(shape_name, 0) + 1
-
-    def summary_text(self) -> str:
-        if self.total == 0:
-            return "No attempts yet."
-        acc = (self.correct / self.total) * 100
-        lines = [
-            f"Total attempts: {self.total}",
-            f"Correct: {self.correct}",
-            f"Incorrect: {self.incorrect}",
-            f"Accuracy: {acc:.1f}%",
-            "",
-            "Attempts by shape:"
-        ]
-        for sh, cnt in self.by_shape.items():
-            wrong = self.wrong_by_shape.get(sh, 0)
-            lines.append(f"- {sh}: {cnt} attempt(s), {wrong} wrong")
-        if self.wrong_by_shape:
-            weakest = max(self.wrong_by_shape, key=self.wrong_by_shape.get)
-            lines.append("")
-            lines.append(f"Weak area: {weakest}")
-            lines.append(f"Recommendation: practice more {weakest} questions.")
-        else:
-            lines.append("")
-            lines.append("No weak area detected yet. Great job!")
-        return "\n".join(lines)
+LOAD_POLL_MS = 50
+METRICS_EXPORT_MS = 5000
+RELOAD_POLL_MS = 500
 
 
 class TutorApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, use_snapshot: bool = True, show_snapshot_stats: bool = False,
+                 attempt_store=None, student_id: str = "student", show_startup_timing: bool = False,
+                 metrics_file: str = None, watch: bool = False, attempt_log=None, manager=None,
+                 curriculum: str = None):
+        self._started_at = time.perf_counter()
         super().__init__()
         self._apply_style()
 
@@ -63,18 +36,43 @@ class TutorApp(tk.Tk):
         self.geometry("1200x780")
         self.minsize(1100, 700)
 
+        self.core = None
         self.onto = None
+        self.snapshot_info = None
+        self.use_snapshot = use_snapshot
+        self.manager = manager or OntologyManager(parse_curricula(None, ONTOLOGY_PATH), use_snapshot=use_snapshot)
+        self.curriculum = curriculum or self.manager.default
+        self.ontology_path = self.manager.path(self.curriculum)
+        self.show_snapshot_stats = show_snapshot_stats
         self.student_model = StudentModel()
+        self.scheduler = None
+        self.exercise_bank = None
+        self.attempt_store = attempt_store
+        self.attempt_log = attempt_log
+        self.student_id = student_id
+
+        self.show_startup_timing = show_startup_timing
+        self.startup_timings = {}
+        self._load_queue = queue.Queue()
+        self.metrics_file = metrics_file
+        self.watch = watch
+        self.watcher = None
+        self._reload_queue = queue.Queue()
 
         self.shape_instances = {}
         self.formulas_by_shape = {}
+        self.feedback_index = {}
 
         self.area_task_ind = None
         self.perimeter_task_ind = None
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.bind_all("<Control-Shift-M>", lambda e: self._toggle_metrics())
+
         self._build_ui()
+        self._set_loading(True)
+        self.after_idle(self._mark_first_paint)
         self._load_ontology()
-        self._refresh_inputs_and_question()
 
     # ---------- UI-3: Bigger fonts + spacing ----------
     def _apply_style(self):
@@ -111,20 +109,22 @@ class TutorApp(tk.Tk):
         self.shape_var = tk.StringVar()
         self.shape_combo = ttk.Combobox(controls, textvariable=self.shape_var, state="readonly")
         self.shape_combo.grid(row=1, column=0, sticky="ew", pady=(2, 12))
-        self.shape_combo.bind("<<ComboboxSelected>>", lambda e: self._refresh_inputs_and_question())
+        self.shape_combo.bind("<<ComboboxSelected>>", lambda e: self._switch())
 
         ttk.Label(controls, text="Select task:").grid(row=2, column=0, sticky="w")
         self.task_var = tk.StringVar(value="Area")
         self.task_combo = ttk.Combobox(controls, textvariable=self.task_var, state="readonly", values=["Area", "Perimeter"])
         self.task_combo.grid(row=3, column=0, sticky="ew", pady=(2, 12))
-        self.task_combo.bind("<<ComboboxSelected>>", lambda e: self._refresh_inputs_and_question())
+        self.task_combo.bind("<<ComboboxSelected>>", lambda e: self._switch())
 
         ttk.Separator(controls).grid(row=4, column=0, sticky="ew", pady=12)
 
         ttk.Label(controls, text="Enter dimensions:", font=("Arial", 14, "bold")).grid(row=5, column=0, sticky="w")
         self.inputs_frame = ttk.Frame(controls)
         self.inputs_frame.grid(row=6, column=0, sticky="ew", pady=(8, 12))
-        self.inputs_frame.columnconfigure(1, weight=1)
+        self.inputs_frame.columnconfigure(0, weight=1)
+        self.dim_inputs = DimensionInputs(self.inputs_frame)
+        self.dim_vars = {}
 
         ttk.Label(controls, text="Your answer:").grid(row=7, column=0, sticky="w")
         self.answer_var = tk.StringVar()
@@ -142,6 +142,9 @@ class TutorApp(tk.Tk):
         self.clear_btn = ttk.Button(btn_row, text="Clear", command=self._clear)
         self.clear_btn.grid(row=0, column=1, sticky="ew", padx=(8, 0))
 
+        self.next_btn = ttk.Button(btn_row, text="Next Question (adaptive)", command=self._next_question)
+        self.next_btn.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(12, 0))
+
         # RIGHT: Output + Progress groups
         right = ttk.Frame(self)
         right.grid(row=0, column=1, sticky="nsew", padx=14, pady=14)
@@ -173,6 +176,7 @@ class TutorApp(tk.Tk):
         out_scroll = ttk.Scrollbar(out_frame, orient="vertical", command=self.output_box.yview)
         out_scroll.grid(row=0, column=1, sticky="ns")
         self.output_box.configure(yscrollcommand=out_scroll.set, state="disabled")
+        self.output_view = TextView(self.output_box)
 
         progress_group = ttk.LabelFrame(right, text="Progress Summary")
         progress_group.grid(row=1, column=0, sticky="nsew", pady=(14, 0))
@@ -190,187 +194,335 @@ class TutorApp(tk.Tk):
         prog_scroll = ttk.Scrollbar(prog_frame, orient="vertical", command=self.progress_box.yview)
         prog_scroll.grid(row=0, column=1, sticky="ns")
         self.progress_box.configure(yscrollcommand=prog_scroll.set, state="disabled")
+        self.progress_view = TextView(self.progress_box)
+        self.frames = FrameTimer(self)
+
+    # ---------- Startup ----------
+    def _set_loading(self, loading: bool):
+        # Controls stay disabled until the ontology (and saved progress) are ready.
+        combo_state = "disabled" if loading else "readonly"
+        self.shape_combo.configure(state=combo_state)
+        self.task_combo.configure(state=combo_state)
+        widget_state = "disabled" if loading else "normal"
+        for w in (self.answer_entry, self.submit_btn, self.clear_btn, self.next_btn):
+            w.configure(state=widget_state)
+        if loading:
+            self.question_lbl.config(text="Loading ontology, please wait…")
+
+    def _mark_first_paint(self):
+        # Idle callbacks run after Tk's own pending redraws, so this is when the window
+        # is first on screen.
+        self.startup_timings["first_paint"] = time.perf_counter() - self._started_at
+
+    def _report_startup(self):
+        self.startup_timings["interactive"] = time.perf_counter() - self._started_at
+        if self.show_startup_timing:
+            first_paint = self.startup_timings.get("first_paint")
+            first_paint_text = f"{first_paint * 1000:.0f} ms" if first_paint is not None else "n/a"
+            print(
+                f"Startup: first paint {first_paint_text}, "
+                f"interactive {self.startup_timings['interactive'] * 1000:.0f} ms"
+            )
 
     # ---------- Ontology ----------
     def _load_ontology(self):
+        # owlready2 is imported, parsed and indexed on a worker thread; the result is
+        # handed back through a queue that the Tk thread polls (Tk calls are not thread-safe).
+        worker = threading.Thread(target=self._load_worker, name="ontology-loader", daemon=True)
+        worker.start()
+        self.after(LOAD_POLL_MS, self._poll_load)
+
+    def _load_worker(self):
+        from owlready2 import OwlReadyOntologyParsingError
+
         try:
-            self.onto = get_ontology(ONTOLOGY_PATH).load()
+            core = self.manager.get(self.curriculum)
         except OwlReadyOntologyParsingError as e:
-            messagebox.showerror("Ontology Error", f"Could not load ontology.\n\n{e}")
-            self.destroy()
+            self._load_queue.put(("error", f"Could not load ontology.\n\n{e}"))
             return
-
-        self.area_task_ind = self.onto.search_one(iri="*AreaTask")
-        self.perimeter_task_ind = self.onto.search_one(iri="*PerimeterTask")
-        if self.area_task_ind is None or self.perimeter_task_ind is None:
-            messagebox.showerror(
-                "Ontology Error",
-                "AreaTask / PerimeterTask not found.\n\nMake sure TaskType individuals exist and are saved."
-            )
-            self.destroy()
+        except OntologyContentError as e:
+            self._load_queue.put(("error", str(e)))
+            return
+        except Exception as e:
+            self._load_queue.put(("error", f"Could not load ontology.\n\n{e}"))
             return
 
-        for sh in self.onto.Shape.instances():
-            self.shape_instances[sh.name] = sh
+        student_model = StudentModel()
+        if self.attempt_store is not None:
+            try:
+                with METRICS.timer("progress.restore"):
+                    self.attempt_store.restore(self.student_id, student_model)
+            except Exception as e:
+                self._load_queue.put(("error", f"Could not restore saved progress.\n\n{e}"))
+                return
+        self._load_queue.put(("ok", core, student_model))
+
+    def _poll_load(self):
+        try:
+            result = self._load_queue.get_nowait()
+        except queue.Empty:
+            self.after(LOAD_POLL_MS, self._poll_load)
+            return
 
-        for sh_name, sh in self.shape_instances.items():
-            area_f = get_first(getattr(sh, "hasAreaFormula", []), None)
-            per_f = get_first(getattr(sh, "hasPerimeterFormula", []), None)
-            self.formulas_by_shape[sh_name] = {
-                "Area": get_first(getattr(area_f, "hasDescription", []), None) if area_f else None,
-                "Perimeter": get_first(getattr(per_f, "hasDescription", []), None) if per_f else None,
-            }
+        if result[0] == "error":
+            messagebox.showerror("Ontology Error", result[1])
+            self._on_close()
+            return
+        self._finish_load(result[1], result[2])
+
+    def _finish_load(self, core, student_model):
+        self.core = core
+        self.snapshot_info = self.core.snapshot_info
+        if self.show_snapshot_stats:
+            print(self.snapshot_info)
+
+        self.onto = self.core.onto
+        self.area_task_ind = self.core.area_task_ind
+        self.perimeter_task_ind = self.core.perimeter_task_ind
+        self.shape_instances = self.core.shape_instances
+        self.formulas_by_shape = self.core.formulas_by_shape
+        self.feedback_index = self.core.feedback_index
+        self.student_model = student_model
+        self.scheduler = Scheduler.from_core(self.core)
+        self.scheduler.seed_from_model(self.student_id, student_model.by_shape, student_model.wrong_by_shape)
+        self.exercise_bank = ExerciseBank(self.core)
 
         names = sorted(self.shape_instances.keys())
         self.shape_combo["values"] = names
         if names:
             self.shape_var.set(names[0])
 
+        self._set_loading(False)
+        self._refresh_inputs_and_question()
+        if self.student_model.total:
+            self._set_progress(self.student_model.summary_lines())
+        self._report_startup()
+        if self.watch:
+            self.watcher = OntologyWatcher(
+                self.ontology_path, lambda: ContentState.from_core(core), self._reload_queue.put,
+                use_snapshot=self.use_snapshot,
+            ).start()
+            self.after(RELOAD_POLL_MS, self._poll_reload)
+        if self.metrics_file:
+            self.after(METRICS_EXPORT_MS, self._export_metrics_periodically)
+
+    # ---------- Hot reload ----------
+    def _poll_reload(self):
+        # Reloads are built on the watcher thread and swapped in here, between Tk events,
+        # so a submission never sees half-updated content.
+        while True:
+            try:
+                state = self._reload_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_reload(state)
+        self.after(RELOAD_POLL_MS, self._poll_reload)
+
+    def _apply_reload(self, state):
+        shape_name = self.shape_var.get()
+        task = self.task_var.get()
+        old_names = sorted(self.shape_instances.keys())
+        old_dims = self._required_dims(shape_name, task)
+
+        self.manager.apply_reload(self.curriculum, self.core, state)
+        self.onto = self.core.onto
+        self.area_task_ind = self.core.area_task_ind
+        self.perimeter_task_ind = self.core.perimeter_task_ind
+        self.shape_instances = self.core.shape_instances
+        self.formulas_by_shape = self.core.formulas_by_shape
+        self.feedback_index = self.core.feedback_index
+        print(f"Ontology reloaded: {state.diff} ({state.load_seconds * 1000:.0f} ms)")
+        self.exercise_bank = ExerciseBank(self.core)
+
+        names = sorted(self.shape_instances.keys())
+        if names != old_names:
+            self.shape_combo["values"] = names
+            self.dim_inputs.retain(names)
+            self.scheduler = Scheduler.from_core(self.core)
+            self.scheduler.seed_from_model(self.student_id, self.student_model.by_shape,
+                                           self.student_model.wrong_by_shape)
+            if shape_name not in self.shape_instances and names:
+                self.shape_var.set(names[0])
+        if self.shape_var.get() != shape_name or self._required_dims(shape_name, task) != old_dims:
+            self._refresh_inputs_and_question()
+
+    # ---------- Metrics ----------
+    def _toggle_metrics(self):
+        enabled = METRICS.toggle()
+        print(f"Metrics collection {'enabled' if enabled else 'disabled'}")
+
+    def _export_metrics(self):
+        try:
+            METRICS.export(self.metrics_file)
+        except OSError as e:
+            print(f"Could not write metrics to {self.metrics_file}: {e}")
+
+    def _export_metrics_periodically(self):
+        if METRICS.enabled:
+            self._export_metrics()
+        self.after(METRICS_EXPORT_MS, self._export_metrics_periodically)
+
     # ---------- Inputs + Question ----------
     def _required_dims(self, shape_name: str, task: str):
-        if "Rectangle" in shape_name:
-            return ["length", "width"]
-        if "Square" in shape_name:
-            return ["side"]
-        if "Triangle" in shape_name:
-            if task == "Area":
-                return ["base", "height"]
-            return ["side1", "side2", "side3"]
-        if "Circle" in shape_name:
-            return ["radius"]
-        return []
+        return self.core.required_dims(shape_name, task)
 
-    def _refresh_inputs_and_question(self):
-        for w in self.inputs_frame.winfo_children():
-            w.destroy()
+    def _switch(self):
+        with self.frames.frame("switch"):
+            self._refresh_inputs_and_question()
 
+    def _refresh_inputs_and_question(self):
+        if self.core is None:
+            return
         shape_name = self.shape_var.get()
         task = self.task_var.get()
 
+        # Input rows are pooled per shape/task; see gui_render.DimensionInputs.
         dims = self._required_dims(shape_name, task)
-        self.dim_vars = {}
-
-        for row, d in enumerate(dims):
-            ttk.Label(self.inputs_frame, text=d.capitalize() + ":").grid(row=row, column=0, sticky="w", padx=(0, 10), pady=4)
-            v = tk.StringVar()
-            ttk.Entry(self.inputs_frame, textvariable=v).grid(row=row, column=1, sticky="ew", pady=4)
-            self.dim_vars[d] = v
+        self.dim_vars = self.dim_inputs.show(shape_name, task, dims)
 
         nice_shape = shape_name.replace("Shape", "")
         dim_text = ", ".join(dims) if dims else "required values"
         self.question_lbl.config(text=f"Compute the {task.lower()} of a {nice_shape.lower()} using the given {dim_text}.")
 
+    def _next_question(self):
+        # Let the scheduler pick the shape/task: overdue reviews first, then untried
+        # shapes, then the weakest one. The dimensions come from the exercise bank.
+        if self.scheduler is None:
+            return
+        question = self.scheduler.next_question(self.student_id)
+        if question is None:
+            return
+        shape_name, task, _ = question
+        with self.frames.frame("next"):
+            self.shape_var.set(shape_name)
+            self.task_var.set(task)
+            self._refresh_inputs_and_question()
+            self._clear()
+            item = self.exercise_bank.next_item(shape_name, task)
+            if item is not None:
+                for d, value in item["dims"].items():
+                    self.dim_vars[d].set(f"{value:g}")
+                self.question_lbl.config(text=item["description"])
+
     # ---------- Rule-based calculation ----------
     def _compute_correct_answer(self, shape_name: str, task: str, dims: dict) -> float:
-        if "Rectangle" in shape_name:
-            L, W = dims["length"], dims["width"]
-            return (L * W) if task == "Area" else (2 * (L + W))
-
-        if "Square" in shape_name:
-            s = dims["side"]
-            return (s * s) if task == "Area" else (4 * s)
-
-        if "Triangle" in shape_name:
-            if task == "Area":
-                b, h = dims["base"], dims["height"]
-                return 0.5 * b * h
-            return dims["side1"] + dims["side2"] + dims["side3"]
-
-        if "Circle" in shape_name:
-            r = dims["radius"]
-            return (math.pi * r * r) if task == "Area" else (2 * math.pi * r)
-
-        raise ValueError("Unknown shape/task")
+        return self.core.compute_correct_answer(shape_name, task, dims)
 
     # ---------- Ontology-based feedback retrieval ----------
     def _feedback_for(self, shape_name: str, task: str):
-        shape_ind = self.shape_instances.get(shape_name)
-        task_ind = self.area_task_ind if task == "Area" else self.perimeter_task_ind
-
-        for fb in self.onto.Feedback.instances():
-            fb_shape = get_first(getattr(fb, "feedbackForShape", []), None)
-            fb_task = get_first(getattr(fb, "feedbackForTask", []), None)
-            if fb_shape == shape_ind and fb_task == task_ind:
-                fb_text = get_first(getattr(fb, "hasText", []), None)
-                mc = get_first(getattr(fb, "addressesMisconception", []), None)
-                mc_text = get_first(getattr(mc, "hasDescription", []), None) if mc else None
-                if fb_text:
-                    return fb_text, (mc_text or "A common mistake was detected for this topic.")
-
-        return "Check the formula carefully and try again.", "No matching feedback found in the ontology for this shape/task."
+        return self.core.feedback_for(shape_name, task)
 
     # ---------- Submit ----------
     def _submit(self):
+        if self.core is None:
+            return
+        with self.frames.frame("submit"), METRICS.timer("submit.total"):
+            self._submit_phases()
+
+    def _submit_phases(self):
         shape_name = self.shape_var.get()
         task = self.task_var.get()
 
-        dims = {}
         try:
-            for k, v in self.dim_vars.items():
-                raw = v.get().strip()
-                if raw == "":
-                    raise ValueError(f"Missing value for {k}")
-                val = float(raw)
-                if val <= 0:
-                    raise ValueError(f"{k} must be greater than 0")
-                dims[k] = val
+            with METRICS.timer("submit.parse"):
+                dims = parse_dims({k: v.get() for k, v in self.dim_vars.items()}, self.dim_vars.keys())
+                student_answer = parse_answer(self.answer_var.get())
         except ValueError as e:
+            METRICS.inc("submit.input_error")
             messagebox.showwarning("Input error", str(e))
             return
 
         try:
-            student_answer = float(self.answer_var.get().strip())
-        except ValueError:
-            messagebox.showwarning("Input error", "Please enter a valid numeric answer.")
+            with METRICS.timer("submit.grade"):
+                result = self.core.grade(shape_name, task, dims, student_answer)
+        except ValueError as e:
+            METRICS.inc("submit.input_error")
+            messagebox.showwarning("Input error", str(e))
             return
 
-        correct_answer = self._compute_correct_answer(shape_name, task, dims)
-        is_correct = abs(student_answer - correct_answer) <= TOLERANCE
-
-        self.student_model.record(shape_name, is_correct)
-
-        formula_text = self.formulas_by_shape.get(shape_name, {}).get(task)
-
-        lines = []
-        lines.append("✅ Correct!" if is_correct else "❌ Incorrect.")
-        lines.append(f"Your answer: {student_answer}")
-        lines.append(f"Correct answer: {correct_answer:.2f}")
-
-        if formula_text:
-            lines.append("")
-            lines.append(f"Formula used (from ontology): {formula_text}")
-
-        if not is_correct:
-            fb_text, mc_text = self._feedback_for(shape_name, task)
-            lines.append("")
-            lines.append("Possible misconception (from ontology):")
-            lines.append(f"- {mc_text}")
-            lines.append("")
-            lines.append("Feedback (from ontology):")
-            lines.append(f"- {fb_text}")
-
-        self._set_output("\n".join(lines))
-        self._set_progress(self.student_model.summary_text())
+        with METRICS.timer("submit.record"):
+            self.student_model.record(shape_name, result.is_correct)
+            self.scheduler.record(self.student_id, shape_name, task, result.is_correct)
+            if self.attempt_store is not None:
+                self.attempt_store.record(
+                    self.student_id, shape_name, result.is_correct, task=task,
+                    student_answer=student_answer, correct_answer=result.correct_answer,
+                )
+            if self.attempt_log is not None:
+                self.attempt_log.append(
+                    self.student_id, shape_name, task, dims, student_answer, result.correct_answer,
+                    result.is_correct, recorded_misconception(result.misconception_text),
+                )
+
+        with METRICS.timer("submit.set_output"):
+            self._set_output("\n".join(result.lines()))
+        with METRICS.timer("submit.set_progress"):
+            self._set_progress(self.student_model.summary_lines())
+        METRICS.inc("submit.count")
+
+    def _on_close(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.metrics_file and METRICS.enabled:
+            self._export_metrics()
+        if self.attempt_store is not None:
+            self.attempt_store.close()
+            self.attempt_store = None
+        if self.attempt_log is not None:
+            self.attempt_log.close()
+            self.attempt_log = None
+        self.destroy()
 
     def _clear(self):
         self.answer_var.set("")
-        for v in getattr(self, "dim_vars", {}).values():
+        for v in self.dim_vars.values():
             v.set("")
         self._set_output("")
 
     def _set_output(self, text):
-        self.output_box.configure(state="normal")
-        self.output_box.delete("1.0", tk.END)
-        self.output_box.insert(tk.END, text)
-        self.output_box.configure(state="disabled")
+        # Only lines that differ from what is shown are rewritten (gui_render.TextView).
+        self.output_view.set_text(text)
 
-    def _set_progress(self, text):
-        self.progress_box.configure(state="normal")
-        self.progress_box.delete("1.0", tk.END)
-        self.progress_box.insert(tk.END, text)
-        self.progress_box.configure(state="disabled")
+    def _set_progress(self, lines):
+        self.progress_view.set_lines(lines)
 
 
 if __name__ == "__main__":
-    app = TutorApp()
+    parser = argparse.ArgumentParser(description="Area & Perimeter Intelligent Tutor")
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly instead of the compiled snapshot")
+    parser.add_argument("--snapshot-stats", action="store_true", help="print snapshot cache hit/miss and ontology load time")
+    parser.add_argument("--curriculum", action="append", metavar="NAME=PATH",
+                        help="register a curriculum ontology (repeatable; default: the built-in path)")
+    parser.add_argument("--use-curriculum", metavar="NAME", help="curriculum for this session (default: the first)")
+    parser.add_argument("--student", default="student", help="student id used to save and restore progress")
+    parser.add_argument("--attempt-db", default=DEFAULT_ATTEMPT_DB, help="SQLite file that stores attempt history")
+    parser.add_argument("--attempt-log", help="also append every attempt to this compact binary log (see attempt_log.py)")
+    parser.add_argument("--no-persist", action="store_true", help="keep progress in memory only")
+    parser.add_argument("--startup-timing", action="store_true", help="print time to first paint and time to interactive")
+    parser.add_argument("--watch", action="store_true", help="reload the ontology when the file changes, keeping progress")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time each submission phase (toggle at runtime with Ctrl+Shift+M)")
+    parser.add_argument("--metrics-file", help="write metrics here every few seconds and on exit (.json for JSON, else Prometheus text)")
+    args = parser.parse_args()
+
+    try:
+        manager = OntologyManager(parse_curricula(args.curriculum, ONTOLOGY_PATH), use_snapshot=not args.no_snapshot)
+        manager.path(args.use_curriculum or manager.default)
+    except (ValueError, KeyError) as e:
+        parser.error(f"--curriculum / --use-curriculum: {e}")
+    if args.metrics:
+        METRICS.enable()
+    store = None if args.no_persist else AttemptStore(args.attempt_db)
+    app = TutorApp(
+        use_snapshot=not args.no_snapshot,
+        show_snapshot_stats=args.snapshot_stats,
+        attempt_store=store,
+        student_id=args.student,
+        show_startup_timing=args.startup_timing,
+        metrics_file=args.metrics_file,
+        watch=args.watch,
+        attempt_log=AttemptLogWriter(args.attempt_log) if args.attempt_log else None,
+        manager=manager,
+        curriculum=args.use_curriculum,
+    )
     app.mainloop()
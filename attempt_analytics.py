@@ -0,0 +1,262 @@
+import argparse
+import heapq
+import os
+import sqlite3
+import time
+from collections import Counter
+
+from attempt_store import DEFAULT_ATTEMPT_DB
+from ontology_index import build_exercise_index, lookup_feedback
+from tutor_core import DEFAULT_ONTOLOGY_PATH, TutorCore
+
+# Teacher-facing analytics over attempts. Two layers:
+#
+# * AttemptAnalytics runs prepared, parameterized SPARQL queries (owlready2's
+#   world.prepare_sparql) against the Attempt / Student individuals in the ontology.
+#   Each query is parsed and compiled once per World and then executed with parameters.
+# * AttemptAggregates keeps materialized counters (per shape/task, per misconception, and
+#   per day/task/student misconception counts) that are updated as attempts are recorded,
+#   so dashboard questions such as "students with the most perimeter misconceptions this
+#   week" read a handful of counters instead of walking every attempt.
+#
+# Attempts in the ontology carry no timestamp; they count towards all-time totals only.
+
+DAY_SECONDS = 86400
+DEFAULT_RETENTION_DAYS = 60
+
+PREFIX = "PREFIX ap: <{base}>\n"
+
+QUERIES = {
+    # Every attempt with its student, exercise, score and the misconception (if any)
+    # addressed by the feedback it generated.
+    "attempt_rows": """
+        SELECT ?student ?exercise ?score ?mc WHERE {
+            ?attempt a ap:Attempt ;
+                     ap:attemptedBy ?student ;
+                     ap:concernsExercise ?exercise .
+            OPTIONAL { ?attempt ap:hasScore ?score . }
+            OPTIONAL { ?attempt ap:generatesFeedback ?fb .
+                       ?fb ap:addressesMisconception ?m .
+                       ?m ap:hasDescription ?mc . }
+        }
+    """,
+    # ??1 = Student individual
+    "student_attempts": """
+        SELECT ?attempt ?exercise ?score ?answer WHERE {
+            ?attempt ap:attemptedBy ??1 ;
+                     ap:concernsExercise ?exercise .
+            OPTIONAL { ?attempt ap:hasScore ?score . }
+            OPTIONAL { ?attempt ap:hasStudentAnswer ?answer . }
+        }
+    """,
+    # ??1 = TaskType individual (AreaTask / PerimeterTask)
+    "students_by_misconceptions": """
+        SELECT ?student (COUNT(?attempt) AS ?n) WHERE {
+            ?attempt a ap:Attempt ;
+                     ap:attemptedBy ?student ;
+                     ap:generatesFeedback ?fb .
+            ?fb ap:feedbackForTask ??1 ;
+                ap:addressesMisconception ?m .
+        } GROUP BY ?student ORDER BY DESC(?n)
+    """,
+}
+
+
+def _day(ts: float) -> int:
+    return int(ts // DAY_SECONDS)
+
+
+class AttemptAggregates:
+    def __init__(self, retention_days: int = DEFAULT_RETENTION_DAYS, clock=time.time):
+        self.retention_days = retention_days
+        self.clock = clock
+
+        self.by_shape_task = {}          # (shape, task) -> [attempts, correct]
+        self.misconceptions = Counter()  # misconception text -> count
+        self.misconceptions_by_task = {}  # task -> Counter(misconception text)
+        self.students = Counter()        # student -> misconception count (all time)
+        self.students_by_task = {}       # task -> Counter(student -> misconception count)
+        # day -> task -> Counter(student -> misconception count) / Counter(misconception -> count)
+        self.student_days = {}
+        self.misconception_days = {}
+
+    def record(self, student_id: str, shape_name: str, task: str, is_correct: bool,
+               misconception: str = None, ts: float = None):
+        slot = self.by_shape_task.setdefault((shape_name, task), [0, 0])
+        slot[0] += 1
+        if is_correct:
+            slot[1] += 1
+            return
+        if misconception is None:
+            return
+
+        self.misconceptions[misconception] += 1
+        self.misconceptions_by_task.setdefault(task, Counter())[misconception] += 1
+        self.students[student_id] += 1
+        self.students_by_task.setdefault(task, Counter())[student_id] += 1
+        if ts is None:
+            return
+
+        day = _day(ts)
+        if day not in self.student_days:
+            self._prune(day)
+        self.student_days.setdefault(day, {}).setdefault(task, Counter())[student_id] += 1
+        self.misconception_days.setdefault(day, {}).setdefault(task, Counter())[misconception] += 1
+
+    def _prune(self, newest_day: int):
+        oldest = newest_day - self.retention_days
+        for days in (self.student_days, self.misconception_days):
+            for day in [d for d in days if d <= oldest]:
+                del days[day]
+
+    def _window(self, days_table: dict, task, days: int, now) -> Counter:
+        today = _day(self.clock() if now is None else now)
+        total = Counter()
+        for day in range(today - days + 1, today + 1):
+            for day_task, counts in days_table.get(day, {}).items():
+                if task is None or day_task == task:
+                    total.update(counts)
+        return total
+
+    # ---------- Dashboard queries ----------
+    def shape_accuracy(self) -> dict:
+        return {
+            f"{shape}/{task}": {"attempts": attempts, "accuracy": correct / attempts if attempts else None}
+            for (shape, task), (attempts, correct) in sorted(self.by_shape_task.items())
+        }
+
+    def top_students(self, task: str = None, days: int = None, limit: int = 10, now: float = None):
+        # Students with the most misconceptions, optionally for one task and the last `days` days.
+        if days is None:
+            counts = self.students if task is None else self.students_by_task.get(task, Counter())
+        else:
+            counts = self._window(self.student_days, task, days, now)
+        return heapq.nlargest(limit, counts.items(), key=lambda item: item[1])
+
+    def top_misconceptions(self, task: str = None, days: int = None, limit: int = 10, now: float = None):
+        if days is None:
+            counts = self.misconceptions if task is None else self.misconceptions_by_task.get(task, Counter())
+        else:
+            counts = self._window(self.misconception_days, task, days, now)
+        return heapq.nlargest(limit, counts.items(), key=lambda item: item[1])
+
+
+class AttemptAnalytics:
+    def __init__(self, onto, feedback_index: dict = None, exercise_index: dict = None):
+        self.onto = onto
+        self.feedback_index = feedback_index or {}
+        self._exercise_index = exercise_index
+        self.aggregates = AttemptAggregates()
+        self._prepared = {}
+
+    def rebind(self, onto, feedback_index: dict, exercise_index: dict = None):
+        # After an ontology reload: queries run against the new World from now on. The
+        # aggregates are kept; they count attempts, not individuals.
+        self.onto = onto
+        self.feedback_index = feedback_index
+        self._exercise_index = exercise_index
+        self._prepared = {}
+
+    @property
+    def exercise_index(self) -> dict:
+        # Built on first use; only replaying the ontology's attempts needs it.
+        if self._exercise_index is None:
+            self._exercise_index = build_exercise_index(self.onto)
+        return self._exercise_index
+
+    def _query(self, name: str):
+        prepared = self._prepared.get(name)
+        if prepared is None:
+            sparql = PREFIX.format(base=self.onto.base_iri) + QUERIES[name]
+            prepared = self._prepared[name] = self.onto.world.prepare_sparql(sparql)
+        return prepared
+
+    def _individual(self, name: str):
+        ind = self.onto[name]
+        if ind is None:
+            raise ValueError(f"Unknown individual: {name}")
+        return ind
+
+    # ---------- Ontology queries ----------
+    def student_attempts(self, student_name: str):
+        rows = self._query("student_attempts").execute([self._individual(student_name)])
+        return [
+            {"attempt": attempt.name, "exercise": exercise.name, "score": score, "student_answer": answer}
+            for attempt, exercise, score, answer in rows
+        ]
+
+    def students_by_misconceptions(self, task: str, limit: int = 10):
+        rows = self._query("students_by_misconceptions").execute([self._individual(f"{task}Task")])
+        return [(student.name, count) for student, count in rows][:limit]
+
+    # ---------- Materialized aggregates ----------
+    def load_ontology_attempts(self) -> int:
+        n = 0
+        for student, exercise, score, mc_text in self._query("attempt_rows").execute():
+            entry = self.exercise_index.get(exercise.name, {})
+            is_correct = score is not None and float(score) > 0
+            self.aggregates.record(student.name, entry.get("shape") or "UnknownShape", entry.get("task"),
+                                   is_correct, mc_text)
+            n += 1
+        return n
+
+    def load_attempt_store(self, db_path: str, since: float = None) -> int:
+        # Replays attempts saved by AttemptStore. Their misconception is the one the tutor
+        # showed: the top-ranked feedback for the shape/task.
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT student_id, shape, task, is_correct, created_at FROM attempts"
+                " WHERE created_at >= ? ORDER BY id",
+                (since or 0,),
+            )
+            n = 0
+            for student_id, shape, task, is_correct, created_at in rows:
+                self.record(student_id, shape, task, bool(is_correct), ts=created_at)
+                n += 1
+            return n
+        finally:
+            conn.close()
+
+    def record(self, student_id: str, shape_name: str, task: str, is_correct: bool,
+               misconception: str = None, ts: float = None):
+        if not is_correct and misconception is None:
+            misconception = lookup_feedback(self.feedback_index, shape_name, task)[1]
+        self.aggregates.record(student_id, shape_name, task, is_correct, misconception,
+                               self.aggregates.clock() if ts is None else ts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Misconception analytics over recorded attempts")
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--attempt-db", default=DEFAULT_ATTEMPT_DB, help="AttemptStore database to include")
+    parser.add_argument("--task", choices=["Area", "Perimeter"])
+    parser.add_argument("--days", type=int, default=7, help="look-back window for saved attempts (0 = all time)")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    core = TutorCore.load(args.ontology)
+    analytics = AttemptAnalytics(core.onto, core.feedback_index)
+
+    start = time.perf_counter()
+    from_onto = analytics.load_ontology_attempts()
+    from_store = analytics.load_attempt_store(args.attempt_db) if os.path.exists(args.attempt_db) else 0
+    print(f"Loaded {from_onto} ontology attempts and {from_store} saved attempts "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    days = args.days or None
+    label = f"{args.task or 'all'} tasks, " + (f"last {days} days" if days else "all time")
+    print(f"\nStudents with the most misconceptions ({label}):")
+    for student, count in analytics.aggregates.top_students(args.task, days, args.limit):
+        print(f"- {student}: {count}")
+    print(f"\nMost frequent misconceptions ({label}):")
+    for text, count in analytics.aggregates.top_misconceptions(args.task, days, args.limit):
+        print(f"- {count} x {text}")
+    if args.task:
+        print(f"\nFrom ontology Attempt individuals ({args.task}):")
+        for student, count in analytics.students_by_misconceptions(args.task, args.limit):
+            print(f"- {student}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from functools import lru_cache
+
+from grading import TASKS
+
+# Compact, append-only attempt log. Every graded attempt becomes one fixed-width 48-byte
+# record; student, shape and misconception names are interned to integer ids in a small
+# sidecar file (<log>.names, one JSON line per new name). The reader maps the log and
+# views it as a NumPy structured array, so scans over hundreds of millions of attempts
+# run column-wise in NumPy without creating a Python object per attempt.
+#
+# Layout (little-endian):
+#   header   magic "APAL", format, record size, reserved      (HEADER.size bytes)
+#   records  RECORD rows, in the order they were written
+#
+# RECORD fields: timestamp, student answer, correct answer, student id, misconception id,
+# up to MAX_DIMS dimensions (in the rule's order, NaN when unused), shape id, task id and
+# flags (bit 0 = correct). A record is only counted once it is complete, so a torn write
+# at the end of the file is ignored by the reader and cut off by the next writer.
+#
+# Only the reader needs NumPy; the tutor can write a log without it.
+
+MAGIC = b"APAL"
+LOG_FORMAT = 1
+NONE = 0xFFFFFFFF
+MAX_DIMS = 3
+CORRECT = 1
+CHUNK_ROWS = 1 << 22
+
+HEADER = struct.Struct("<4sIII16x")
+RECORD = struct.Struct(f"<ddd II {MAX_DIMS}f HBB")
+TASK_IDS = {task: i for i, task in enumerate(TASKS)}
+NAME_KINDS = ("student", "shape", "misconception")
+
+
+class AttemptLogError(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def record_dtype():
+    # NumPy view of RECORD.
+    import numpy as np
+
+    dtype = np.dtype([
+        ("ts", "<f8"),
+        ("answer", "<f8"),
+        ("correct_answer", "<f8"),
+        ("student", "<u4"),
+        ("misconception", "<u4"),
+        ("dims", "<f4", (MAX_DIMS,)),
+        ("shape", "<u2"),
+        ("task", "u1"),
+        ("flags", "u1"),
+    ])
+    assert dtype.itemsize == RECORD.size
+    return dtype
+
+
+def names_path(path: str) -> str:
+    return path + ".names"
+
+
+def _read_names(path: str) -> dict:
+    names = {kind: [] for kind in NAME_KINDS}
+    if not os.path.exists(names_path(path)):
+        return names
+    with open(names_path(path), "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                kind, name = json.loads(line)
+            except ValueError:
+                break           # torn last line
+            names[kind].append(name)
+    return names
+
+
+def _check_header(data: bytes, path: str):
+    if len(data) < HEADER.size:
+        raise AttemptLogError(f"{path}: not an attempt log (file too short)")
+    magic, fmt, record_size = HEADER.unpack_from(data)[:3]
+    if magic != MAGIC:
+        raise AttemptLogError(f"{path}: not an attempt log")
+    if fmt != LOG_FORMAT or record_size != RECORD.size:
+        raise AttemptLogError(f"{path}: unsupported attempt log format {fmt}")
+
+
+class AttemptLogWriter:
+    def __init__(self, path: str, flush_every: int = 256):
+        # Records are buffered and written flush_every at a time (and on flush()/close()).
+        self.path = path
+        self.flush_every = flush_every
+        self._names = _read_names(path)
+        self._ids = {kind: {name: i for i, name in enumerate(names)} for kind, names in self._names.items()}
+        self._new_names = []
+        self._buffer = bytearray()
+        self._pending = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                _check_header(f.read(HEADER.size), path)
+            size = os.path.getsize(path)
+            whole = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            if whole != size:
+                os.truncate(path, whole)
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(HEADER.pack(MAGIC, LOG_FORMAT, RECORD.size, 0))
+            self._file.flush()
+        self._names_file = open(names_path(path), "a", encoding="utf-8")
+
+    def _id(self, kind: str, name) -> int:
+        if name is None:
+            return NONE
+        ids = self._ids[kind]
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(self._names[kind])
+            self._names[kind].append(name)
+            self._new_names.append(json.dumps([kind, name], ensure_ascii=False) + "\n")
+        return name_id
+
+    def append(self, student_id: str, shape_name: str, task: str, dims, student_answer: float,
+               correct_answer: float, is_correct: bool, misconception: str = None, ts: float = None):
+        # dims: the values in the grading rule's order (a dict keeps that order).
+        values = list(dims.values() if isinstance(dims, dict) else dims)
+        if len(values) > MAX_DIMS:
+            raise ValueError(f"At most {MAX_DIMS} dimensions fit in an attempt record")
+        values += [float("nan")] * (MAX_DIMS - len(values))
+        self._buffer += RECORD.pack(
+            time.time() if ts is None else ts, student_answer, correct_answer,
+            self._id("student", student_id), self._id("misconception", None if is_correct else misconception),
+            *values, self._id("shape", shape_name), TASK_IDS[task], CORRECT if is_correct else 0,
+        )
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        # Names go out first, so every id in the log can be resolved.
+        if self._new_names:
+            self._names_file.write("".join(self._new_names))
+            self._names_file.flush()
+            self._new_names.clear()
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._names_file.close()
+
+
+class AttemptLog:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = None
+        self.records = None
+        self.names = {}
+        try:
+            _check_header(self._file.read(HEADER.size), path)
+            self.refresh()
+        except Exception:
+            self.close()
+            raise
+
+    def refresh(self):
+        # Picks up records appended since the log was opened (or last refreshed).
+        # Arrays taken from the previous mapping stay valid; that mapping is released
+        # once nothing refers to it.
+        import numpy as np
+
+        size = os.fstat(self._file.fileno()).st_size
+        count = (size - HEADER.size) // RECORD.size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.records = np.frombuffer(self._mm, dtype=record_dtype(), count=count, offset=HEADER.size)
+        self.names = _read_names(self.path)
+        return count
+
+    def close(self):
+        self.records = None
+        self._mm = None
+        self._file.close()
+
+    def __len__(self):
+        return 0 if self.records is None else len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ---------- Columns (views into the mapped file) ----------
+    def column(self, name: str):
+        return self.records[name]
+
+    @property
+    def is_correct(self):
+        return (self.records["flags"] & CORRECT).astype(bool)
+
+    # ---------- Scans ----------
+    def _chunks(self, task=None, since=None, until=None):
+        # Row blocks with the filter applied, so temporaries stay CHUNK_ROWS long.
+        task_id = TASK_IDS[task] if task is not None else None
+        for start in range(0, len(self), CHUNK_ROWS):
+            block = self.records[start:start + CHUNK_ROWS]
+            mask = None
+            if task_id is not None:
+                mask = block["task"] == task_id
+            if since is not None:
+                mask = block["ts"] >= since if mask is None else mask & (block["ts"] >= since)
+            if until is not None:
+                mask = block["ts"] < until if mask is None else mask & (block["ts"] < until)
+            yield block if mask is None else block[mask]
+
+    def _count_by(self, field: str, size: int, task=None, since=None, until=None, wrong_only=False):
+        import numpy as np
+
+        attempts = np.zeros(size, dtype=np.int64)
+        correct = np.zeros(size, dtype=np.int64)
+        for block in self._chunks(task, since, until):
+            ids = block[field]
+            ok = (block["flags"] & CORRECT).astype(bool)
+            if wrong_only:
+                ids = ids[~ok & (ids != NONE)]
+                attempts += np.bincount(ids, minlength=size)[:size]
+                continue
+            attempts += np.bincount(ids, minlength=size)[:size]
+            correct += np.bincount(ids[ok], minlength=size)[:size]
+        return attempts, correct
+
+    def _accuracy(self, kind: str, field: str, task, since, until) -> dict:
+        names = self.names[kind]
+        attempts, correct = self._count_by(field, len(names), task, since, until)
+        return {
+            names[i]: {"attempts": int(attempts[i]), "correct": int(correct[i]),
+                       "accuracy": round(float(correct[i] / attempts[i]), 4)}
+            for i in attempts.nonzero()[0]
+        }
+
+    def accuracy_by_shape(self, task: str = None, since: float = None, until: float = None) -> dict:
+        return self._accuracy("shape", "shape", task, since, until)
+
+    def accuracy_by_student(self, task: str = None, since: float = None, until: float = None) -> dict:
+        return self._accuracy("student", "student", task, since, until)
+
+    def misconception_frequency(self, task: str = None, since: float = None, until: float = None,
+                                limit: int = None) -> list:
+        # (misconception text, wrong answers), most frequent first.
+        names = self.names["misconception"]
+        counts, _ = self._count_by("misconception", len(names), task, since, until, wrong_only=True)
+        order = (-counts).argsort(kind="stable")
+        order = order[counts[order] > 0]
+        return [(names[i], int(counts[i])) for i in order[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and misconception report from an attempt log")
+    parser.add_argument("log", help="attempt log written by AttemptLogWriter (--attempt-log)")
+    parser.add_argument("--task", choices=list(TASKS))
+    parser.add_argument("--days", type=float, help="only attempts from the last N days")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else None
+    with AttemptLog(args.log) as log:
+        start = time.perf_counter()
+        by_shape = log.accuracy_by_shape(args.task, since)
+        misconceptions = log.misconception_frequency(args.task, since, limit=args.limit)
+        elapsed = time.perf_counter() - start
+
+        print(f"{len(log):,} attempts scanned in {elapsed * 1000:.0f} ms")
+        print("\nAccuracy by shape:")
+        for shape, row in sorted(by_shape.items()):
+            print(f"- {shape}: {row['accuracy']:.1%} of {row['attempts']:,}")
+        print("\nMost frequent misconceptions:")
+        for text, count in misconceptions:
+            print(f"- {count:,} x {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+from urllib.parse import quote, unquote
+
+from attempt_store import DEFAULT_ATTEMPT_DB, SCHEMA, _connect
+from ontology_index import build_exercise_index, exercise_entry, feedback_record
+from tutor_core import DEFAULT_ONTOLOGY_PATH
+
+# Bulk transfer of attempt histories between the SQLite attempt store and Attempt
+# individuals of the ontology (attemptedBy / concernsExercise / generatesFeedback /
+# hasScore / hasStudentAnswer).
+#
+# Creating attempts through owlready2 objects costs several quadstore queries and a
+# Python object per attempt, and saving the RDF file after each one rewrites the whole
+# ontology. Here rows are streamed in id order and their triples go straight into the
+# quadstore's objs/datas tables with executemany, batch_size attempts per transaction;
+# student, exercise and feedback individuals are resolved once, and the RDF/XML file (if
+# asked for) is written once at the end. The other direction reads all Attempt triples
+# with one SQL join over the quadstore, fetched batch_size rows at a time. Memory stays
+# flat in both directions apart from the student ids seen so far.
+#
+# Attempt individuals are named StoreAttempt<id> after the attempt store row, so running
+# the same export twice adds nothing new. Students are Student_<url-quoted id>.
+#
+# The ontology has no timestamp, shape or task property for attempts: shape, task and
+# correct answer come back from the linked Exercise (or, failing that, the Feedback)
+# individual, and created_at is the time of the import. Attempts whose exercise is not in
+# the ontology (free practice, exercise bank items) are linked to one generated exercise
+# per shape and task, StoreExercise_<shape>_<task>, which points at the shape through
+# isAboutShape and has no correct answer; reading them back gives exercise None. These
+# are GeneratedExercise individuals, not Exercise ones, so the tutor's exercise index
+# never offers them for practice. Only attempts on a shape or task the ontology does not
+# know lose their shape and task.
+#
+#   python attempt_ontology_io.py to-ontology --attempt-db attempts.sqlite3 --quadstore term.sqlite3 -o term.rdf
+#   python attempt_ontology_io.py from-ontology --quadstore term.sqlite3 --attempt-db research.sqlite3
+#   python attempt_ontology_io.py from-ontology --ontology term.rdf -o term.jsonl
+
+ATTEMPT_PREFIX = "StoreAttempt"
+EXERCISE_PREFIX = "StoreExercise_"
+GENERATED_EXERCISE_CLASS = "GeneratedExercise"
+STUDENT_PREFIX = "Student_"
+UNKNOWN_SHAPE = "UnknownShape"
+DEFAULT_BATCH_SIZE = 10000
+SQL_VARS = 500          # IRIs per "IN (...)" lookup, well below SQLite's variable limit
+FILE_FIELDS = ["attempt", "student_id", "shape", "task", "exercise", "student_answer", "correct_answer",
+               "is_correct", "score", "feedback"]
+
+
+def local_name(iri: str) -> str:
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
+
+def student_iri_name(student_id: str) -> str:
+    return STUDENT_PREFIX + quote(str(student_id), safe="")
+
+
+def generated_exercise_name(shape_name: str, task: str) -> str:
+    return f"{EXERCISE_PREFIX}{shape_name}_{task}"
+
+
+def student_id_from(name: str) -> str:
+    # Student_<quoted id> -> id; hand-made individuals (Student1) keep their name.
+    return unquote(name[len(STUDENT_PREFIX):]) if name.startswith(STUDENT_PREFIX) else name
+
+
+def _top_feedback(onto) -> dict:
+    # (shape name, task) -> storid of the Feedback individual the tutor shows first
+    # (same order as ontology_index.rank_feedback), and feedback name -> (shape, task).
+    ranked, keys = {}, {}
+    for fb in onto.Feedback.instances():
+        record = feedback_record(fb)
+        if record is None:
+            continue
+        key, entry = record
+        ranked.setdefault(key, []).append((entry[0], entry[1], fb.storid))
+        keys[fb.name] = key
+    return {key: min(entries)[2] for key, entries in ranked.items()}, keys
+
+
+class _Progress:
+    def __init__(self, verb: str, every: float = 2.0):
+        self.verb = verb
+        self.every = every
+        self.count = 0
+        self.start = self.last = time.perf_counter()
+
+    def add(self, n: int):
+        self.count += n
+        now = time.perf_counter()
+        if self.every and now - self.last >= self.every:
+            self.last = now
+            print(f"{self.verb} {self.count:,} attempts ({self.rate():,.0f} rows/s)", file=sys.stderr)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return self.count / elapsed if elapsed else 0.0
+
+
+# ---------- Attempt store -> ontology ----------
+class OntologyAttemptWriter:
+    def __init__(self, onto, batch_size: int = DEFAULT_BATCH_SIZE):
+        from owlready2 import owl_class, owl_named_individual, rdf_type
+        from owlready2.base import to_literal
+
+        self.onto = onto
+        self.graph = onto.world.graph
+        self.batch_size = batch_size
+        self.c = onto.graph.c
+        self.base = onto.base_iri
+        self.rdf_type = rdf_type
+        self.named_individual = owl_named_individual
+        self.owl_class = owl_class
+        self.int_type = to_literal(0)[1]
+        self.float_type = to_literal(0.0)[1]
+        self.str_type = to_literal("")[1]
+
+        self.attempt_class = onto.Attempt.storid
+        self.student_class = onto.Student.storid
+        self.attempted_by = onto.attemptedBy.storid
+        self.concerns_exercise = onto.concernsExercise.storid
+        self.generates_feedback = onto.generatesFeedback.storid
+        self.has_score = onto.hasScore.storid
+        self.has_student_answer = onto.hasStudentAnswer.storid
+        self.generated_class = None     # storid of GeneratedExercise, declared on first use
+        self.is_about_shape = onto.isAboutShape.storid
+        self.has_description = onto.hasDescription.storid
+
+        self.exercises = {ex.name: ex.storid for ex in onto.Exercise.instances()}
+        self.shapes = {shape.name: shape.storid for shape in onto.Shape.instances()}
+        self._generated = {}    # (shape name, task) -> storid of its generated Exercise
+        self.feedback, _ = _top_feedback(onto)
+        self._students = {}     # student id -> storid
+        self._rows = []
+        self.written = 0
+        self.unlinked = 0       # attempts whose exercise is not an individual of the ontology
+        self.lossy = 0          # attempts whose shape and task cannot be read back
+
+    def _abbreviate_many(self, names) -> list:
+        # Storids for base-IRI local names, creating the missing ones with one counter update.
+        iris = [self.base + name for name in names]
+        known = {}
+        for i in range(0, len(iris), SQL_VARS):
+            chunk = iris[i:i + SQL_VARS]
+            known.update(self.graph.execute(
+                f"SELECT iri, storid FROM resources WHERE iri IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        new = list(dict.fromkeys(iri for iri in iris if iri not in known))
+        if new:
+            self.graph.execute("UPDATE store SET current_resource=current_resource+?", (len(new),))
+            last = self.graph.execute("SELECT current_resource FROM store").fetchone()[0]
+            ids = dict(zip(new, range(last - len(new) + 1, last + 1)))
+            self.graph.db.executemany("INSERT INTO resources VALUES (?,?)", [(s, iri) for iri, s in ids.items()])
+            known.update(ids)
+        return [known[iri] for iri in iris]
+
+    def _generated_exercises(self, keys, objs, datas):
+        # Creates the generated Exercise for each new (shape, task) key.
+        new = [key for key in dict.fromkeys(keys) if key not in self._generated]
+        if not new:
+            return
+        c, rdf_type = self.c, self.rdf_type
+        if self.generated_class is None:
+            self.generated_class = self._abbreviate_many([GENERATED_EXERCISE_CLASS])[0]
+            objs.append((c, self.generated_class, rdf_type, self.owl_class))
+        storids = self._abbreviate_many([generated_exercise_name(*key) for key in new])
+        for (shape_name, task), s in zip(new, storids):
+            self._generated[shape_name, task] = s
+            objs.append((c, s, rdf_type, self.named_individual))
+            objs.append((c, s, rdf_type, self.generated_class))
+            objs.append((c, s, self.is_about_shape, self.shapes[shape_name]))
+            # ontology_index.exercise_task reads the task back from the description.
+            datas.append((c, s, self.has_description, f"{task} of a {shape_name}, for saved attempts without an"
+                          " exercise in the ontology.", self.str_type))
+
+    def append(self, row_id: int, student_id: str, shape_name: str, task, exercise, student_answer, is_correct):
+        self._rows.append((row_id, student_id, shape_name, task, exercise, student_answer, is_correct))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # One transaction per batch: resources, then object and data triples.
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        c, rdf_type = self.c, self.rdf_type
+        objs, datas = [], []
+
+        new_students = list(dict.fromkeys(r[1] for r in rows if r[1] not in self._students))
+        if new_students:
+            storids = self._abbreviate_many([student_iri_name(s) for s in new_students])
+            for student_id, s in zip(new_students, storids):
+                self._students[student_id] = s
+                objs.append((c, s, rdf_type, self.named_individual))
+                objs.append((c, s, rdf_type, self.student_class))
+
+        self._generated_exercises(
+            [(r[2], r[3]) for r in rows
+             if r[4] not in self.exercises and r[2] in self.shapes and r[3] in ("Area", "Perimeter")],
+            objs, datas,
+        )
+
+        attempts = self._abbreviate_many([f"{ATTEMPT_PREFIX}{r[0]}" for r in rows])
+        for s, (_, student_id, shape_name, task, exercise, student_answer, is_correct) in zip(attempts, rows):
+            objs.append((c, s, rdf_type, self.named_individual))
+            objs.append((c, s, rdf_type, self.attempt_class))
+            objs.append((c, s, self.attempted_by, self._students[student_id]))
+            ex = self.exercises.get(exercise)
+            if ex is None:
+                self.unlinked += 1
+                ex = self._generated.get((shape_name, task))
+                if ex is None:
+                    self.lossy += 1
+            if ex is not None:
+                objs.append((c, s, self.concerns_exercise, ex))
+            if not is_correct:
+                fb = self.feedback.get((shape_name, task))
+                if fb is not None:
+                    objs.append((c, s, self.generates_feedback, fb))
+            datas.append((c, s, self.has_score, 1 if is_correct else 0, self.int_type))
+            if student_answer is not None:
+                datas.append((c, s, self.has_student_answer, float(student_answer), self.float_type))
+
+        self.graph.db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", objs)
+        self.graph.db.executemany("INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)", datas)
+        self.graph.commit()
+        self.written += len(rows)
+
+    def close(self):
+        self.flush()
+        # Query planner statistics, which owlready2 would otherwise refresh every 1000 triples.
+        self.graph.analyze()
+
+
+def read_attempt_store(db_path: str, since: float = None, until: float = None, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Attempt store rows in id order, batch_size at a time.
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(
+            "SELECT id, student_id, shape, task, exercise, student_answer, is_correct FROM attempts"
+            " WHERE created_at >= ? AND created_at < ? ORDER BY id",
+            (since or 0, until if until is not None else float("inf")),
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        conn.close()
+
+
+def _attempt_ontology(world):
+    # The ontology in the quadstore that defines Attempt, or None.
+    for iri in list(world.graph.ontologies_iris()):
+        onto = world.get_ontology(iri)
+        if onto.Attempt is not None:
+            return onto.load()
+    return None
+
+
+def open_quadstore(ontology_path: str, quadstore=None):
+    # The ontology in a World of its own, file-backed when quadstore is given. A quadstore
+    # that already holds the ontology (an earlier export) is reused as it is.
+    from owlready2 import World
+
+    world = World(filename=quadstore) if quadstore else World()
+    return _attempt_ontology(world) or world.get_ontology(os.path.abspath(ontology_path)).load()
+
+
+def store_to_ontology(db_path: str, ontology_path: str, quadstore=None, output=None, since: float = None,
+                      until: float = None, batch_size: int = DEFAULT_BATCH_SIZE, progress_every: float = 2.0):
+    onto = open_quadstore(ontology_path, quadstore)
+    writer = OntologyAttemptWriter(onto, batch_size)
+    progress = _Progress("wrote", progress_every)
+    try:
+        for rows in read_attempt_store(db_path, since, until, batch_size):
+            for row in rows:
+                writer.append(*row)
+            progress.add(len(rows))
+        writer.close()
+
+        if output:
+            tmp_path = f"{output}.tmp-{os.getpid()}"
+            onto.save(file=tmp_path, format="rdfxml")
+            os.replace(tmp_path, output)
+        if quadstore:
+            onto.world.save()
+    finally:
+        onto.world.close()
+    return writer, progress
+
+
+# ---------- Ontology -> attempt store / file ----------
+def read_ontology_attempts(onto, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Attempt individuals as dicts with FILE_FIELDS keys, in creation order, batch_size
+    # at a time. Student, exercise and feedback names are cached (a few per student or
+    # exercise); attempt names are resolved per row so memory stays flat.
+    from owlready2 import rdf_type
+    from owlready2.base import from_literal
+
+    world = onto.world
+    exercise_index = build_exercise_index(onto)
+    generated = getattr(onto, GENERATED_EXERCISE_CLASS, None)
+    if generated is not None:
+        exercise_index.update((ex.name, exercise_entry(ex, None)) for ex in generated.instances())
+    _, feedback_keys = _top_feedback(onto)
+    names = {}
+
+    def name_of(storid):
+        if storid is None:
+            return None
+        name = names.get(storid)
+        if name is None:
+            name = names[storid] = local_name(world._unabbreviate(storid))
+        return name
+
+    cursor = world.graph.execute(
+        """SELECT a.s, st.o, ex.o, fb.o, sc.o, sc.d, ans.o, ans.d FROM objs a
+           LEFT JOIN objs st ON st.s = a.s AND st.p = ?
+           LEFT JOIN objs ex ON ex.s = a.s AND ex.p = ?
+           LEFT JOIN objs fb ON fb.s = a.s AND fb.p = ?
+           LEFT JOIN datas sc ON sc.s = a.s AND sc.p = ?
+           LEFT JOIN datas ans ON ans.s = a.s AND ans.p = ?
+           WHERE a.p = ? AND a.o = ?
+           GROUP BY a.s ORDER BY a.s""",
+        (onto.attemptedBy.storid, onto.concernsExercise.storid, onto.generatesFeedback.storid,
+         onto.hasScore.storid, onto.hasStudentAnswer.storid, rdf_type, onto.Attempt.storid),
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        batch = []
+        for s, student, exercise, feedback, score, score_type, answer, answer_type in rows:
+            exercise = name_of(exercise)
+            feedback = name_of(feedback)
+            entry = exercise_index.get(exercise)
+            if exercise is not None and exercise.startswith(EXERCISE_PREFIX):
+                exercise = None
+            shape_name, task = (entry["shape"], entry["task"]) if entry else feedback_keys.get(feedback, (None, None))
+            score = from_literal(score, score_type) if score is not None else None
+            batch.append({
+                "attempt": local_name(world._unabbreviate(s)),
+                "student_id": student_id_from(name_of(student)) if student is not None else None,
+                "shape": shape_name or UNKNOWN_SHAPE,
+                "task": task,
+                "exercise": exercise,
+                "student_answer": from_literal(answer, answer_type) if answer is not None else None,
+                "correct_answer": entry["correct_answer"] if entry else None,
+                "is_correct": bool(score),
+                "score": score,
+                "feedback": feedback,
+            })
+        yield batch
+
+
+def open_ontology(ontology_path: str = None, quadstore=None, use_snapshot: bool = True):
+    if quadstore:
+        from owlready2 import World
+
+        world = World(filename=quadstore, exclusive=False)
+        onto = _attempt_ontology(world)
+        if onto is not None:
+            return onto
+        world.close()
+        raise ValueError(f"{quadstore}: no ontology with an Attempt class")
+    from ontology_snapshot import load_ontology
+
+    return load_ontology(ontology_path, use_snapshot=use_snapshot)[0]
+
+
+def ontology_to_store(onto, db_path: str, batch_size: int = DEFAULT_BATCH_SIZE, progress_every: float = 2.0):
+    # Appends the attempts to an attempt store database (created if missing).
+    progress = _Progress("read", progress_every)
+    created_at = time.time()
+    conn = _connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        for batch in read_ontology_attempts(onto, batch_size):
+            conn.executemany(
+                "INSERT INTO attempts (student_id, shape, task, exercise, student_answer, correct_answer,"
+                " is_correct, created_at) VALUES (?,?,?,?,?,?,?,?)",
+                [(a["student_id"] or "", a["shape"], a["task"], a["exercise"], a["student_answer"],
+                  a["correct_answer"], 1 if a["is_correct"] else 0, created_at) for a in batch],
+            )
+            conn.commit()
+            progress.add(len(batch))
+    finally:
+        conn.close()
+    return progress
+
+
+def ontology_to_file(onto, path: str, fmt: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                     progress_every: float = 2.0):
+    # JSONL (one attempt per line) or CSV with FILE_FIELDS columns.
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    progress = _Progress("read", progress_every)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(f, FILE_FIELDS)
+            writer.writeheader()
+        for batch in read_ontology_attempts(onto, batch_size):
+            if writer is not None:
+                writer.writerows(batch)
+            else:
+                f.write("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in batch))
+            progress.add(len(batch))
+    os.replace(tmp_path, path)
+    return progress
+
+
+def _timestamp(value: str) -> float:
+    return time.mktime(datetime.date.fromisoformat(value).timetuple())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk copy attempts between the attempt store and the ontology")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    to_onto = commands.add_parser("to-ontology", help="attempt store -> Attempt individuals")
+    to_onto.add_argument("--attempt-db", default=DEFAULT_ATTEMPT_DB)
+    to_onto.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH, help="RDF file the attempts are added to")
+    to_onto.add_argument("--quadstore", help="owlready2 SQLite quadstore to write (kept, and reused on later runs)")
+    to_onto.add_argument("-o", "--output", help="RDF/XML file to write the ontology with the attempts to")
+    to_onto.add_argument("--since", help="only attempts from this date on (YYYY-MM-DD)")
+    to_onto.add_argument("--until", help="only attempts before this date (YYYY-MM-DD)")
+    to_onto.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    from_onto = commands.add_parser("from-ontology", help="Attempt individuals -> attempt store or file")
+    from_onto.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH, help="RDF file to read attempts from")
+    from_onto.add_argument("--quadstore", help="read from this owlready2 quadstore instead of --ontology")
+    from_onto.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly")
+    from_onto.add_argument("--attempt-db", help="attempt store database to append the attempts to")
+    from_onto.add_argument("-o", "--output", help="JSONL or CSV file to write the attempts to")
+    from_onto.add_argument("--format", choices=["jsonl", "csv"], help="default: from the output extension")
+    from_onto.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "to-ontology":
+        if not args.quadstore and not args.output:
+            parser.error("to-ontology needs --quadstore and/or --output")
+        try:
+            since = _timestamp(args.since) if args.since else None
+            until = _timestamp(args.until) if args.until else None
+        except ValueError as e:
+            parser.error(str(e))
+        writer, progress = store_to_ontology(args.attempt_db, args.ontology, args.quadstore, args.output,
+                                             since, until, args.batch_size)
+        print(f"Wrote {progress.count:,} attempts in {progress.elapsed():.1f} s ({progress.rate():,.0f} rows/s)")
+        if writer.unlinked > writer.lossy:
+            print(f"{writer.unlinked - writer.lossy:,} attempts have no ontology exercise and are linked to a"
+                  f" generated exercise for their shape and task (no correct answer)")
+        if writer.lossy:
+            print(f"{writer.lossy:,} attempts are on a shape or task the ontology does not have and"
+                  f" will read back as {UNKNOWN_SHAPE}", file=sys.stderr)
+        return
+
+    if not args.attempt_db and not args.output:
+        parser.error("from-ontology needs --attempt-db and/or --output")
+    try:
+        onto = open_ontology(args.ontology, args.quadstore, use_snapshot=not args.no_snapshot)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.attempt_db:
+        progress = ontology_to_store(onto, args.attempt_db, args.batch_size)
+        print(f"Copied {progress.count:,} attempts to {args.attempt_db} in {progress.elapsed():.1f} s"
+              f" ({progress.rate():,.0f} rows/s)")
+    if args.output:
+        progress = ontology_to_file(onto, args.output, args.format, args.batch_size)
+        print(f"Copied {progress.count:,} attempts to {args.output} in {progress.elapsed():.1f} s"
+              f" ({progress.rate():,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+# Durable attempt history. record() only enqueues; a writer thread inserts attempts in
+# grouped transactions (SQLite in WAL mode). Per-student aggregates are snapshotted
+# incrementally, so restoring a student reads one snapshot plus the attempts after it.
+
+DEFAULT_ATTEMPT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attempts.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    task TEXT,
+    exercise TEXT,
+    student_answer REAL,
+    correct_answer REAL,
+    is_correct INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_student ON attempts (student_id, id);
+CREATE TABLE IF NOT EXISTS student_snapshots (
+    student_id TEXT PRIMARY KEY,
+    last_attempt_id INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+EMPTY_STATE = {"total": 0, "correct": 0, "incorrect": 0, "by_shape": {}, "wrong_by_shape": {}}
+
+_SNAPSHOT = object()
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class AttemptStore:
+    def __init__(self, path: str = DEFAULT_ATTEMPT_DB, batch_size: int = 256,
+                 flush_interval: float = 0.25, snapshot_every: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.commit()
+        conn.close()
+
+        self._queue = queue.Queue()
+        self._since_snapshot = {}
+        self._writer = threading.Thread(target=self._run_writer, name="attempt-store-writer", daemon=True)
+        self._writer.start()
+
+    # ---------- Hot path ----------
+    def record(self, student_id: str, shape_name: str, is_correct: bool, task=None, exercise=None,
+               student_answer=None, correct_answer=None, created_at=None):
+        self._queue.put((
+            student_id, shape_name, task, exercise, student_answer, correct_answer,
+            1 if is_correct else 0, created_at if created_at is not None else time.time(),
+        ))
+
+    def snapshot(self, student_id: str):
+        self._queue.put((_SNAPSHOT, student_id))
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        # Pending attempts are written and every student touched since the last snapshot
+        # gets a fresh one before the writer exits.
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    # ---------- Writer thread ----------
+    def _run_writer(self):
+        conn = _connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                while item is not _STOP and len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+
+                try:
+                    self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    print(f"Attempt store: could not write {len(batch)} item(s): {e}", file=sys.stderr)
+                for _ in batch:
+                    self._queue.task_done()
+                if batch[-1] is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch):
+        due = []
+        with conn:
+            for item in batch:
+                if item is _STOP:
+                    due.extend(self._since_snapshot)
+                    continue
+                if item[0] is _SNAPSHOT:
+                    due.append(item[1])
+                    continue
+                conn.execute(
+                    "INSERT INTO attempts (student_id, shape, task, exercise, student_answer, correct_answer,"
+                    " is_correct, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    item,
+                )
+                student_id = item[0]
+                count = self._since_snapshot.get(student_id, 0) + 1
+                self._since_snapshot[student_id] = count
+                if count >= self.snapshot_every:
+                    due.append(student_id)
+            for student_id in dict.fromkeys(due):
+                self._write_snapshot(conn, student_id)
+
+    def _write_snapshot(self, conn: sqlite3.Connection, student_id: str):
+        state, last_id = _read_snapshot(conn, student_id)
+        new_last_id = conn.execute(
+            "SELECT COALESCE(MAX(id), ?) FROM attempts WHERE student_id = ? AND id > ?",
+            (last_id, student_id, last_id),
+        ).fetchone()[0]
+        if new_last_id != last_id:
+            _merge_tail(conn, state, student_id, last_id, new_last_id)
+            conn.execute(
+                "INSERT OR REPLACE INTO student_snapshots (student_id, last_attempt_id, state) VALUES (?, ?, ?)",
+                (student_id, new_last_id, json.dumps(state)),
+            )
+        self._since_snapshot.pop(student_id, None)
+
+    # ---------- Restore ----------
+    def load_state(self, student_id: str) -> dict:
+        # Everything recorded before this call is included; pending writes are flushed first.
+        self.flush()
+        conn = _connect(self.path)
+        try:
+            state, last_id = _read_snapshot(conn, student_id)
+            _merge_tail(conn, state, student_id, last_id, None)
+        finally:
+            conn.close()
+        return state
+
+    def restore(self, student_id: str, model):
+        model.restore_state(self.load_state(student_id))
+        return model
+
+
+def _read_snapshot(conn: sqlite3.Connection, student_id: str):
+    row = conn.execute(
+        "SELECT last_attempt_id, state FROM student_snapshots WHERE student_id = ?", (student_id,)
+    ).fetchone()
+    if row is None:
+        return json.loads(json.dumps(EMPTY_STATE)), 0
+    return json.loads(row[1]), row[0]
+
+
+def _merge_tail(conn: sqlite3.Connection, state: dict, student_id: str, after_id: int, upto_id):
+    # Folds attempts in (after_id, upto_id] into state. Shapes are visited in order of first
+    # appearance so the restored dicts keep the same ordering as live recording.
+    where = "student_id = ? AND id > ?"
+    params = [student_id, after_id]
+    if upto_id is not None:
+        where += " AND id <= ?"
+        params.append(upto_id)
+
+    rows = conn.execute(
+        f"SELECT shape, COUNT(*), SUM(is_correct) FROM attempts WHERE {where} GROUP BY shape ORDER BY MIN(id)",
+        params,
+    ).fetchall()
+    for shape, count, correct in rows:
+        state["total"] += count
+        state["correct"] += correct
+        state["incorrect"] += count - correct
+        state["by_shape"][shape] = state["by_shape"].get(shape, 0) + count
+
+    rows = conn.execute(
+        f"SELECT shape, COUNT(*) FROM attempts WHERE {where} AND is_correct = 0 GROUP BY shape ORDER BY MIN(id)",
+        params,
+    ).fetchall()
+    for shape, wrong in rows:
+        state["wrong_by_shape"][shape] = state["wrong_by_shape"].get(shape, 0) + wrong
+    return state
@@ -0,0 +1,250 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+from content_tables import ContentTables, ensure_tables
+from grading import FORMULAS
+from ontology_snapshot import ensure_snapshot
+from tutor_core import DEFAULT_ONTOLOGY_PATH, TutorCore, parse_answer, parse_dims
+
+# Offline grader for large submission exports (CSV with a header row, or JSONL).
+# The parent process only reads raw lines and writes results; chunks of lines are parsed
+# and graded by a process pool. The parent exports the ontology's content tables once and
+# every worker maps that file read-only (see content_tables), so workers neither parse the
+# ontology nor import owlready2; --no-tables makes each worker load the ontology instead.
+# At most `max_in_flight` chunks are queued at a time, so memory stays bounded no
+# matter how large the input is.
+#
+# Input columns: shape, task, answer, one column per dimension (length, width, side,
+# base, height, side1, side2, side3, radius) and optionally student_id. JSONL rows may
+# instead carry the dimensions as a "dims" object. CSV chunks are split on line
+# boundaries, so quoted fields must not contain newlines.
+
+DIM_FIELDS = sorted({d for dims, _ in FORMULAS.values() for d in dims})
+RESULT_FIELDS = ["correct_answer", "is_correct", "formula", "feedback", "misconception", "error"]
+
+_core = None
+
+
+def _init_worker(ontology_path: str, use_snapshot: bool, tables_path=None):
+    global _core
+    if tables_path is not None:
+        _core = ContentTables(tables_path)
+    else:
+        _core = TutorCore.load(ontology_path, use_snapshot=use_snapshot)
+
+
+def _parse_lines(lines, fmt: str, header):
+    if fmt == "csv":
+        yield from csv.DictReader(io.StringIO("".join(lines)), fieldnames=header)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"line": line.rstrip("\n"), "error": f"Invalid JSON: {e}"}
+        yield row if isinstance(row, dict) else {"line": line.rstrip("\n"), "error": "Expected a JSON object"}
+
+
+def _grade_row(row: dict) -> dict:
+    shape_name = row.get("shape", "")
+    task = row.get("task", "")
+    out = dict.fromkeys(RESULT_FIELDS, None)
+    if row.get("error"):
+        out["error"] = row["error"]
+        return out
+    try:
+        if not _core.has_shape(shape_name):
+            raise ValueError(f"Unknown shape: {shape_name}")
+        raw_dims = row.get("dims") if isinstance(row.get("dims"), dict) else row
+        dims = parse_dims(raw_dims, _core.required_dims(shape_name, task))
+        result = _core.grade(shape_name, task, dims, parse_answer(row.get("answer", "")))
+    except (ValueError, ArithmeticError) as e:
+        # One bad row is reported in its own error field and never stops the chunk.
+        out["error"] = str(e) or type(e).__name__
+        return out
+
+    out["correct_answer"] = result.correct_answer
+    out["is_correct"] = result.is_correct
+    out["formula"] = result.formula_text
+    out["feedback"] = result.feedback_text
+    out["misconception"] = result.misconception_text
+    return out
+
+
+def grade_chunk(args):
+    lines, fmt, header, out_fmt, out_header = args
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=out_header, extrasaction="ignore") if out_fmt == "csv" else None
+    aggregates = {}
+    rows = errors = 0
+
+    for row in _parse_lines(lines, fmt, header):
+        rows += 1
+        graded = _grade_row(row)
+        if graded["error"]:
+            errors += 1
+        else:
+            per_task = aggregates.setdefault(row["shape"], {}).setdefault(row["task"], [0, 0])
+            per_task[0] += 1
+            per_task[1] += 1 if graded["is_correct"] else 0
+
+        row.update(graded)
+        if writer is not None:
+            if isinstance(row.get("dims"), dict):
+                row.update(row["dims"])
+            writer.writerow(row)
+        else:
+            buf.write(json.dumps(row, ensure_ascii=False))
+            buf.write("\n")
+
+    return buf.getvalue(), aggregates, rows, errors, os.getpid()
+
+
+def _iter_chunks(f, chunk_size: int):
+    chunk = []
+    for line in f:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _detect_format(path: str, explicit):
+    if explicit:
+        return explicit
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _merge_aggregates(total: dict, part: dict):
+    for shape, tasks in part.items():
+        for task, (attempts, correct) in tasks.items():
+            slot = total.setdefault(shape, {}).setdefault(task, [0, 0])
+            slot[0] += attempts
+            slot[1] += correct
+
+
+def _aggregate_report(aggregates: dict, rows: int, errors: int) -> dict:
+    shapes = {}
+    for shape, tasks in sorted(aggregates.items()):
+        shapes[shape] = {}
+        for task, (attempts, correct) in sorted(tasks.items()):
+            shapes[shape][task] = {
+                "attempts": attempts,
+                "correct": correct,
+                "incorrect": attempts - correct,
+                "accuracy": round(correct / attempts, 4) if attempts else None,
+            }
+    return {"rows": rows, "errors": errors, "by_shape": shapes}
+
+
+def run(input_path: str, output_path: str, aggregates_path: str, ontology_path: str = DEFAULT_ONTOLOGY_PATH,
+        in_format=None, out_format=None, workers=None, chunk_size: int = 20000, max_in_flight=None,
+        use_snapshot: bool = True, use_tables: bool = True):
+    in_fmt = _detect_format(input_path, in_format)
+    out_fmt = _detect_format(output_path, out_format) if output_path != "-" else (out_format or in_fmt)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+
+    tables_path = None
+    if use_tables:
+        tables_path = ensure_tables(ontology_path, use_snapshot=use_snapshot)
+    elif use_snapshot:
+        ensure_snapshot(ontology_path)
+
+    start = time.perf_counter()
+    rows = errors = 0
+    aggregates = {}
+    worker_pids = set()     # workers that graded at least one chunk
+
+    fin = open(input_path, "r", encoding="utf-8", newline="")
+    fout = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8", newline="")
+    try:
+        header = None
+        if in_fmt == "csv":
+            header = next(csv.reader([fin.readline()]))
+        out_header = (header or ["student_id", "shape", "task"] + DIM_FIELDS + ["answer"]) + RESULT_FIELDS
+        if out_fmt == "csv":
+            csv.writer(fout).writerow(out_header)
+
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(ontology_path, use_snapshot, tables_path)) as pool:
+            pending = deque()
+            last_report = start
+
+            def drain_one():
+                nonlocal rows, errors, last_report
+                text, part, part_rows, part_errors, pid = pending.popleft().get()
+                worker_pids.add(pid)
+                fout.write(text)
+                _merge_aggregates(aggregates, part)
+                rows += part_rows
+                errors += part_errors
+                now = time.perf_counter()
+                if now - last_report >= 1.0:
+                    last_report = now
+                    print(f"graded {rows:,} rows ({rows / (now - start):,.0f} rows/s)", file=sys.stderr)
+
+            # Results are written in input order; the oldest chunk is awaited whenever the
+            # pipeline is full.
+            for chunk in _iter_chunks(fin, chunk_size):
+                pending.append(pool.apply_async(grade_chunk, ((chunk, in_fmt, header, out_fmt, out_header),)))
+                if len(pending) >= max_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+    finally:
+        fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+    report = _aggregate_report(aggregates, rows, errors)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["workers"] = len(worker_pids)
+    with open(aggregates_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a CSV/JSONL submission export with a process pool")
+    parser.add_argument("input", help="submission file (.csv with header row, or .jsonl)")
+    parser.add_argument("output", help="graded rows (.csv or .jsonl), or - for stdout")
+    parser.add_argument("--aggregates", help="per-shape summary JSON (default: <output>.aggregates.json)")
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--output-format", choices=["csv", "jsonl"])
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="rows per work item")
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly instead of the compiled snapshot")
+    parser.add_argument("--no-tables", action="store_true", help="load the ontology in every worker instead of sharing content tables")
+    args = parser.parse_args()
+
+    aggregates_path = args.aggregates or (
+        "aggregates.json" if args.output == "-" else args.output + ".aggregates.json"
+    )
+    report = run(
+        args.input, args.output, aggregates_path, args.ontology,
+        in_format=args.input_format, out_format=args.output_format, workers=args.workers,
+        chunk_size=args.chunk_size, use_snapshot=not args.no_snapshot,
+        use_tables=not args.no_tables,
+    )
+    print(
+        f"Graded {report['rows']:,} rows ({report['errors']:,} errors) in {report['seconds']}s"
+        f" on {report['workers']} worker(s);"
+        f" aggregates written to {aggregates_path}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_grading import grade_batch  # noqa: E402
+from grading import FORMULAS, compute_correct_answer, within_tolerance  # noqa: E402
+
+SHAPES = ["RectangleShape", "SquareShape", "TriangleShape", "CircleShape"]
+DIM_NAMES = sorted({d for dims, _ in FORMULAS.values() for d in dims})
+
+
+def make_rows(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    shapes = np.array(SHAPES)[rng.integers(0, len(SHAPES), n)]
+    tasks = np.array(["Area", "Perimeter"])[rng.integers(0, 2, n)]
+    dims = {d: rng.uniform(1, 50, n).round(1) for d in DIM_NAMES}
+    # Roughly half the answers are exact, the rest are off by more or less than the tolerance.
+    exact, _ = grade_batch(shapes, tasks, dims, np.zeros(n))
+    answers = exact + rng.choice([0.0, 0.005, 0.5, -3.0], n)
+    return shapes, tasks, dims, answers
+
+
+def grade_per_row(shapes, tasks, dims, answers):
+    columns = {d: col.tolist() for d, col in dims.items()}
+    correct = []
+    mask = []
+    for i, (shape, task, answer) in enumerate(zip(shapes.tolist(), tasks.tolist(), answers.tolist())):
+        value = compute_correct_answer(shape, task, {d: columns[d][i] for d in DIM_NAMES})
+        correct.append(value)
+        mask.append(within_tolerance(answer, value))
+    return np.array(correct), np.array(mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vectorized batch grading with the per-row loop")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shapes, tasks, dims, answers = make_rows(args.rows, args.seed)
+
+    start = time.perf_counter()
+    loop_correct, loop_mask = grade_per_row(shapes, tasks, dims, answers)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_correct, batch_mask = grade_batch(shapes, tasks, dims, answers)
+    batch_s = time.perf_counter() - start
+
+    assert np.array_equal(loop_correct, batch_correct), "correct answers differ between paths"
+    assert np.array_equal(loop_mask, batch_mask), "correctness masks differ between paths"
+
+    print(f"rows:        {args.rows:,}")
+    print(f"per-row:     {loop_s:.3f}s ({args.rows / loop_s:,.0f} rows/s)")
+    print(f"vectorized:  {batch_s:.3f}s ({args.rows / batch_s:,.0f} rows/s)")
+    print(f"speedup:     {loop_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import argparse
+import csv
+import heapq
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import METRICS, Histogram  # noqa: E402
+from student_model import StudentModel  # noqa: E402
+from tutor_core import DEFAULT_ONTOLOGY_PATH, TutorCore, parse_answer, parse_dims  # noqa: E402
+
+# Load generator for the headless grading path (parse, TutorCore.grade -> correct answer and
+# feedback lookup, StudentModel.record), driven the way the tutor runs it: one grading
+# thread, attempts handled in arrival order. Attempts come from simulated students or from
+# a replayed attempt log:
+#
+#   python -m benchmarks.load_generator --students 800 --rate 200 --duration 30 -o load.json
+#   python -m benchmarks.load_generator --replay attempts.sqlite3 --speed 10
+#   python -m benchmarks.load_generator --rate 0 --attempts 200000 -o after.json --compare before.json
+#
+# The load is open-loop: each attempt has an intended start time and a slow tutor does not
+# slow the students down. "latency" is measured from the intended start, so it includes
+# time spent queued behind earlier attempts; "service" is the grading work alone.
+# Percentiles for both are taken from the exact samples; the fixed-bucket histograms are
+# only used to draw the distribution. Phases are compared by their exact mean.
+
+DEFAULT_PROFILE = {"count": 100, "correct_rate": 0.7, "correct_spread": 0.15, "think_time": 20.0, "shape_mix": {}}
+WRONG_FACTORS = (0.5, 0.8, 1.25, 2.0)
+DIM_RANGE = (1.0, 20.0)
+
+
+class Attempt:
+    __slots__ = ("offset", "student_id", "shape", "task", "raw_dims", "raw_answer")
+
+    def __init__(self, offset, student_id, shape, task, raw_dims, raw_answer):
+        self.offset = offset
+        self.student_id = student_id
+        self.shape = shape
+        self.task = task
+        self.raw_dims = raw_dims
+        self.raw_answer = raw_answer
+
+
+def random_dims(core, rng, shape_name: str, task: str) -> dict:
+    return {d: round(rng.uniform(*DIM_RANGE), 1) for d in core.required_dims(shape_name, task)}
+
+
+def answer_for(core, rng, shape_name: str, task: str, dims: dict, correct: bool) -> str:
+    # A correct answer as a student would type it, or one off by a typical factor.
+    value = core.compute_correct_answer(shape_name, task, dims)
+    if not correct:
+        value *= rng.choice(WRONG_FACTORS)
+    return f"{value:.2f}"
+
+
+# ---------- Simulated students ----------
+def load_profiles(path=None, **overrides) -> list:
+    # A profiles file is a JSON list of {"count", "correct_rate", "correct_spread",
+    # "think_time", "shape_mix": {shape: weight}}; missing keys take the defaults.
+    if path is None:
+        return [dict(DEFAULT_PROFILE, **{k: v for k, v in overrides.items() if v is not None})]
+    with open(path, "r", encoding="utf-8") as f:
+        return [dict(DEFAULT_PROFILE, **profile) for profile in json.load(f)]
+
+
+def parse_shape_mix(text) -> dict:
+    # "RectangleShape=3,CircleShape=1"
+    mix = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            name, _, weight = part.partition("=")
+            mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _time_advances(profiles, rate: float) -> bool:
+    # With no rate cap and no think time every attempt starts at offset 0.
+    return rate > 0 or any(profile["think_time"] > 0 for profile in profiles)
+
+
+def simulate(core, profiles, rate: float = 0.0, duration: float = None, attempts: int = None, seed: int = 0):
+    # Yields Attempts in intended-start order. Every student waits an exponentially
+    # distributed think time (mean think_time) between attempts; `rate` caps the total
+    # attempts per second (0 = no cap).
+    if duration is not None and attempts is None and not _time_advances(profiles, rate):
+        raise ValueError("a duration needs a rate cap or a think time above 0, or an attempt count")
+    rng = random.Random(seed)
+    skills = [(shape, task) for shape in core.shape_names() for task in ("Area", "Perimeter")
+              if core.required_dims(shape, task)]
+    if not skills:
+        return
+
+    students = []   # (student id, correct rate, think time, skills, weights)
+    for p, profile in enumerate(profiles):
+        mix = profile["shape_mix"]
+        weights = [mix.get(shape, 0.0 if mix else 1.0) for shape, _ in skills]
+        if not any(weights):
+            raise ValueError(f"Profile {p}: shape_mix names no gradable shape ({', '.join(core.shape_names())})")
+        for i in range(profile["count"]):
+            correct_rate = min(1.0, max(0.0, rng.gauss(profile["correct_rate"], profile["correct_spread"])))
+            students.append((f"p{p}-s{i}", correct_rate, profile["think_time"], skills, weights))
+
+    # Students start at random points of their first think time, so they do not all arrive at once.
+    ready = [(rng.uniform(0, think) if think > 0 else 0.0, i) for i, (_, _, think, _, _) in enumerate(students)]
+    heapq.heapify(ready)
+
+    interval = 1.0 / rate if rate > 0 else 0.0
+    last = -interval
+    n = 0
+    while ready and (attempts is None or n < attempts):
+        ready_at, i = heapq.heappop(ready)
+        offset = max(ready_at, last + interval)
+        if duration is not None and offset > duration:
+            return
+        last = offset
+
+        student_id, correct_rate, think, skills, weights = students[i]
+        shape, task = rng.choices(skills, weights)[0]
+        dims = random_dims(core, rng, shape, task)
+        answer = answer_for(core, rng, shape, task, dims, rng.random() < correct_rate)
+        yield Attempt(offset, student_id, shape, task, {d: str(v) for d, v in dims.items()}, answer)
+        n += 1
+        heapq.heappush(ready, (offset + (rng.expovariate(1.0 / think) if think > 0 else 0.0), i))
+
+
+# ---------- Replay ----------
+def replay_attempt_store(core, path: str, speed: float = 1.0, seed: int = 0):
+    # AttemptStore keeps the outcome but not the dimensions, so each saved attempt is
+    # replayed with fresh dimensions and an answer that is right exactly when it was.
+    rng = random.Random(seed)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT student_id, shape, task, is_correct, created_at FROM attempts ORDER BY id")
+        first = None
+        for student_id, shape, task, is_correct, created_at in rows:
+            # Rows saved before tasks were recorded are replayed as Area attempts.
+            task = task or "Area"
+            if not core.has_shape(shape) or not core.required_dims(shape, task):
+                continue
+            first = created_at if first is None else first
+            dims = random_dims(core, rng, shape, task)
+            yield Attempt(
+                (created_at - first) / speed if speed > 0 else 0.0, student_id, shape, task,
+                {d: str(v) for d, v in dims.items()}, answer_for(core, rng, shape, task, dims, bool(is_correct)),
+            )
+    finally:
+        conn.close()
+
+
+def replay_submissions(path: str, speed: float = 1.0):
+    # Batch-grader input (CSV or JSONL with shape, task, answer and dimension columns).
+    # An optional created_at column (epoch seconds) paces the replay; without it the
+    # attempts are sent back to back.
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        first = None
+        for n, row in enumerate(rows):
+            created_at = row.get("created_at")
+            offset = 0.0
+            if created_at not in (None, "") and speed > 0:
+                created_at = float(created_at)
+                first = created_at if first is None else first
+                offset = (created_at - first) / speed
+            raw_dims = row["dims"] if isinstance(row.get("dims"), dict) else row
+            yield Attempt(offset, row.get("student_id") or f"row{n}", row.get("shape", ""), row.get("task", ""),
+                          raw_dims, row.get("answer", ""))
+
+
+def replay(core, path: str, speed: float = 1.0, seed: int = 0):
+    if path.lower().endswith((".sqlite3", ".sqlite", ".db")):
+        return replay_attempt_store(core, path, speed, seed)
+    return replay_submissions(path, speed)
+
+
+# ---------- Driver ----------
+def drive(core, attempts, realtime: bool = True, progress_every: float = 5.0) -> dict:
+    # Grades every attempt on this thread. With realtime=False the intended start times are
+    # ignored and attempts are graded back to back (maximum throughput).
+    latency = Histogram()
+    service = Histogram()
+    latency_samples = array("d")
+    service_samples = array("d")
+    students = {}
+    graded = correct = errors = 0
+
+    start = time.perf_counter()
+    last_report = start
+    for attempt in attempts:
+        intended = start + attempt.offset if realtime else time.perf_counter()
+        wait = intended - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+
+        t0 = time.perf_counter()
+        try:
+            with METRICS.timer("submit.parse"):
+                dims = parse_dims(attempt.raw_dims, core.required_dims(attempt.shape, attempt.task))
+                answer = parse_answer(attempt.raw_answer)
+            with METRICS.timer("submit.grade"):
+                result = core.grade(attempt.shape, attempt.task, dims, answer)
+            with METRICS.timer("submit.record"):
+                model = students.get(attempt.student_id)
+                if model is None:
+                    model = students[attempt.student_id] = StudentModel()
+                model.record(attempt.shape, result.is_correct)
+        except ValueError:
+            errors += 1
+            continue
+        t1 = time.perf_counter()
+
+        graded += 1
+        correct += result.is_correct
+        service.observe(t1 - t0)
+        latency.observe(t1 - intended)
+        service_samples.append(t1 - t0)
+        latency_samples.append(t1 - intended)
+        if progress_every and t1 - last_report >= progress_every:
+            last_report = t1
+            print(f"graded {graded:,} attempts ({graded / (t1 - start):,.0f}/s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "attempts": graded,
+        "errors": errors,
+        "students": len(students),
+        "accuracy": round(correct / graded, 4) if graded else None,
+        "seconds": round(elapsed, 6),
+        "throughput": round(graded / elapsed, 2) if elapsed else None,
+        "latency": _distribution(latency, latency_samples),
+        "service": _distribution(service, service_samples),
+    }
+
+
+def _distribution(hist, samples) -> dict:
+    # Histogram buckets for the chart, with mean, max and p50/p90/p99 (nearest rank) from
+    # the exact samples rather than the bucket bounds.
+    out = hist.to_dict()
+    ordered = sorted(samples)
+    n = len(ordered)
+    out["mean"] = hist.sum / n if n else None
+    out["max"] = ordered[-1] if n else None
+    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        out[name] = ordered[max(0, math.ceil(q * n) - 1)] if n else None
+    return out
+
+
+def _mean(h: dict):
+    return h["sum"] / h["count"] if h.get("count") else None
+
+
+def _ms(value):
+    return "-" if value is None else ("inf" if value == float("inf") else f"{value * 1000:.3f}")
+
+
+def print_report(result: dict):
+    print(f"\n{result['attempts']:,} attempts from {result['students']:,} students in {result['seconds']:.2f} s"
+          f" ({result['throughput'] or 0:,.0f} attempts/s, {result['errors']} errors)")
+    for name in ("latency", "service"):
+        h = result[name]
+        print(f"{name:>8} ms: mean {_ms(h['mean'])}  p50 {_ms(h['p50'])}  p90 {_ms(h['p90'])}"
+              f"  p99 {_ms(h['p99'])}  max {_ms(h['max'])}")
+
+    h = result["latency"]
+    peak = max(list(h["buckets"].values()) + [h["overflow"]]) or 1
+    print("\nlatency histogram (upper bound, ms):")
+    for bound, n in list(h["buckets"].items()) + [("inf", h["overflow"])]:
+        if n:
+            label = bound if bound == "inf" else f"{float(bound) * 1000:g}"
+            print(f"  <= {label:>8} {n:>10,} {'#' * max(1, round(40 * n / peak))}")
+
+    phases = result.get("phases", {})
+    if phases:
+        print("\nphases (mean ms, p99 upper bound ms):")
+        for name, p in phases.items():
+            print(f"  {name:<20} {p['count']:>10,}  {_ms(_mean(p)):>8}  <= {_ms(p['p99'])}")
+
+
+def compare(result: dict, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["result"]
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    checks = [
+        ("throughput", baseline["throughput"], result["throughput"], False),
+        ("latency mean", baseline["latency"]["mean"], result["latency"]["mean"], True),
+        ("latency p99", baseline["latency"]["p99"], result["latency"]["p99"], True),
+        ("service mean", baseline["service"]["mean"], result["service"]["mean"], True),
+        ("service p99", baseline["service"]["p99"], result["service"]["p99"], True),
+    ]
+    old_phases = baseline.get("phases", {})
+    for name, p in result.get("phases", {}).items():
+        if name in old_phases:
+            checks.append((name, _mean(old_phases[name]), _mean(p), True))
+    for name, old, new, lower_is_better in checks:
+        if not old or new is None:
+            continue
+        ratio = new / old
+        worse = ratio > 1 + threshold if lower_is_better else ratio < 1 - threshold
+        regressions += 1 if worse else 0
+        print(f"  {name:<14} {old:>12,.6g} -> {new:>12,.6g}  x{ratio:.2f} {'REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated-student load generator for the grading path")
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the ontology file instead of the snapshot")
+    parser.add_argument("--replay", help="attempt log to replay: AttemptStore database, or batch-grader CSV/JSONL")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up (0 = back to back)")
+    parser.add_argument("--profiles", help="JSON list of student profiles (overrides the options below)")
+    parser.add_argument("--students", type=int, help=f"simulated students (default {DEFAULT_PROFILE['count']})")
+    parser.add_argument("--correct-rate", type=float, help="mean chance that an answer is right")
+    parser.add_argument("--correct-spread", type=float, help="standard deviation of the correct rate across students")
+    parser.add_argument("--think-time", type=float, help="mean seconds between a student's attempts")
+    parser.add_argument("--shape-mix", help="relative shape weights, e.g. RectangleShape=3,CircleShape=1")
+    parser.add_argument("--rate", type=float, default=0.0, help="cap on attempts per second (0 = no cap)")
+    parser.add_argument("--duration", type=float, help="seconds of simulated load")
+    parser.add_argument("--attempts", type=int, help="stop after this many attempts")
+    parser.add_argument("--flat-out", action="store_true", help="ignore start times and grade back to back")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the report as JSON")
+    parser.add_argument("--compare", help="earlier report JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="change ratio reported as a regression")
+    args = parser.parse_args()
+
+    if not args.replay and args.duration is None and args.attempts is None:
+        parser.error("give --duration or --attempts (or --replay)")
+
+    core = TutorCore.load(args.ontology, use_snapshot=not args.no_snapshot)
+    if args.replay:
+        attempts = replay(core, args.replay, args.speed, args.seed)
+        if args.attempts is not None:
+            attempts = (a for n, a in zip(range(args.attempts), attempts))
+    else:
+        profiles = load_profiles(
+            args.profiles, count=args.students, correct_rate=args.correct_rate,
+            correct_spread=args.correct_spread, think_time=args.think_time,
+            shape_mix=parse_shape_mix(args.shape_mix) if args.shape_mix else None,
+        )
+        if args.duration is not None and args.attempts is None and not _time_advances(profiles, args.rate):
+            parser.error("--duration needs --rate or --think-time above 0 (or give --attempts)")
+        attempts = simulate(core, profiles, args.rate, args.duration, args.attempts, args.seed)
+
+    METRICS.reset()
+    METRICS.enable()
+    result = drive(core, attempts, realtime=not args.flat_out)
+    result["phases"] = METRICS.snapshot()["phases"]
+    print_report(result)
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": vars(args),
+            },
+            "result": result,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare and compare(result, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
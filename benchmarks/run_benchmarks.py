@@ -0,0 +1,221 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_ontology import generate  # noqa: E402
+from ontology_index import build_exercise_index, get_first  # noqa: E402
+from ontology_snapshot import load_ontology  # noqa: E402
+from student_model import StudentModel  # noqa: E402
+from tutor_core import TutorCore, parse_answer, parse_dims  # noqa: E402
+
+# Benchmarks the tutor's hot paths on synthetic ontologies of increasing size and writes
+# machine-readable results, so runs from two commits can be compared:
+#
+#   python -m benchmarks.run_benchmarks --sizes 1000 10000 -o before.json
+#   python -m benchmarks.run_benchmarks --sizes 1000 10000 -o after.json --compare before.json
+
+DEFAULT_SIZES = [1000, 10000]
+
+
+def measure(fn, min_time: float, max_ops: int = 1_000_000):
+    ops = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        ops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or ops >= max_ops:
+            return ops, elapsed
+
+
+def measure_once(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+# ---------- Pre-index implementations, kept as a baseline ----------
+def feedback_scan(onto, shape_ind, task_ind):
+    for fb in onto.Feedback.instances():
+        fb_shape = get_first(getattr(fb, "feedbackForShape", []), None)
+        fb_task = get_first(getattr(fb, "feedbackForTask", []), None)
+        if fb_shape == shape_ind and fb_task == task_ind:
+            fb_text = get_first(getattr(fb, "hasText", []), None)
+            mc = get_first(getattr(fb, "addressesMisconception", []), None)
+            mc_text = get_first(getattr(mc, "hasDescription", []), None) if mc else None
+            if fb_text:
+                return fb_text, mc_text
+    return None, None
+
+
+def shape_scan(onto, exercise):
+    for shape in onto.Shape.instances():
+        if exercise in shape.hasExercise:
+            return shape
+    return None
+
+
+# ---------- Suite ----------
+def run_size(size: int, workdir: str, seed: int, min_time: float):
+    from owlready2 import World
+
+    results = []
+
+    def add(name, ops, seconds):
+        results.append({
+            "benchmark": name,
+            "size": size,
+            "ops": ops,
+            "seconds": round(seconds, 6),
+            "us_per_op": round(seconds / ops * 1e6, 3),
+        })
+        print(f"  {name:<32} {seconds / ops * 1e6:>14,.2f} us/op  ({ops:,} ops)")
+
+    path = os.path.join(workdir, f"synthetic_{size}_{seed}.rdf")
+    if not os.path.exists(path):
+        generate(path, size, seed)
+    cache_dir = os.path.join(workdir, "snapshots")
+
+    parsed, seconds = measure_once(lambda: World().get_ontology(path).load())
+    add("load.rdf_parse", 1, seconds)
+    parsed.world.close()
+
+    snapshot_db = os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0] + ".sqlite3")
+    if os.path.exists(snapshot_db):
+        os.remove(snapshot_db)
+    (cold, _), seconds = measure_once(lambda: load_ontology(path, cache_dir=cache_dir))
+    add("load.snapshot_miss", 1, seconds)
+    # Measure the warm load on its own: release the cold load's World (and its handle on
+    # the snapshot) first.
+    cold.world.close()
+    (onto, info), seconds = measure_once(lambda: load_ontology(path, cache_dir=cache_dir))
+    add("load.snapshot_hit", 1, seconds)
+
+    core, seconds = measure_once(lambda: TutorCore(onto))
+    add("index.tutor_core", 1, seconds)
+    exercise_index, seconds = measure_once(lambda: build_exercise_index(onto))
+    add("index.exercises", 1, seconds)
+
+    rng = random.Random(seed)
+    shape_names = core.shape_names()
+    pairs = [(rng.choice(shape_names), rng.choice(["Area", "Perimeter"])) for _ in range(256)]
+    task_inds = {"Area": core.area_task_ind, "Perimeter": core.perimeter_task_ind}
+
+    scan_pairs = itertools.cycle([(core.shape_instances[s], task_inds[t]) for s, t in pairs])
+    add("feedback.scan", *measure(lambda: feedback_scan(onto, *next(scan_pairs)), min_time, max_ops=200))
+    index_pairs = itertools.cycle(pairs)
+    add("feedback.index", *measure(lambda: core.feedback_for(*next(index_pairs)), min_time))
+
+    exercises = list(onto.Exercise.instances())
+    sample = [rng.choice(exercises) for _ in range(256)]
+    scan_exercises = itertools.cycle(sample)
+    add("exercise_shape.scan", *measure(lambda: shape_scan(onto, next(scan_exercises)), min_time, max_ops=200))
+    index_names = itertools.cycle([ex.name for ex in sample])
+    add("exercise_shape.index", *measure(lambda: exercise_index[next(index_names)]["shape"], min_time))
+
+    graded = []
+    for shape_name, task in pairs:
+        dims = {d: float(rng.randint(1, 40)) for d in core.required_dims(shape_name, task)}
+        graded.append((shape_name, task, dims))
+    compute_inputs = itertools.cycle(graded)
+    add("grading.compute_correct_answer", *measure(lambda: core.compute_correct_answer(*next(compute_inputs)), min_time))
+
+    model = StudentModel()
+    record_inputs = itertools.cycle([(s, rng.random() < 0.6) for s, _ in pairs])
+    add("student_model.record", *measure(lambda: model.record(*next(record_inputs)), min_time))
+    add("student_model.summary_text", *measure(model.summary_text, min_time))
+
+    submit_model = StudentModel()
+    submit_inputs = itertools.cycle([
+        (s, t, {d: str(v) for d, v in dims.items()}, str(rng.randint(1, 500))) for s, t, dims in graded
+    ])
+
+    def submit():
+        shape_name, task, raw_dims, raw_answer = next(submit_inputs)
+        dims = parse_dims(raw_dims, core.required_dims(shape_name, task))
+        result = core.grade(shape_name, task, dims, parse_answer(raw_answer))
+        submit_model.record(shape_name, result.is_correct)
+        return "\n".join(result.lines()), submit_model.summary_text()
+
+    add("submit.end_to_end", *measure(submit, min_time))
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    for r in results:
+        old = baseline.get((r["benchmark"], r["size"]))
+        if old is None:
+            continue
+        ratio = r["us_per_op"] / old["us_per_op"] if old["us_per_op"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        regressions += 1 if flag else 0
+        print(f"  {r['benchmark']:<32} n={r['size']:<8} {old['us_per_op']:>12,.2f} -> {r['us_per_op']:>12,.2f} us/op"
+              f"  x{ratio:.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tutor benchmark suite on synthetic ontologies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="generated individuals per ontology (10^3 - 10^6)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent per micro-benchmark")
+    parser.add_argument("--workdir", help="where synthetic ontologies and snapshots are kept (default: temp dir)")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tutor-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    for size in args.sizes:
+        print(f"n = {size:,} individuals")
+        results.extend(run_size(size, workdir, args.seed, args.min_time))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import os
+import random
+from xml.sax.saxutils import escape
+
+# Writes a synthetic ontology with the same schema as areaperimeter.rdf: the real file's
+# schema and individuals are copied, then N generated individuals are appended (shapes
+# with formulas, exercises, feedback, misconceptions, students and attempts).
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_RDF = os.path.join(REPO_ROOT, "areaperimeter.rdf")
+NS = "http://www.example.org/area_perimeter_ontology#"
+XSD_DECIMAL = "http://www.w3.org/2001/XMLSchema#decimal"
+
+# Share of the generated individuals per kind.
+MIX = {
+    "shape": 0.02,
+    "formula": 0.04,
+    "misconception": 0.14,
+    "feedback": 0.30,
+    "exercise": 0.25,
+    "student": 0.05,
+    "attempt": 0.20,
+}
+
+SHAPE_KINDS = {
+    "Rectangle": ("Area = length × width", "Perimeter = 2 × (length + width)", ["length", "width"]),
+    "Square": ("Area = side × side", "Perimeter = 4 × side", ["side"]),
+    "Triangle": ("Area = ½ × base × height", "Perimeter = side1 + side2 + side3", ["base", "height"]),
+    "Circle": ("Area = π × radius²", "Perimeter = 2 × π × radius", ["radius"]),
+}
+EXERCISE_DIM_PROPS = {"length": "hasLength", "width": "hasWidth", "side": "hasLength",
+                      "base": "hasBase", "height": "hasHeight", "radius": "hasRadius"}
+
+
+def _individual(name: str, cls: str, props):
+    lines = [f'    <owl:NamedIndividual rdf:about="{NS}{name}">',
+             f'        <rdf:type rdf:resource="{NS}{cls}"/>']
+    for prop, kind, value in props:
+        if kind == "ref":
+            lines.append(f'        <area_perimeter_ontology:{prop} rdf:resource="{NS}{value}"/>')
+        elif kind == "num":
+            lines.append(f'        <area_perimeter_ontology:{prop} rdf:datatype="{XSD_DECIMAL}">{value}</area_perimeter_ontology:{prop}>')
+        else:
+            lines.append(f'        <area_perimeter_ontology:{prop}>{escape(str(value))}</area_perimeter_ontology:{prop}>')
+    lines.append("    </owl:NamedIndividual>\n")
+    return "\n".join(lines) + "\n"
+
+
+def counts_for(n: int) -> dict:
+    counts = {kind: max(1, int(n * share)) for kind, share in MIX.items()}
+    counts["shape"] = max(4, counts["shape"])
+    counts["formula"] = counts["shape"] * 2
+    return counts
+
+
+def generate(path: str, n: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    counts = counts_for(n)
+
+    with open(SOURCE_RDF, "r", encoding="utf-8") as f:
+        base = f.read()
+    head = base[:base.rindex("</rdf:RDF>")]
+
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(head)
+
+        shapes = []
+        kinds = list(SHAPE_KINDS)
+        for i in range(counts["shape"]):
+            kind = kinds[i % len(kinds)]
+            area_text, per_text, _ = SHAPE_KINDS[kind]
+            name = f"Syn{kind}Shape{i}"
+            out.write(_individual(f"{name}AreaFormula", "AreaFormula", [("hasDescription", "str", area_text)]))
+            out.write(_individual(f"{name}PerimeterFormula", "PerimeterFormula", [("hasDescription", "str", per_text)]))
+            shapes.append((name, kind))
+
+        misconceptions = [f"SynMisconception{i}" for i in range(counts["misconception"])]
+        for name in misconceptions:
+            out.write(_individual(name, "Misconception", [("hasDescription", "str", f"Synthetic misconception {name}.")]))
+
+        feedback = []
+        for i in range(counts["feedback"]):
+            shape, _ = rng.choice(shapes)
+            task = rng.choice(["AreaTask", "PerimeterTask"])
+            name = f"SynFeedback{i}"
+            out.write(_individual(name, "Feedback", [
+                ("addressesMisconception", "ref", rng.choice(misconceptions)),
+                ("feedbackForShape", "ref", shape),
+                ("feedbackForTask", "ref", task),
+                ("hasText", "str", f"Synthetic feedback {i} for {shape}."),
+            ]))
+            feedback.append(name)
+
+        exercises_by_shape = {name: [] for name, _ in shapes}
+        exercises = []
+        for i in range(counts["exercise"]):
+            shape, kind = rng.choice(shapes)
+            dims = {d: rng.randint(1, 40) for d in SHAPE_KINDS[kind][2]}
+            if kind == "Rectangle":
+                answer, text = dims["length"] * dims["width"], f"length {dims['length']} and width {dims['width']}"
+            elif kind == "Square":
+                answer, text = dims["side"] ** 2, f"side {dims['side']}"
+            elif kind == "Triangle":
+                answer, text = 0.5 * dims["base"] * dims["height"], f"base {dims['base']} and height {dims['height']}"
+            else:
+                answer, text = round(3.141592653589793 * dims["radius"] ** 2, 2), f"radius {dims['radius']}"
+            name = f"SynExercise{i}"
+            props = [("hasCorrectAnswer", "num", answer),
+                     ("hasDescription", "str", f"Find the area of a {kind.lower()} with {text}."),
+                     ("hasDifficulty", "str", rng.choice(["Easy", "Medium", "Hard"]))]
+            props += [(EXERCISE_DIM_PROPS[d], "num", v) for d, v in dims.items()]
+            out.write(_individual(name, "Exercise", props))
+            exercises_by_shape[shape].append(name)
+            exercises.append(name)
+
+        for name, kind in shapes:
+            props = [("hasAreaFormula", "ref", f"{name}AreaFormula"),
+                     ("hasPerimeterFormula", "ref", f"{name}PerimeterFormula")]
+            props += [("hasExercise", "ref", ex) for ex in exercises_by_shape[name]]
+            out.write(_individual(name, kind, props))
+
+        students = [f"SynStudent{i}" for i in range(counts["student"])]
+        for name in students:
+            out.write(_individual(name, "Student", []))
+
+        for i in range(counts["attempt"]):
+            out.write(_individual(f"SynAttempt{i}", "Attempt", [
+                ("attemptedBy", "ref", rng.choice(students)),
+                ("concernsExercise", "ref", rng.choice(exercises)),
+                ("generatesFeedback", "ref", rng.choice(feedback)),
+                ("hasScore", "num", rng.randint(0, 1)),
+                ("hasStudentAnswer", "num", rng.randint(1, 500)),
+            ]))
+
+        out.write("</rdf:RDF>\n")
+
+    counts["total"] = sum(v for k, v in counts.items())
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic area/perimeter ontology")
+    parser.add_argument("--individuals", type=int, default=1000, help="number of generated individuals (10^3 - 10^6)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    counts = generate(args.output, args.individuals, args.seed)
+    print(f"Wrote {args.output}: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
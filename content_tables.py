@@ -0,0 +1,375 @@
+import argparse
+import math
+import mmap
+import os
+import struct
+
+from grading import FORMULAS, TASKS, TOLERANCE, within_tolerance
+from ontology_index import (
+    DEFAULT_FEEDBACK_TEXT,
+    DEFAULT_MISCONCEPTION_TEXT,
+    NO_FEEDBACK_TEXT,
+    build_exercise_index,
+)
+from ontology_snapshot import SNAPSHOT_DIR_NAME, file_sha256
+from shape_registry import compile_formula, evaluate
+from tutor_core import DEFAULT_ONTOLOGY_PATH, GradeResult, TutorCore
+
+# Read-only content tables derived from the ontology (shapes, grading rules, formula text,
+# ranked feedback/misconception text, exercises and their answers), written once to a
+# compact binary file that worker processes mmap. Attaching costs a header read: rows are
+# decoded on demand straight from the shared page cache and looked up by binary search,
+# and nothing here imports owlready2.
+#
+# Layout (little-endian):
+#   header    magic "APCT", format, source SHA-256, source mtime_ns/size, section count
+#   sections  name, offset, length  (one entry per section below)
+#   str_offs  uint32[n + 1]  byte offsets into str_data; string i = str_data[offs[i]:offs[i+1]]
+#   str_data  UTF-8 bytes
+#   shapes    SHAPE rows sorted by shape name
+#   rules     RULE rows, len(TASKS) per shape, in shape order
+#   feedback  FEEDBACK rows sorted by (shape name, task, rank)
+#   exercise  EXERCISE rows sorted by exercise name
+#   ex_order  uint32 row numbers of `exercise` in ontology order
+#
+# String references are indices into the string table; NONE marks a missing value.
+
+MAGIC = b"APCT"
+TABLES_FORMAT = 1
+NONE = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sI32sqqI")
+SECTION = struct.Struct("<8sQQ")
+SHAPE = struct.Struct("<I")
+RULE = struct.Struct("<IIIII")           # dims ("a,b"), expression, formula text, built-in kind, present
+FEEDBACK = struct.Struct("<IIII")        # shape name, task, feedback text, misconception text
+EXERCISE = struct.Struct("<IIIIIId")     # name, description, difficulty, task, shape, formula, answer
+SECTIONS = ("str_offs", "str_data", "shapes", "rules", "feedback", "exercise", "ex_order")
+TASK_IDS = {task: i for i, task in enumerate(TASKS)}
+
+
+class ContentTablesError(Exception):
+    pass
+
+
+def tables_path(source_path: str, cache_dir=None) -> str:
+    source_path = os.path.abspath(source_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source_path), SNAPSHOT_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, stem + ".tables")
+
+
+# ---------- Export ----------
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.data = bytearray()
+        self.offsets = [0]
+
+    def add(self, text) -> int:
+        if text is None:
+            return NONE
+        text = str(text)
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.offsets) - 1
+            self.data += text.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+def export_tables(core, exercise_index: dict, path: str, source_sha256: str, source_mtime_ns: int = 0,
+                  source_size: int = 0):
+    # core: a loaded TutorCore; exercise_index: ontology_index.build_exercise_index(onto).
+    strings = _StringTable()
+
+    shape_names = sorted(core.shape_instances)
+    shapes = bytearray()
+    rules = bytearray()
+    for name in shape_names:
+        shapes += SHAPE.pack(strings.add(name))
+        for task in TASKS:
+            rule = core.registry.get(name, task)
+            if rule is None:
+                rules += RULE.pack(NONE, NONE, strings.add(core.formula_for(name, task)), NONE, 0)
+                continue
+            rules += RULE.pack(
+                strings.add(",".join(rule.dims)), strings.add(rule.expression),
+                strings.add(core.formula_for(name, task)), strings.add(rule.kind), 1,
+            )
+
+    feedback_rows = []
+    for (shape_name, task), entries in core.feedback_index.items():
+        if shape_name is None or task not in TASK_IDS:
+            continue
+        for rank, (fb_text, mc_text) in enumerate(entries):
+            feedback_rows.append((shape_name, TASK_IDS[task], rank, fb_text, mc_text))
+    feedback_rows.sort(key=lambda r: (r[0], r[1], r[2]))
+    feedback = bytearray()
+    for shape_name, task_id, _, fb_text, mc_text in feedback_rows:
+        feedback += FEEDBACK.pack(strings.add(shape_name), task_id, strings.add(fb_text), strings.add(mc_text))
+
+    names = list(exercise_index)
+    by_name = sorted(range(len(names)), key=names.__getitem__)
+    exercises = bytearray()
+    for i in by_name:
+        entry = exercise_index[names[i]]
+        answer = entry["correct_answer"]
+        exercises += EXERCISE.pack(
+            strings.add(entry["exercise"]), strings.add(entry["description"]), strings.add(entry["difficulty"]),
+            TASK_IDS.get(entry["task"], NONE), strings.add(entry["shape"]), strings.add(entry["formula"]),
+            math.nan if answer is None else answer,
+        )
+    row_of = {original: row for row, original in enumerate(by_name)}
+    ex_order = struct.pack(f"<{len(names)}I", *(row_of[i] for i in range(len(names))))
+
+    str_offs = struct.pack(f"<{len(strings.offsets)}I", *strings.offsets)
+    payloads = [str_offs, bytes(strings.data), shapes, rules, feedback, exercises, ex_order]
+
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    directory = bytearray()
+    for name, payload in zip(SECTIONS, payloads):
+        offset += -offset % 8
+        directory += SECTION.pack(name.encode("ascii"), offset, len(payload))
+        offset += len(payload)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, TABLES_FORMAT, bytes.fromhex(source_sha256), source_mtime_ns, source_size,
+                            len(SECTIONS)))
+        f.write(directory)
+        for payload in payloads:
+            f.write(b"\0" * (-f.tell() % 8))
+            f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def ensure_tables(source_path: str = DEFAULT_ONTOLOGY_PATH, cache_dir=None, use_snapshot: bool = True) -> str:
+    # Returns the tables path for source_path, rebuilding the file (which loads the
+    # ontology) only if it is missing or was built from different content.
+    path = tables_path(source_path, cache_dir)
+    st = os.stat(source_path)
+    header = read_header(path)
+    if header is not None and header["format"] == TABLES_FORMAT:
+        if (header["mtime_ns"], header["size"]) == (st.st_mtime_ns, st.st_size):
+            return path
+        if header["sha256"] == file_sha256(source_path):
+            return path
+
+    core = TutorCore.load(source_path, use_snapshot=use_snapshot)
+    export_tables(core, build_exercise_index(core.onto), path, file_sha256(source_path),
+                  st.st_mtime_ns, st.st_size)
+    return path
+
+
+def read_header(path: str):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, fmt, digest, mtime_ns, size, _ = HEADER.unpack(raw)
+    if magic != MAGIC:
+        return None
+    return {"format": fmt, "sha256": digest.hex(), "mtime_ns": mtime_ns, "size": size}
+
+
+# ---------- Attach ----------
+class ContentTables:
+    # Drop-in for the read-only parts of TutorCore (shape_names, required_dims,
+    # compute_correct_answer, formula_for, feedback_for, grade) backed by the mmap.
+
+    def __init__(self, path: str, expected_sha256: str = None):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._buf = memoryview(self._mm)
+
+        magic, fmt, digest, _, _, count = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ContentTablesError(f"{path} is not a content tables file")
+        if fmt != TABLES_FORMAT:
+            raise ContentTablesError(f"{path} has format {fmt}, expected {TABLES_FORMAT}")
+        self.source_sha256 = digest.hex()
+        if expected_sha256 is not None and expected_sha256 != self.source_sha256:
+            raise ContentTablesError(f"{path} was built from a different ontology")
+
+        sections = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(buf, HEADER.size + i * SECTION.size)
+            sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+        self._sections = sections
+
+        self._str_offs = self._section("str_offs").cast("I")
+        self._str_data = self._section("str_data")
+        self._shapes_at = sections["shapes"][0]
+        self._rules_at = sections["rules"][0]
+        self._feedback_at = sections["feedback"][0]
+        self._exercise_at = sections["exercise"][0]
+        self._ex_order = self._section("ex_order").cast("I")
+        self.shape_count = sections["shapes"][1] // SHAPE.size
+        self.feedback_count = sections["feedback"][1] // FEEDBACK.size
+        self.exercise_count = sections["exercise"][1] // EXERCISE.size
+
+        self._rules = {}
+
+    def _lower_bound(self, count: int, key_of, key) -> int:
+        # First row whose key_of(row) >= key; rows are sorted by key_of at export time.
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key_of(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _section(self, name: str):
+        offset, length = self._sections[name]
+        return self._buf[offset:offset + length]
+
+    def close(self):
+        for view in (self._str_offs, self._str_data, self._ex_order, self._buf):
+            view.release()
+        self._mm.close()
+
+    def string(self, string_id: int):
+        if string_id == NONE:
+            return None
+        return str(self._str_data[self._str_offs[string_id]:self._str_offs[string_id + 1]], "utf-8")
+
+    # ---------- Shapes ----------
+    def _shape_name(self, row: int) -> str:
+        return self.string(SHAPE.unpack_from(self._buf, self._shapes_at + row * SHAPE.size)[0])
+
+    def _shape_row(self, shape_name: str):
+        lo = self._lower_bound(self.shape_count, self._shape_name, shape_name)
+        return lo if lo < self.shape_count and self._shape_name(lo) == shape_name else None
+
+    def has_shape(self, shape_name: str) -> bool:
+        return self._shape_row(shape_name) is not None
+
+    def shape_names(self):
+        return [self._shape_name(i) for i in range(self.shape_count)]
+
+    def _rule_row(self, shape_name: str, task: str):
+        row = self._shape_row(shape_name)
+        if row is None or task not in TASK_IDS:
+            return None
+        return RULE.unpack_from(self._buf, self._rules_at + (row * len(TASKS) + TASK_IDS[task]) * RULE.size)
+
+    def _rule(self, shape_name: str, task: str):
+        # (dims, evaluator), compiled the first time a (shape, task) is graded.
+        key = (shape_name, task)
+        if key not in self._rules:
+            rule = None
+            row = self._rule_row(shape_name, task)
+            if row is not None and row[4]:
+                expression = self.string(row[1])
+                if expression is not None:
+                    rule = compile_formula(expression)
+                else:
+                    rule = FORMULAS.get((self.string(row[3]), task))
+            self._rules[key] = rule
+        return self._rules[key]
+
+    def required_dims(self, shape_name: str, task: str):
+        rule = self._rule(shape_name, task)
+        return list(rule[0]) if rule else []
+
+    def compute_correct_answer(self, shape_name: str, task: str, dims: dict) -> float:
+        rule = self._rule(shape_name, task)
+        if rule is None:
+            raise ValueError("Unknown shape/task")
+        return evaluate(rule[1], dims)
+
+    def formula_for(self, shape_name: str, task: str):
+        row = self._rule_row(shape_name, task)
+        return self.string(row[2]) if row is not None else None
+
+    # ---------- Feedback ----------
+    def _feedback_key(self, row: int):
+        shape_id, task_id, _, _ = FEEDBACK.unpack_from(self._buf, self._feedback_at + row * FEEDBACK.size)
+        return self.string(shape_id), task_id
+
+    def feedback_entries(self, shape_name: str, task: str):
+        # Ranked [(feedback text, misconception text or None), ...] as in build_feedback_index.
+        key = (shape_name, TASK_IDS.get(task, NONE))
+        lo = self._lower_bound(self.feedback_count, self._feedback_key, key)
+        entries = []
+        while lo < self.feedback_count and self._feedback_key(lo) == key:
+            _, _, fb_id, mc_id = FEEDBACK.unpack_from(self._buf, self._feedback_at + lo * FEEDBACK.size)
+            entries.append((self.string(fb_id), self.string(mc_id)))
+            lo += 1
+        return entries
+
+    def feedback_for(self, shape_name: str, task: str):
+        entries = self.feedback_entries(shape_name, task)
+        if entries:
+            fb_text, mc_text = entries[0]
+            return fb_text, (mc_text or DEFAULT_MISCONCEPTION_TEXT)
+        return DEFAULT_FEEDBACK_TEXT, NO_FEEDBACK_TEXT
+
+    # ---------- Exercises ----------
+    def _exercise_name(self, row: int) -> str:
+        return self.string(EXERCISE.unpack_from(self._buf, self._exercise_at + row * EXERCISE.size)[0])
+
+    def _exercise(self, row: int) -> dict:
+        name, desc, difficulty, task_id, shape, formula, answer = EXERCISE.unpack_from(
+            self._buf, self._exercise_at + row * EXERCISE.size)
+        return {
+            "exercise": self.string(name),
+            "description": self.string(desc),
+            "difficulty": self.string(difficulty),
+            "task": TASKS[task_id] if task_id != NONE else None,
+            "shape": self.string(shape),
+            "formula": self.string(formula),
+            "correct_answer": None if math.isnan(answer) else answer,
+        }
+
+    def exercise(self, name: str):
+        row = self._lower_bound(self.exercise_count, self._exercise_name, name)
+        if row < self.exercise_count and self._exercise_name(row) == name:
+            return self._exercise(row)
+        return None
+
+    def exercises(self):
+        # Exercise entries in ontology order, same shape as build_exercise_index values.
+        for row in self._ex_order:
+            yield self._exercise(row)
+
+    # ---------- Grading ----------
+    def grade(self, shape_name: str, task: str, dims: dict, student_answer: float) -> GradeResult:
+        correct_answer = self.compute_correct_answer(shape_name, task, dims)
+        is_correct = within_tolerance(student_answer, correct_answer, TOLERANCE)
+
+        fb_text = mc_text = None
+        if not is_correct:
+            fb_text, mc_text = self.feedback_for(shape_name, task)
+
+        return GradeResult(
+            shape_name, task, student_answer, correct_answer, is_correct,
+            self.formula_for(shape_name, task), fb_text, mc_text,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the ontology's content tables for worker processes")
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--cache-dir", help="where the tables file is written (default: .ontology_cache next to the ontology)")
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly instead of the compiled snapshot")
+    args = parser.parse_args()
+
+    path = ensure_tables(args.ontology, args.cache_dir, use_snapshot=not args.no_snapshot)
+    tables = ContentTables(path)
+    print(f"{path}: {tables.shape_count} shapes, {tables.feedback_count} feedback rows, "
+          f"{tables.exercise_count} exercises (source {tables.source_sha256[:12]})")
+    tables.close()
+
+
+if __name__ == "__main__":
+    main()
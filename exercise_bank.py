@@ -0,0 +1,229 @@
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+
+from grading import TASKS
+from tutor_core import DEFAULT_ONTOLOGY_PATH, TutorCore
+
+# Generated practice exercises. Dimensions are drawn from a per-difficulty grid and the
+# answer and formula text come from the same grading rules the tutor uses
+# (required_dims / compute_correct_answer / formula_for of a TutorCore or ContentTables),
+# so a generated exercise grades exactly like a typed-in one.
+#
+# An exercise is identified by its shape, task and grid position; the bank remembers
+# every exercise it has produced, never hands out the same one twice and never computes
+# one twice. Items have the same keys as ontology_index.build_exercise_index entries,
+# plus "dims", so the tutors can use them in place of ontology exercises.
+#
+#   python exercise_bank.py --count 1000000 --seed 7 -o bank.jsonl
+#   python exercise_bank.py --count 50000 --shape CircleShape --difficulty hard -o circles.csv
+
+# difficulty -> (smallest value, step, number of values)
+DIFFICULTIES = {
+    "easy": (1.0, 1.0, 10),
+    "medium": (1.0, 0.5, 39),
+    "hard": (1.0, 0.1, 491),
+}
+DEFAULT_DIFFICULTY = "medium"
+MAX_MISSES = 1000       # consecutive duplicate draws before a shape/task counts as used up
+TRIANGLE_SIDES = ("side1", "side2", "side3")
+
+
+def _valid(dims: dict) -> bool:
+    # Three side lengths must form a triangle.
+    if all(s in dims for s in TRIANGLE_SIDES):
+        a, b, c = sorted(dims[s] for s in TRIANGLE_SIDES)
+        return a + b > c
+    return True
+
+
+def _format(value: float) -> str:
+    return f"{value:g}"
+
+
+class ExerciseBank:
+    def __init__(self, core, difficulty: str = DEFAULT_DIFFICULTY, seed=None, shapes=None, tasks=None):
+        self.core = core
+        self.difficulty = difficulty
+        self.low, self.step, self.levels = DIFFICULTIES[difficulty]
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.skills = [
+            (shape, task)
+            for shape in (shapes or core.shape_names()) for task in (tasks or TASKS)
+            if core.required_dims(shape, task)
+        ]
+        self._items = {}        # (shape, task, grid position) -> item
+        self._used = {}         # (shape, task) -> exercises handed out
+        self._dims = {}         # (shape, task) -> dimension names
+        self._values = [round(self.low + self.step * level, 6) for level in range(self.levels)]
+        self._labels = [_format(value) for value in self._values]
+
+    def _dim_names(self, shape_name: str, task: str):
+        dim_names = self._dims.get((shape_name, task))
+        if dim_names is None:
+            dim_names = self._dims[(shape_name, task)] = tuple(self.core.required_dims(shape_name, task))
+        return dim_names
+
+    def space(self, shape_name: str, task: str) -> int:
+        # Grid positions for a shape/task (an upper bound where some are invalid).
+        return self.levels ** len(self._dim_names(shape_name, task))
+
+    # ---------- Items ----------
+    def item(self, shape_name: str, task: str, position, cache: bool = True) -> dict:
+        # The exercise at a grid position (one level per dimension), computed once.
+        key = (shape_name, task, tuple(position))
+        item = self._items.get(key)
+        if item is None:
+            item = self._build(shape_name, task, key[2])
+            if cache:
+                self._items[key] = item
+        return item
+
+    def _build(self, shape_name: str, task: str, position) -> dict:
+        dim_names = self._dim_names(shape_name, task)
+        dims = {d: self._values[level] for d, level in zip(dim_names, position)}
+        labels = [self._labels[level] for level in position]
+        nice_shape = shape_name.replace("Shape", "").lower()
+        dim_text = ", ".join(f"{d} = {label}" for d, label in zip(dim_names, labels))
+        return {
+            "exercise": f"{shape_name}-{task}-" + "x".join(labels),
+            "description": f"Compute the {task.lower()} of a {nice_shape} with {dim_text}.",
+            "difficulty": self.difficulty,
+            "task": task,
+            "shape": shape_name,
+            "formula": self.core.formula_for(shape_name, task),
+            "correct_answer": float(self.core.compute_correct_answer(shape_name, task, dims)),
+            "dims": dims,
+        }
+
+    def _draw(self, rng, shape_name: str, task: str, cache: bool = True):
+        # A new valid exercise for shape/task, or None once (nearly) all have been handed out.
+        dim_names = self._dim_names(shape_name, task)
+        n_dims = len(dim_names)
+        used = self._used.setdefault((shape_name, task), set())
+        if len(used) >= self.levels ** n_dims:
+            return None
+        levels, values = self.levels, self._values
+        for _ in range(MAX_MISSES):
+            position = tuple([rng.randrange(levels) for _ in range(n_dims)])
+            if position in used:
+                continue
+            used.add(position)
+            if _valid({d: values[level] for d, level in zip(dim_names, position)}):
+                return self.item(shape_name, task, position, cache)
+        return None
+
+    # ---------- Interactive ----------
+    def next_item(self, shape_name: str, task: str):
+        # One exercise this bank has not handed out yet, or None if the shape/task is used up.
+        if not self._dim_names(shape_name, task):
+            return None
+        return self._draw(self.rng, shape_name, task)
+
+    def generate(self, count: int = None, seed=None, cache: bool = True):
+        # Lazily yields up to `count` distinct exercises (all of them if count is None),
+        # picking shapes and tasks at random. With a seed, the same call on a fresh bank
+        # yields the same exercises. cache=False does not keep the items, only what is needed
+        # to avoid repeats.
+        rng = random.Random(self.seed if seed is None else seed)
+        skills = list(self.skills)
+        n = 0
+        while skills and (count is None or n < count):
+            skill = rng.choice(skills)
+            item = self._draw(rng, *skill, cache)
+            if item is None:
+                skills.remove(skill)
+                continue
+            yield item
+            n += 1
+
+    # ---------- Bulk ----------
+    def export(self, path: str, count: int, fmt: str = None, progress_every: float = 2.0) -> int:
+        # Streams `count` exercises to JSONL (one item per line) or CSV (batch_grader's
+        # input columns plus exercise, difficulty, formula, correct_answer and description).
+        # Items are not kept, so memory holds only the dedup sets.
+        fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        dim_fields = sorted({d for shape, task in self.skills for d in self.core.required_dims(shape, task)})
+        start = last_report = time.perf_counter()
+        n = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(["exercise", "shape", "task", "difficulty"] + dim_fields
+                                + ["correct_answer", "formula", "description"])
+            for item in self.generate(count, cache=False):
+                if writer is not None:
+                    dims = item["dims"]
+                    writer.writerow(
+                        [item["exercise"], item["shape"], item["task"], item["difficulty"]]
+                        + [_format(dims[d]) if d in dims else "" for d in dim_fields]
+                        + [repr(item["correct_answer"]), item["formula"] or "", item["description"]]
+                    )
+                else:
+                    f.write(json.dumps(item, ensure_ascii=False))
+                    f.write("\n")
+                n += 1
+                now = time.perf_counter()
+                if progress_every and now - last_report >= progress_every:
+                    last_report = now
+                    print(f"generated {n:,} exercises ({n / (now - start):,.0f}/s)", file=sys.stderr)
+        return n
+
+    def preload(self, path: str) -> int:
+        # Marks exercises from an earlier JSONL export as handed out, so they are not repeated.
+        n = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.get("difficulty") != self.difficulty:
+                    continue
+                dim_names = self._dim_names(item["shape"], item["task"])
+                position = tuple(round((item["dims"][d] - self.low) / self.step) for d in dim_names)
+                self._used.setdefault((item["shape"], item["task"]), set()).add(position)
+                self._items[(item["shape"], item["task"], position)] = item
+                n += 1
+        return n
+
+
+def load_bank(path: str) -> dict:
+    # A JSONL export as an exercise index (exercise name -> item).
+    with open(path, "r", encoding="utf-8") as f:
+        return {item["exercise"]: item for item in map(json.loads, filter(str.strip, f))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate practice exercises with precomputed answers")
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), default=DEFAULT_DIFFICULTY)
+    parser.add_argument("--shape", action="append", help="only this shape individual (repeatable)")
+    parser.add_argument("--task", choices=list(TASKS))
+    parser.add_argument("--exclude", help="earlier JSONL export whose exercises must not be repeated")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="default: from the output extension")
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    core = TutorCore.load(args.ontology)
+    bank = ExerciseBank(core, args.difficulty, args.seed, args.shape, [args.task] if args.task else None)
+    if args.exclude:
+        print(f"Excluding {bank.preload(args.exclude):,} earlier exercises")
+
+    start = time.perf_counter()
+    n = bank.export(args.output, args.count, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {n:,} exercises to {args.output} in {elapsed:.1f} s ({n / elapsed if elapsed else 0:,.0f}/s)")
+    if n < args.count:
+        print(f"Only {n:,} distinct exercises exist at difficulty {args.difficulty}; try a harder level.")
+
+
+if __name__ == "__main__":
+    main()
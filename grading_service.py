@@ -0,0 +1,367 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import traceback
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from attempt_analytics import AttemptAnalytics
+from attempt_log import AttemptLogWriter
+from metrics import METRICS
+from ontology_index import recorded_misconception
+from ontology_manager import DEFAULT_MAX_BYTES, OntologyManager, UnknownCurriculumError, parse_curricula
+from ontology_reload import ContentState, OntologyWatcher
+from student_analytics import ClassroomAnalytics
+from student_model import StudentModel
+from tutor_core import DEFAULT_ONTOLOGY_PATH, parse_answer, parse_dims
+
+# Local HTTP/JSON grading service. One read-only TutorCore per curriculum is shared by
+# every connection; each student id gets its own StudentModel. /shapes and /grade take
+# ?curriculum=NAME to use another curriculum than the default (see ontology_manager).
+#
+#   GET  /health
+#   GET  /curricula         loaded curricula, cache hit rate and resident memory
+#   GET  /shapes
+#   POST /grade             {"student_id", "shape", "task", "dims": {...}, "answer"}
+#   GET  /students/<id>     progress plus per-task / rolling-window analytics
+#   GET  /analytics         class-wide accuracy by shape and weak area
+#   GET  /analytics/misconceptions?task=Perimeter&days=7&limit=10
+#                           students and misconceptions with the most wrong answers
+#   GET  /stats
+#   GET  /metrics           Prometheus text (GET /metrics.json for JSON)
+#   POST /metrics/enable    switch phase timing on/off at runtime
+#   POST /metrics/disable
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+MAX_BODY_BYTES = 1 << 20
+
+
+class LatencyRecorder:
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentiles(self, points=(50, 90, 99)) -> dict:
+        if not self.samples:
+            return {f"p{p}_ms": None for p in points}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {f"p{p}_ms": round(ordered[min(last, int(round(p / 100 * last)))] * 1000, 3) for p in points}
+
+
+class GradingService:
+    def __init__(self, ontology_path: str = DEFAULT_ONTOLOGY_PATH, use_snapshot: bool = True, attempt_log=None,
+                 curricula: dict = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        # curricula: name -> ontology path; the first one is the default and stays loaded.
+        curricula = curricula or parse_curricula(None, ontology_path)
+        self.manager = OntologyManager(curricula, max_bytes, use_snapshot, pinned=[next(iter(curricula))])
+        self.ontology_path = self.manager.path(self.manager.default)
+        self.use_snapshot = use_snapshot
+        self.attempt_log = attempt_log
+        self.core = None
+        self.students = {}
+        self.analytics = ClassroomAnalytics()
+        self.attempt_analytics = None
+        self.latency = LatencyRecorder()
+
+    async def load(self):
+        # owlready2 parsing/indexing is blocking, so it runs on a worker thread.
+        loop = asyncio.get_running_loop()
+        self.core = await loop.run_in_executor(None, self.manager.get, self.manager.default)
+        self.attempt_analytics = AttemptAnalytics(self.core.onto, self.core.feedback_index)
+        await loop.run_in_executor(None, self.attempt_analytics.load_ontology_attempts)
+
+    def watch(self):
+        # Reloads are built on the watcher thread and applied on the event loop, between requests.
+        loop = asyncio.get_running_loop()
+        return OntologyWatcher(
+            self.ontology_path, lambda: ContentState.from_core(self.core),
+            lambda state: loop.call_soon_threadsafe(self.apply_reload, state),
+            use_snapshot=self.use_snapshot,
+        ).start()
+
+    def apply_reload(self, state):
+        self.manager.apply_reload(self.manager.default, self.core, state)
+        self.attempt_analytics.rebind(state.onto, state.feedback_index, state.exercise_index)
+        print(f"Ontology reloaded: {state.diff} ({state.load_seconds * 1000:.0f} ms)")
+
+    async def core_for(self, query: str):
+        # The curriculum a request asks for (?curriculum=name), loaded off the event loop
+        # if it is not cached.
+        name = parse_qs(query).get("curriculum", [None])[0]
+        if name is None or self.core is None:
+            return self.core
+        core = self.manager.peek(name)
+        if core is None:
+            core = await asyncio.get_running_loop().run_in_executor(None, self.manager.get, name)
+        return core
+
+    def student(self, student_id: str) -> StudentModel:
+        model = self.students.get(student_id)
+        if model is None:
+            model = self.students[student_id] = StudentModel()
+        return model
+
+    # ---------- Routes ----------
+    def dispatch(self, method: str, path: str, body: bytes, query: str = "", core=None):
+        if path.startswith("/metrics"):
+            return self._metrics(method, path)
+
+        if self.core is None:
+            return 503, {"error": "Ontology is still loading."}
+        core = core or self.core
+
+        if path == "/health":
+            return 200, {"status": "ok"}
+
+        if path == "/curricula":
+            return 200, self.manager.usage()
+
+        if path == "/shapes":
+            shapes = []
+            for name in core.shape_names():
+                tasks = {}
+                for task in ("Area", "Perimeter"):
+                    tasks[task] = {
+                        "dims": core.required_dims(name, task),
+                        "formula": core.formula_for(name, task),
+                    }
+                shapes.append({"name": name, "tasks": tasks})
+            return 200, {"shapes": shapes}
+
+        if path == "/grade":
+            if method != "POST":
+                return 405, {"error": "Use POST for /grade."}
+            return self._grade(body, core)
+
+        if path.startswith("/students/"):
+            student_id = path[len("/students/"):]
+            model = self.students.get(student_id)
+            if model is None:
+                return 404, {"error": f"Unknown student: {student_id}"}
+            return 200, self._progress(student_id, model)
+
+        if path == "/analytics":
+            return 200, self.analytics.class_summary()
+
+        if path == "/analytics/misconceptions":
+            return self._misconceptions(parse_qs(query))
+
+        if path == "/stats":
+            stats = {"requests": self.latency.count, "students": len(self.students)}
+            stats.update(self.latency.percentiles())
+            return 200, stats
+
+        return 404, {"error": f"No route for {path}"}
+
+    def _metrics(self, method: str, path: str):
+        if path == "/metrics":
+            return 200, METRICS.to_prometheus()
+        if path == "/metrics.json":
+            return 200, METRICS.snapshot()
+        if path in ("/metrics/enable", "/metrics/disable"):
+            if method != "POST":
+                return 405, {"error": f"Use POST for {path}."}
+            if path == "/metrics/enable":
+                METRICS.enable()
+            else:
+                METRICS.disable()
+            return 200, {"enabled": METRICS.enabled}
+        return 404, {"error": f"No route for {path}"}
+
+    def _misconceptions(self, params: dict):
+        task = params.get("task", [None])[0]
+        try:
+            days = int(params["days"][0]) if "days" in params else None
+            limit = int(params.get("limit", ["10"])[0])
+        except ValueError:
+            return 400, {"error": "days and limit must be integers."}
+        if days is not None and days < 0:
+            return 400, {"error": "days must be 0 (all time) or more."}
+        days = days or None     # 0 = all time, as in the attempt_analytics command line
+        aggregates = self.attempt_analytics.aggregates
+        return 200, {
+            "task": task,
+            "days": days,
+            "students": [{"student_id": s, "count": n} for s, n in aggregates.top_students(task, days, limit)],
+            "misconceptions": [{"text": t, "count": n} for t, n in aggregates.top_misconceptions(task, days, limit)],
+            "by_shape": aggregates.shape_accuracy(),
+        }
+
+    def _grade(self, body: bytes, core):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "Request body must be JSON."}
+        if not isinstance(request, dict):
+            return 400, {"error": "Request body must be a JSON object."}
+
+        student_id = str(request.get("student_id", "anonymous"))
+        shape_name = request.get("shape", "")
+        task = request.get("task", "Area")
+        raw_dims = request.get("dims") or {}
+        if not isinstance(shape_name, str) or not isinstance(task, str):
+            return 400, {"error": "shape and task must be strings."}
+        if not isinstance(raw_dims, dict):
+            return 400, {"error": "dims must be a JSON object."}
+        if not core.has_shape(shape_name):
+            return 400, {"error": f"Unknown shape: {shape_name}"}
+
+        try:
+            with METRICS.timer("submit.parse"):
+                dims = parse_dims(raw_dims, core.required_dims(shape_name, task))
+                student_answer = parse_answer(request.get("answer", ""))
+            with METRICS.timer("submit.grade"):
+                result = core.grade(shape_name, task, dims, student_answer)
+        except ValueError as e:
+            METRICS.inc("submit.input_error")
+            return 400, {"error": str(e)}
+
+        model = self.student(student_id)
+        with METRICS.timer("submit.record"):
+            model.record(shape_name, result.is_correct)
+            self.analytics.record(student_id, shape_name, task, result.is_correct)
+            self.attempt_analytics.record(student_id, shape_name, task, result.is_correct,
+                                          recorded_misconception(result.misconception_text))
+            if self.attempt_log is not None:
+                self.attempt_log.append(student_id, shape_name, task, dims, student_answer,
+                                        result.correct_answer, result.is_correct,
+                                        recorded_misconception(result.misconception_text))
+        METRICS.inc("submit.count")
+
+        payload = result.to_dict()
+        payload["progress"] = self._progress(student_id, model)
+        return 200, payload
+
+    def _progress(self, student_id: str, model: StudentModel):
+        return {
+            "student_id": student_id,
+            "total": model.total,
+            "correct": model.correct,
+            "incorrect": model.incorrect,
+            "by_shape": model.by_shape,
+            "wrong_by_shape": model.wrong_by_shape,
+            "summary": model.summary_text(),
+            "analytics": self.analytics.summary(student_id),
+        }
+
+    # ---------- HTTP ----------
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, 400, {"error": "Request body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                start = time.perf_counter()
+                url = urlsplit(target)
+                try:
+                    core = await self.core_for(url.query)
+                    status, payload = self.dispatch(method.upper(), url.path, body, url.query, core)
+                except UnknownCurriculumError as e:
+                    status, payload = 404, {"error": f"Unknown curriculum: {e.args[0]}"}
+                except Exception as e:
+                    # A bug in one handler answers that request with a 500, not a dropped connection.
+                    METRICS.inc("http.internal_error")
+                    traceback.print_exc(file=sys.stderr)
+                    status, payload = 500, {"error": f"Internal error: {type(e).__name__}"}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._write(writer, status, payload, keep_alive)
+                self.latency.add(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer, status: int, payload, keep_alive: bool):
+        # Text payloads (the Prometheus exposition) are sent as-is, everything else as JSON.
+        if isinstance(payload, str):
+            data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json; charset=utf-8"
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, ontology_path: str, use_snapshot: bool, watch: bool = False,
+                attempt_log=None, curricula: dict = None, max_bytes: int = DEFAULT_MAX_BYTES):
+    service = GradingService(ontology_path, use_snapshot, attempt_log, curricula, max_bytes)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Grading service listening on http://{host}:{port}")
+    await service.load()
+    print("Ontology loaded:", service.core.snapshot_info)
+    if watch:
+        service.watch()
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Area & Perimeter grading service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ontology", default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly instead of the compiled snapshot")
+    parser.add_argument("--watch", action="store_true", help="reload the ontology when the file changes")
+    parser.add_argument("--metrics", action="store_true", help="time each grading phase from startup (see /metrics)")
+    parser.add_argument("--attempt-log", help="append every graded attempt to this compact binary log (see attempt_log.py)")
+    parser.add_argument("--curriculum", action="append", metavar="NAME=PATH",
+                        help="serve this curriculum too (repeatable; the first is the default, "
+                             "others are picked per request with ?curriculum=NAME)")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="memory budget for loaded curricula before the least recently used are dropped")
+    args = parser.parse_args()
+
+    try:
+        curricula = parse_curricula(args.curriculum, args.ontology)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.metrics:
+        METRICS.enable()
+
+    attempt_log = AttemptLogWriter(args.attempt_log) if args.attempt_log else None
+    try:
+        asyncio.run(serve(args.host, args.port, args.ontology, not args.no_snapshot, args.watch, attempt_log,
+                          curricula, args.cache_mb * 1024 * 1024))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if attempt_log is not None:
+            attempt_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from metrics import METRICS
+
+# Rendering helpers for TutorApp that avoid rebuilding widgets on every interaction:
+#
+# * DimensionInputs keeps one frame of label/entry rows per (shape, task) and swaps
+#   frames in and out with grid()/grid_remove() instead of destroying and recreating them.
+# * TextView remembers the lines a read-only tk.Text shows and rewrites only the lines
+#   that changed.
+# * FrameTimer measures how long an interaction takes until Tk has redrawn the window,
+#   into METRICS histograms named "frame.<name>".
+
+FRAME_BUDGET = 0.050    # frames slower than this count as "frame.slow"
+
+
+class DimensionInputs:
+    def __init__(self, parent):
+        self.parent = parent
+        self._pool = {}         # (shape, task) -> (dims, frame, {dim: StringVar})
+        self._shown = None
+
+    def show(self, shape_name: str, task: str, dims) -> dict:
+        # Shows the (empty) input rows for shape/task and returns their StringVars.
+        key = (shape_name, task)
+        dims = list(dims)
+        pooled = self._pool.get(key)
+        if pooled is not None and pooled[0] != dims:
+            pooled[1].destroy()
+            pooled = None
+        if pooled is None:
+            pooled = self._pool[key] = (dims,) + self._build(dims)
+
+        if self._shown is not None and self._shown != key and self._shown in self._pool:
+            self._pool[self._shown][1].grid_remove()
+        _, frame, dim_vars = pooled
+        for v in dim_vars.values():
+            v.set("")
+        frame.grid(row=0, column=0, sticky="ew")
+        self._shown = key
+        return dim_vars
+
+    def _build(self, dims):
+        frame = ttk.Frame(self.parent, padding=0)
+        frame.columnconfigure(1, weight=1)
+        dim_vars = {}
+        for row, d in enumerate(dims):
+            ttk.Label(frame, text=d.capitalize() + ":").grid(row=row, column=0, sticky="w", padx=(0, 10), pady=4)
+            v = tk.StringVar()
+            ttk.Entry(frame, textvariable=v).grid(row=row, column=1, sticky="ew", pady=4)
+            dim_vars[d] = v
+        return frame, dim_vars
+
+    def retain(self, shape_names):
+        # Drops pooled rows of shapes that no longer exist (e.g. after an ontology reload).
+        shape_names = set(shape_names)
+        for key in [k for k in self._pool if k[0] not in shape_names and k != self._shown]:
+            self._pool.pop(key)[1].destroy()
+
+
+class TextView:
+    def __init__(self, text_widget):
+        self.text = text_widget
+        self.lines = []
+
+    def set_text(self, text: str):
+        self.set_lines(text.split("\n") if text else [])
+
+    def set_lines(self, lines):
+        old = self.lines
+        lines = list(lines)
+        if lines == old:
+            return
+
+        self.text.configure(state="normal")
+        if len(lines) == len(old):
+            # Same shape of content: replace just the lines that differ.
+            for i, (before, after) in enumerate(zip(old, lines)):
+                if before != after:
+                    self.text.delete(f"{i + 1}.0", f"{i + 1}.end")
+                    self.text.insert(f"{i + 1}.0", after)
+        else:
+            # Keep the common leading lines and rewrite the rest.
+            same = 0
+            for before, after in zip(old, lines):
+                if before != after:
+                    break
+                same += 1
+            if same == 0:
+                self.text.delete("1.0", "end-1c")
+                self.text.insert("1.0", "\n".join(lines))
+            elif same == len(old):
+                self.text.insert("end-1c", "\n" + "\n".join(lines[same:]))
+            elif same == len(lines):
+                self.text.delete(f"{same}.end", "end-1c")
+            else:
+                self.text.delete(f"{same + 1}.0", "end-1c")
+                self.text.insert(f"{same + 1}.0", "\n".join(lines[same:]))
+        self.text.configure(state="disabled")
+        self.lines = lines
+
+
+class _Frame:
+    __slots__ = ("widget", "name", "start")
+
+    def __init__(self, widget, name):
+        self.widget = widget
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Idle callbacks run after Tk's pending redraws, so this fires once the result is on screen.
+        self.widget.after_idle(self._done)
+        return False
+
+    def _done(self):
+        seconds = time.perf_counter() - self.start
+        METRICS.observe(f"frame.{self.name}", seconds)
+        if seconds > FRAME_BUDGET:
+            METRICS.inc("frame.slow")
+
+
+class _NullFrame:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_FRAME = _NullFrame()
+
+
+class FrameTimer:
+    def __init__(self, widget):
+        self.widget = widget
+
+    def frame(self, name: str):
+        return _Frame(self.widget, name) if METRICS.enabled else _NULL_FRAME
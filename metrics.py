@@ -0,0 +1,169 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Low-overhead timing for the tutor's hot paths. Phases are recorded into fixed-bucket
+# histograms and events into counters, and both can be exported as Prometheus text or
+# JSON. Collection is off by default (TUTOR_METRICS=1 turns it on at startup) and can be
+# switched at runtime with enable()/disable(); while disabled, timer() hands back a
+# shared no-op context manager, so instrumented code pays one attribute check.
+
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        # Upper bound of the bucket holding the q-th observation.
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(b): n for b, n in zip(self.buckets, self.counts)},
+            "overflow": self.counts[-1],
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    # ---------- Switching ----------
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # ---------- Recording ----------
+    def timer(self, name: str):
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram()
+            hist.observe(seconds)
+
+    def inc(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    # ---------- Export ----------
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "phases": {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP tutor_phase_seconds Time spent per tutor phase.",
+            "# TYPE tutor_phase_seconds histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'tutor_phase_seconds_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'tutor_phase_seconds_bucket{{phase="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'tutor_phase_seconds_sum{{phase="{name}"}} {h.sum}')
+                lines.append(f'tutor_phase_seconds_count{{phase="{name}"}} {h.count}')
+            lines.append("# HELP tutor_events_total Tutor event counters.")
+            lines.append("# TYPE tutor_events_total counter")
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'tutor_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        # .json -> JSON, anything else -> Prometheus text (e.g. for node_exporter's textfile collector).
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics(enabled=os.environ.get("TUTOR_METRICS") == "1")
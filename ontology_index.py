@@ -0,0 +1,103 @@
+# Lookup tables built once from a loaded ontology, so grading never has to walk
+# every individual on the hot path.
+
+DEFAULT_FEEDBACK_TEXT = "Check the formula carefully and try again."
+DEFAULT_MISCONCEPTION_TEXT = "A common mistake was detected for this topic."
+NO_FEEDBACK_TEXT = "No matching feedback found in the ontology for this shape/task."
+
+
+def get_first(lst, default=None):
+    return lst[0] if lst else default
+
+
+def task_label(task_ind) -> str:
+    # AreaTask -> "Area", PerimeterTask -> "Perimeter"
+    name = task_ind.name
+    return name[:-len("Task")] if name.endswith("Task") else name
+
+
+def feedback_record(fb):
+    # (index key, rank entry) for one Feedback individual, or None if it has no text.
+    fb_text = get_first(getattr(fb, "hasText", []), None)
+    if not fb_text:
+        return None
+    fb_shape = get_first(getattr(fb, "feedbackForShape", []), None)
+    fb_task = get_first(getattr(fb, "feedbackForTask", []), None)
+    mc = get_first(getattr(fb, "addressesMisconception", []), None)
+    mc_text = get_first(getattr(mc, "hasDescription", []), None) if mc else None
+
+    key = (fb_shape.name if fb_shape else None, task_label(fb_task) if fb_task else None)
+    return key, (mc_text is None, fb.name, fb_text, mc_text)
+
+
+def rank_feedback(entries):
+    # Feedback that names a misconception ranks first, then by individual name so the
+    # order is stable between loads.
+    return [(fb_text, mc_text) for _, _, fb_text, mc_text in sorted(entries, key=lambda e: (e[0], e[1]))]
+
+
+def build_feedback_index(onto) -> dict:
+    # (shape name, task) -> [(feedback text, misconception text or None), ...]
+    ranked = {}
+    for fb in onto.Feedback.instances():
+        record = feedback_record(fb)
+        if record is not None:
+            ranked.setdefault(record[0], []).append(record[1])
+    return {key: rank_feedback(entries) for key, entries in ranked.items()}
+
+
+def lookup_feedback(index: dict, shape_name: str, task: str):
+    entries = index.get((shape_name, task))
+    return entries[0] if entries else (None, None)
+
+
+def recorded_misconception(mc_text):
+    # The misconception to record for a wrong answer: None when the tutor could only show
+    # a placeholder (no feedback, or feedback without a misconception), as a replay of the
+    # attempt through lookup_feedback would give.
+    return None if mc_text in (DEFAULT_MISCONCEPTION_TEXT, NO_FEEDBACK_TEXT) else mc_text
+
+
+def exercise_task(description) -> str:
+    desc_lower = str(description).lower()
+    return "Perimeter" if ("perimeter" in desc_lower or "circumference" in desc_lower) else "Area"
+
+
+def shapes_by_exercise(onto) -> dict:
+    # exercise name -> owning shape, from Shape.hasExercise (first shape wins, as in a scan).
+    owners = {}
+    for shape in onto.Shape.instances():
+        for ex in getattr(shape, "hasExercise", []):
+            owners.setdefault(ex.name, shape)
+    return owners
+
+
+def exercise_entry(ex, shape) -> dict:
+    # shape: the owning Shape individual, or None to fall back to Exercise.isAboutShape.
+    description = get_first(getattr(ex, "hasDescription", []), "No description available.")
+    task = exercise_task(description)
+    shape = shape or get_first(getattr(ex, "isAboutShape", []), None)
+
+    formula_text = None
+    if shape is not None:
+        prop = "hasPerimeterFormula" if task == "Perimeter" else "hasAreaFormula"
+        formula = get_first(getattr(shape, prop, []), None)
+        formula_text = get_first(getattr(formula, "hasDescription", []), None) if formula else None
+
+    correct_answer = get_first(getattr(ex, "hasCorrectAnswer", []), None)
+    return {
+        "exercise": ex.name,
+        "description": description,
+        "difficulty": get_first(getattr(ex, "hasDifficulty", []), None),
+        "task": task,
+        "shape": shape.name if shape is not None else None,
+        "formula": formula_text,
+        "correct_answer": float(correct_answer) if correct_answer is not None else None,
+    }
+
+
+def build_exercise_index(onto) -> dict:
+    # exercise name -> {"exercise", "description", "difficulty", "task", "shape", "formula",
+    # "correct_answer"}, in ontology order.
+    owners = shapes_by_exercise(onto)
+    return {ex.name: exercise_entry(ex, owners.get(ex.name)) for ex in onto.Exercise.instances()}
@@ -0,0 +1,239 @@
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from grading import TASKS
+from metrics import METRICS
+from ontology_snapshot import SnapshotInfo, load_ontology
+from tutor_core import TutorCore
+
+# Several curricula (grade-level or language variants of the ontology) in one process.
+# Each curriculum is loaded on first use into its own owlready2 World, so individuals
+# with the same IRI in two variants never mix, and its TutorCore (the derived lookup
+# tables grading runs on) is kept in an LRU cache. When the resident memory of the
+# cached curricula goes over max_bytes the least recently used ones are dropped and
+# loaded again (from the snapshot) the next time a session asks for them. Pinned
+# curricula are never dropped. A dropped curriculum's World is closed, releasing its
+# SQLite connection and page cache, as soon as no session holds its TutorCore any more.
+#
+# A curriculum's size is taken from its own World: the pages of its SQLite quadstore
+# plus the derived tables. (Process RSS growth would also count the first owlready2
+# import and loads running on other threads.) A --watch reload goes through
+# apply_reload, which re-sizes the curriculum and closes the World it replaced.
+
+DEFAULT_CURRICULUM = "default"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class UnknownCurriculumError(KeyError):
+    pass
+
+
+def parse_curricula(specs, default_path: str) -> dict:
+    # ["grade4=g4.rdf", "grade5-fr=g5_fr.rdf"] -> {name: path}, in the order given.
+    # Without specs there is one curriculum, DEFAULT_CURRICULUM, at default_path.
+    curricula = {}
+    for spec in specs or []:
+        name, sep, path = spec.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Expected NAME=PATH, got {spec!r}")
+        curricula[name.strip()] = path.strip()
+    return curricula or {DEFAULT_CURRICULUM: default_path}
+
+
+def world_bytes(world) -> int:
+    # Size of a World's quadstore, in-memory or file-backed.
+    try:
+        page_count = world.graph.execute("PRAGMA page_count").fetchone()[0]
+        page_size = world.graph.execute("PRAGMA page_size").fetchone()[0]
+    except Exception:
+        return 0
+    return page_count * page_size
+
+
+def _deep_size(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen) for v in obj)
+    return size
+
+
+def table_bytes(core) -> int:
+    # Size of the plain-Python lookup tables of a TutorCore (not the World behind them).
+    seen = set()
+    size = _deep_size(core.formulas_by_shape, seen) + _deep_size(core.feedback_index, seen)
+    for shape in core.shape_names():
+        for task in TASKS:
+            rule = core.registry.get(shape, task)
+            if rule is not None:
+                size += sys.getsizeof(rule) + _deep_size(rule.dims, seen) + _deep_size(rule.expression, seen)
+    return size
+
+
+def _close_world(world):
+    try:
+        world.close()
+    except Exception:
+        pass            # already closed, or the interpreter is shutting down
+
+
+def load_isolated(path: str, use_snapshot: bool = True) -> TutorCore:
+    # Snapshots always open in a World of their own; a plain parse has to ask for one,
+    # since get_ontology() would put every curriculum into the shared default World.
+    if use_snapshot:
+        onto, snapshot_info = load_ontology(path)
+    else:
+        from owlready2 import World
+
+        start = time.perf_counter()
+        onto = World().get_ontology(os.path.abspath(path)).load()
+        snapshot_info = SnapshotInfo(False, time.perf_counter() - start, None, "snapshot disabled")
+    core = TutorCore(onto)
+    core.snapshot_info = snapshot_info
+    return core
+
+
+class CurriculumStats:
+    __slots__ = ("hits", "misses", "loads", "evictions", "resident_bytes", "load_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+        self.load_seconds = 0.0
+
+
+class OntologyManager:
+    def __init__(self, curricula: dict, max_bytes: int = DEFAULT_MAX_BYTES, use_snapshot: bool = True,
+                 pinned=()):
+        self.curricula = dict(curricula)
+        self.max_bytes = max_bytes
+        self.use_snapshot = use_snapshot
+        self.pinned = set(pinned)
+        self.stats = {name: CurriculumStats() for name in self.curricula}
+
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.curricula}
+        self._cache = OrderedDict()     # name -> TutorCore, least recently used first
+
+    @property
+    def default(self) -> str:
+        return next(iter(self.curricula))
+
+    def names(self):
+        return list(self.curricula)
+
+    def path(self, name: str) -> str:
+        if name not in self.curricula:
+            raise UnknownCurriculumError(name)
+        return self.curricula[name]
+
+    # ---------- Lookup ----------
+    def peek(self, name: str):
+        # The cached core, or None if it is not loaded; never blocks on a load.
+        with self._lock:
+            core = self._cache.get(name)
+            if core is not None:
+                self._cache.move_to_end(name)
+                self.stats[name].hits += 1
+                METRICS.inc(f"curriculum.hit.{name}")
+        return core
+
+    def get(self, name: str = None) -> TutorCore:
+        name = self.default if name is None else name
+        self.path(name)
+        core = self.peek(name)
+        if core is not None:
+            return core
+
+        # One load per curriculum at a time; other curricula stay available meanwhile.
+        with self._load_locks[name]:
+            core = self.peek(name)
+            if core is not None:
+                return core
+            return self._load(name)
+
+    def _load(self, name: str) -> TutorCore:
+        stats = self.stats[name]
+        start = time.perf_counter()
+        with METRICS.timer("curriculum.load"):
+            core = load_isolated(self.curricula[name], self.use_snapshot)
+        resident = world_bytes(core.onto.world) + table_bytes(core)
+
+        with self._lock:
+            stats.misses += 1
+            stats.loads += 1
+            stats.resident_bytes = resident
+            stats.load_seconds = time.perf_counter() - start
+            METRICS.inc(f"curriculum.miss.{name}")
+            self._cache[name] = core
+            self._evict(keep=name)
+        return core
+
+    def _evict(self, keep: str):
+        # Caller holds the lock. Drops least recently used curricula until the rest fit.
+        total = sum(self.stats[n].resident_bytes for n in self._cache)
+        for name in list(self._cache):
+            if total <= self.max_bytes:
+                break
+            if name == keep or name in self.pinned:
+                continue
+            core = self._cache.pop(name)
+            weakref.finalize(core, _close_world, core.onto.world)
+            total -= self.stats[name].resident_bytes
+            self.stats[name].evictions += 1
+            METRICS.inc(f"curriculum.evict.{name}")
+
+    def apply_reload(self, name: str, core: TutorCore, state):
+        # Swaps an ontology_reload.ContentState into a curriculum's core (on the thread that
+        # grades with it), re-sizes the curriculum and closes the World it replaced.
+        old_world = core.onto.world
+        core.apply_reload(state)
+        new_world = core.onto.world
+        resident = world_bytes(new_world) + table_bytes(core)
+        with self._lock:
+            cached = self._cache.get(name) is core
+            if cached:
+                self.stats[name].resident_bytes = resident
+                self._evict(keep=name)
+        if not cached:
+            # Evicted earlier: its finalizer only knows the old World.
+            weakref.finalize(core, _close_world, new_world)
+        if new_world is not old_world:
+            _close_world(old_world)
+
+    # ---------- Usage ----------
+    def usage(self) -> dict:
+        with self._lock:
+            curricula = {}
+            for name, path in self.curricula.items():
+                s = self.stats[name]
+                lookups = s.hits + s.misses
+                curricula[name] = {
+                    "path": path,
+                    "loaded": name in self._cache,
+                    "pinned": name in self.pinned,
+                    "hits": s.hits,
+                    "misses": s.misses,
+                    "hit_rate": round(s.hits / lookups, 4) if lookups else None,
+                    "loads": s.loads,
+                    "evictions": s.evictions,
+                    "resident_bytes": s.resident_bytes if name in self._cache else 0,
+                    "last_load_ms": round(s.load_seconds * 1000, 1),
+                }
+            return {
+                "max_bytes": self.max_bytes,
+                "resident_bytes": sum(self.stats[n].resident_bytes for n in self._cache),
+                "curricula": curricula,
+            }
@@ -0,0 +1,331 @@
+import os
+import threading
+import time
+
+from metrics import METRICS
+from ontology_index import (
+    build_exercise_index,
+    exercise_entry,
+    feedback_record,
+    get_first,
+    rank_feedback,
+    shapes_by_exercise,
+)
+from ontology_snapshot import file_sha256, load_ontology
+from shape_registry import FORMULA_PROPS, ShapeRegistry, rules_for_shape
+from tutor_core import formula_texts
+
+# Watch-and-reload for the ontology file. A background thread polls the file, loads a
+# changed file into a fresh World, diffs the individuals against the previous load and
+# rebuilds only the affected lookup entries (shapes, formulas, grading rules, feedback
+# and, for the CLI, exercises) into new dicts. The finished ContentState is handed to
+# `deliver`, which must pass it to the thread that grades (Tk's after() loop, the asyncio
+# loop, or between CLI questions); that thread swaps it in with a few assignments, so a
+# grade never sees half a reload and student state is never touched.
+#
+# Unchanged entries are reused, but shape individuals are looked up again in the new
+# World, so the previous one can be closed once the state is swapped in (see
+# OntologyManager.apply_reload). A save that leaves the content byte-for-byte
+# the same (or only touches the file) is recognised by its SHA-256 and not reloaded.
+
+WATCH_INTERVAL = 1.0
+TASK_INDIVIDUALS = ("AreaTask", "PerimeterTask")
+
+
+def _value_key(value):
+    name = getattr(value, "name", None)
+    return name if name is not None else repr(value)
+
+
+def individual_digests(onto) -> dict:
+    # individual name -> hash of its classes and property values
+    digests = {}
+    for ind in onto.individuals():
+        classes = tuple(sorted(getattr(c, "name", repr(c)) for c in ind.is_a))
+        props = tuple(sorted(
+            (prop.python_name, tuple(sorted(_value_key(v) for v in prop[ind])))
+            for prop in ind.get_properties()
+        ))
+        digests[ind.name] = hash((classes, props))
+    return digests
+
+
+class OntologyDiff:
+    def __init__(self, old: dict, new: dict):
+        self.added = new.keys() - old.keys()
+        self.removed = old.keys() - new.keys()
+        self.changed = {name for name in new.keys() & old.keys() if new[name] != old[name]}
+
+    def touched(self) -> set:
+        return self.added | self.removed | self.changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return f"{len(self.changed)} changed, {len(self.added)} added, {len(self.removed)} removed"
+
+
+class ContentState:
+    # Everything the tutor derives from one load of the ontology.
+    def __init__(self):
+        self.onto = None
+        self.digests = {}
+        self.diff = None
+        self.load_seconds = 0.0
+        self.area_task_ind = None
+        self.perimeter_task_ind = None
+        self.shape_instances = {}
+        self.formulas_by_shape = {}
+        self.feedback_index = {}
+        self.feedback_keys = {}       # feedback individual name -> index key
+        self.registry = ShapeRegistry()
+        self.exercise_index = None    # only kept when built with_exercises
+        self.exercise_owner = {}
+
+    @classmethod
+    def build(cls, onto, with_exercises: bool = False):
+        state = cls()
+        state.onto = onto
+        state.digests = individual_digests(onto)
+        state.area_task_ind = onto.search_one(iri="*AreaTask")
+        state.perimeter_task_ind = onto.search_one(iri="*PerimeterTask")
+        for sh in onto.Shape.instances():
+            state.shape_instances[sh.name] = sh
+            state.formulas_by_shape[sh.name] = formula_texts(sh)
+        state.registry = ShapeRegistry.from_ontology(onto)
+
+        ranked = {}
+        for fb in onto.Feedback.instances():
+            record = feedback_record(fb)
+            if record is not None:
+                state.feedback_keys[fb.name] = record[0]
+                ranked.setdefault(record[0], []).append(record[1])
+        state.feedback_index = {key: rank_feedback(entries) for key, entries in ranked.items()}
+
+        if with_exercises:
+            state.exercise_owner = {name: sh.name for name, sh in shapes_by_exercise(onto).items()}
+            state.exercise_index = build_exercise_index(onto)
+        return state
+
+    @classmethod
+    def from_core(cls, core):
+        # Reuses the core's tables; only the digests and feedback keys are computed.
+        state = cls()
+        state.onto = core.onto
+        state.digests = individual_digests(core.onto)
+        state.area_task_ind = core.area_task_ind
+        state.perimeter_task_ind = core.perimeter_task_ind
+        state.shape_instances = core.shape_instances
+        state.formulas_by_shape = core.formulas_by_shape
+        state.feedback_index = core.feedback_index
+        state.registry = core.registry
+        for fb in core.onto.Feedback.instances():
+            record = feedback_record(fb)
+            if record is not None:
+                state.feedback_keys[fb.name] = record[0]
+        return state
+
+
+def _individual(onto, name: str):
+    return onto[name] if onto is not None else None
+
+
+def _is_instance(ind, cls) -> bool:
+    return ind is not None and cls is not None and isinstance(ind, cls)
+
+
+def plan_reload(base: ContentState, onto) -> ContentState:
+    # New ContentState for `onto`, sharing every entry of `base` that the diff leaves alone.
+    digests = individual_digests(onto)
+    diff = OntologyDiff(base.digests, digests)
+    with_exercises = base.exercise_index is not None
+    touched = diff.touched()
+
+    if touched & set(TASK_INDIVIDUALS) or not base.shape_instances:
+        state = ContentState.build(onto, with_exercises)
+        state.diff = diff
+        return state
+
+    state = ContentState()
+    state.onto = onto
+    state.digests = digests
+    state.diff = diff
+    state.area_task_ind = onto.search_one(iri="*AreaTask")
+    state.perimeter_task_ind = onto.search_one(iri="*PerimeterTask")
+    # Shape individuals are taken from the new World, so the old one can be closed.
+    state.shape_instances = {name: _individual(onto, name) for name in base.shape_instances}
+    state.formulas_by_shape = dict(base.formulas_by_shape)
+    state.feedback_index = dict(base.feedback_index)
+    state.feedback_keys = dict(base.feedback_keys)
+    state.registry = base.registry.copy()
+    if with_exercises:
+        state.exercise_index = dict(base.exercise_index)
+        state.exercise_owner = dict(base.exercise_owner)
+
+    old = {name: _individual(base.onto, name) for name in touched - diff.added}
+    new = {name: _individual(onto, name) for name in touched - diff.removed}
+
+    def touched_as(cls_name):
+        old_cls, new_cls = getattr(base.onto, cls_name, None), getattr(onto, cls_name, None)
+        return ({n for n, ind in old.items() if _is_instance(ind, old_cls)}
+                | {n for n, ind in new.items() if _is_instance(ind, new_cls)})
+
+    shapes = touched_as("Shape")
+    formulas = touched_as("Formula")
+    feedback = touched_as("Feedback")
+    misconceptions = touched_as("Misconception")
+    exercises = touched_as("Exercise") if with_exercises else set()
+
+    # Shapes whose formula individual changed; feedback whose misconception changed.
+    if formulas:
+        for sh in onto.Shape.instances():
+            for prop in FORMULA_PROPS.values():
+                if getattr(get_first(getattr(sh, prop, []), None), "name", None) in formulas:
+                    shapes.add(sh.name)
+    if misconceptions:
+        for fb in onto.Feedback.instances():
+            if getattr(get_first(getattr(fb, "addressesMisconception", []), None), "name", None) in misconceptions:
+                feedback.add(fb.name)
+
+    shape_cls = getattr(onto, "Shape", None)
+    for name in shapes:
+        sh = _individual(onto, name)
+        state.registry.remove_shape(name)
+        if with_exercises:
+            old_sh = base.shape_instances.get(name)
+            for ex in getattr(old_sh, "hasExercise", []) if old_sh is not None else []:
+                if state.exercise_owner.get(ex.name) == name:
+                    del state.exercise_owner[ex.name]
+                exercises.add(ex.name)
+        if not _is_instance(sh, shape_cls):
+            state.shape_instances.pop(name, None)
+            state.formulas_by_shape.pop(name, None)
+            continue
+        state.shape_instances[name] = sh
+        state.formulas_by_shape[name] = formula_texts(sh)
+        for task, rule in rules_for_shape(sh):
+            state.registry.register(name, task, rule)
+        if with_exercises:
+            for ex in getattr(sh, "hasExercise", []):
+                state.exercise_owner.setdefault(ex.name, name)
+                exercises.add(ex.name)
+
+    feedback_cls = getattr(onto, "Feedback", None)
+    keys = set()
+    for name in feedback:
+        old_key = state.feedback_keys.pop(name, None)
+        if old_key is not None:
+            keys.add(old_key)
+        fb = _individual(onto, name)
+        record = feedback_record(fb) if _is_instance(fb, feedback_cls) else None
+        if record is not None:
+            state.feedback_keys[name] = record[0]
+            keys.add(record[0])
+    if keys:
+        ranked = {key: [] for key in keys}
+        for name, key in state.feedback_keys.items():
+            if key in ranked:
+                ranked[key].append(feedback_record(_individual(onto, name))[1])
+        for key, entries in ranked.items():
+            if entries:
+                state.feedback_index[key] = rank_feedback(entries)
+            else:
+                state.feedback_index.pop(key, None)
+
+    exercise_cls = getattr(onto, "Exercise", None)
+    for name in exercises:
+        ex = _individual(onto, name)
+        if not _is_instance(ex, exercise_cls):
+            state.exercise_index.pop(name, None)
+            state.exercise_owner.pop(name, None)
+            continue
+        owner = state.exercise_owner.get(name)
+        state.exercise_index[name] = exercise_entry(ex, state.shape_instances.get(owner) if owner else None)
+
+    return state
+
+
+def load_fresh(path: str, use_snapshot: bool = True):
+    # A reload must not go into the World the running tutor is reading from.
+    if use_snapshot:
+        return load_ontology(path)[0]
+    from owlready2 import World
+
+    return World().get_ontology(os.path.abspath(path)).load()
+
+
+def _digest(path: str):
+    try:
+        return file_sha256(path)
+    except OSError:
+        return None
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class OntologyWatcher:
+    def __init__(self, path: str, make_base, deliver, use_snapshot: bool = True,
+                 interval: float = WATCH_INTERVAL, on_error=None, require_tasks: bool = True):
+        # make_base: called on the watcher thread to describe what is loaded now, e.g.
+        # lambda: ContentState.from_core(core). deliver(state) receives each reload.
+        self.path = path
+        self.make_base = make_base
+        self.deliver = deliver
+        self.use_snapshot = use_snapshot
+        self.interval = interval
+        self.require_tasks = require_tasks
+        self.on_error = on_error or (lambda message: print(message))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ontology-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        last = _stat(self.path)
+        digest = _digest(self.path)
+        base = self.make_base()
+        while not self._stop.wait(self.interval):
+            current = _stat(self.path)
+            if current is None or current == last:
+                continue
+            # Editors save in several writes; only reload once the file has settled.
+            if self._stop.wait(self.interval) or _stat(self.path) != current:
+                continue
+            last = current
+            current_digest = _digest(self.path)
+            if current_digest is not None and current_digest == digest:
+                continue
+
+            start = time.perf_counter()
+            try:
+                with METRICS.timer("ontology.reload"):
+                    onto = load_fresh(self.path, self.use_snapshot)
+                    state = plan_reload(base, onto)
+            except Exception as e:
+                METRICS.inc("ontology.reload_error")
+                self.on_error(f"Ontology reload failed, keeping the previous content: {e}")
+                continue
+            digest = current_digest
+            if not state.diff:
+                onto.world.close()
+                continue
+            if self.require_tasks and (state.area_task_ind is None or state.perimeter_task_ind is None):
+                self.on_error("Ontology reload skipped: AreaTask / PerimeterTask not found.")
+                onto.world.close()
+                continue
+            state.load_seconds = time.perf_counter() - start
+            METRICS.inc("ontology.reloads")
+            base = state
+            self.deliver(state)
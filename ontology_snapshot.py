@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import time
+
+# Compiled snapshot of the RDF/XML ontology, stored as an owlready2 SQLite quadstore.
+# The snapshot is reused while the source file is unchanged (same mtime/size, or same
+# SHA-256 if only the mtime moved) and rebuilt automatically when it changes.
+
+SNAPSHOT_DIR_NAME = ".ontology_cache"
+SNAPSHOT_FORMAT = 1
+
+
+class SnapshotInfo:
+    def __init__(self, hit: bool, load_seconds: float, snapshot_path=None, reason: str = ""):
+        self.hit = hit
+        self.load_seconds = load_seconds
+        self.snapshot_path = snapshot_path
+        self.reason = reason
+
+    def __str__(self):
+        status = "hit" if self.hit else "miss"
+        text = f"Ontology snapshot: {status}, loaded in {self.load_seconds * 1000:.1f} ms"
+        if self.reason:
+            text += f" ({self.reason})"
+        return text
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_paths(source_path: str, cache_dir=None):
+    source_path = os.path.abspath(source_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source_path), SNAPSHOT_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, stem + ".sqlite3"), os.path.join(cache_dir, stem + ".json")
+
+
+def _read_meta(meta_path: str):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: dict):
+    tmp_path = f"{meta_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _check_snapshot(source_path: str, db_path: str, meta_path: str):
+    # Returns (meta, reason); meta is None when the snapshot must be rebuilt.
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(db_path):
+        return None, "no snapshot"
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        return None, "snapshot format changed"
+
+    st = os.stat(source_path)
+    if meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size:
+        return meta, "source unchanged"
+
+    if meta.get("sha256") == file_sha256(source_path):
+        meta["mtime_ns"] = st.st_mtime_ns
+        meta["size"] = st.st_size
+        _write_meta(meta_path, meta)
+        return meta, "source touched, content unchanged"
+
+    return None, "source changed"
+
+
+def _build_snapshot(source_path: str, db_path: str, meta_path: str) -> dict:
+    from owlready2 import World
+
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    st = os.stat(source_path)
+    sha256 = file_sha256(source_path)
+
+    # Build next to the final location and swap it in, so readers never see a half-written store.
+    tmp_path = f"{db_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    world = World(filename=tmp_path)
+    try:
+        onto = world.get_ontology(source_path).load()
+        base_iri = onto.base_iri
+        world.save()
+    except Exception:
+        world.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    world.close()
+    os.replace(tmp_path, db_path)
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "source": source_path,
+        "sha256": sha256,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "base_iri": base_iri,
+        "built_at": time.time(),
+    }
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def _open_snapshot(db_path: str, meta: dict):
+    from owlready2 import World
+
+    # Read-only and non-exclusive, so any number of Worlds (in this process or others) can
+    # read the same snapshot at once. A writable World would run ANALYZE on open and keep
+    # that write transaction, and with it the database lock, until it is closed.
+    try:
+        world = World(filename=db_path, exclusive=False, read_only=True)
+    except TypeError:
+        # owlready2 without read_only: give the lock back straight away.
+        world = World(filename=db_path, exclusive=False)
+        world.graph.db.commit()
+    return world.get_ontology(meta["base_iri"]).load()
+
+
+def ensure_snapshot(source_path: str, cache_dir=None):
+    # Builds or refreshes the snapshot without opening it, e.g. once in a parent process
+    # before worker processes attach to it.
+    source_path = os.path.abspath(source_path)
+    db_path, meta_path = snapshot_paths(source_path, cache_dir)
+    meta, _ = _check_snapshot(source_path, db_path, meta_path)
+    if meta is None:
+        _build_snapshot(source_path, db_path, meta_path)
+    return db_path
+
+
+def load_ontology(source_path: str, cache_dir=None, use_snapshot: bool = True):
+    start = time.perf_counter()
+    source_path = os.path.abspath(source_path)
+
+    if not use_snapshot:
+        from owlready2 import get_ontology
+
+        onto = get_ontology(source_path).load()
+        return onto, SnapshotInfo(False, time.perf_counter() - start, None, "snapshot disabled")
+
+    db_path, meta_path = snapshot_paths(source_path, cache_dir)
+    meta, reason = _check_snapshot(source_path, db_path, meta_path)
+    hit = meta is not None
+
+    if not hit:
+        try:
+            meta = _build_snapshot(source_path, db_path, meta_path)
+        except OSError as e:
+            # Read-only install or full disk: fall back to a plain in-memory parse.
+            from owlready2 import get_ontology
+
+            onto = get_ontology(source_path).load()
+            return onto, SnapshotInfo(False, time.perf_counter() - start, None, f"snapshot not written: {e}")
+
+    onto = _open_snapshot(db_path, meta)
+    return onto, SnapshotInfo(hit, time.perf_counter() - start, db_path, reason)
@@ -1,41 +1,40 @@
-from owlready2 import get_ontology, OwlReadyOntologyParsingError
+import argparse
+import queue
+import random
+
+from owlready2 import OwlReadyOntologyParsingError
+
+from attempt_store import DEFAULT_ATTEMPT_DB, AttemptStore
+from exercise_bank import load_bank
+from grading import TOLERANCE
+from ontology_index import build_exercise_index, build_feedback_index, lookup_feedback
+from ontology_manager import parse_curricula
+from ontology_reload import ContentState, OntologyWatcher
+from ontology_snapshot import load_ontology
+from scheduler import Scheduler
+from student_analytics import WeakestTracker
 
 ONTOLOGY_PATH = r"/Users/kolapoyusuf/Documents/AIC/areaperimeter.rdf"
+QUIT_WORDS = ("q", "quit", "exit")
 
 
-def safe_float(prompt: str) -> float:
+def read_answer(prompt: str):
+    # Returns None when the student quits or input runs out (scripted runs).
     while True:
-        value = input(prompt).strip()
+        try:
+            value = input(prompt).strip()
+        except EOFError:
+            return None
+        if value.lower() in QUIT_WORDS:
+            return None
         try:
             return float(value)
         except ValueError:
-            print("Please enter a valid number (e.g., 20 or 20.5).")
-
-
-def get_first(lst, default=None):
-    return lst[0] if lst else default
-
-
-def get_shape_for_exercise(onto, exercise):
-    for shape in onto.Shape.instances():
-        if exercise in shape.hasExercise:
-            return shape
-    return None
-
-
-def get_feedback_from_ontology(onto):
-    for fb in onto.Feedback.instances():
-        feedback_text = get_first(getattr(fb, "hasText", []), None)
-        misconception = get_first(getattr(fb, "addressesMisconception", []), None)
-        misconception_text = None
-
-        if misconception is not None:
-            misconception_text = get_first(getattr(misconception, "hasDescription", []), None)
+            print("Please enter a valid number (e.g., 20 or 20.5), or q to quit.")
 
-        if feedback_text:
-            return feedback_text, misconception_text
 
-    return None, None
+def get_feedback_from_ontology(feedback_index, shape_name, task):
+    return lookup_feedback(feedback_index, shape_name, task)
 
 
 # ---------------- Student Model (Step 8) ----------------
@@ -46,6 +45,7 @@ class StudentModel:
         self.incorrect_attempts = 0
         self.attempts_by_shape = {}       # e.g. {"Rectangle": 2, "Circle": 1}
         self.incorrect_by_shape = {}      # e.g. {"Rectangle": 1}
+        self.weakest = WeakestTracker()   # keeps the weak area current without a max() per attempt
 
     def record_attempt(self, shape_name: str, is_correct: bool):
         self.total_attempts += 1
@@ -57,6 +57,26 @@ class StudentModel:
         else:
             self.incorrect_attempts += 1
             self.incorrect_by_shape[shape_name] = self.incorrect_by_shape.get(shape_name, 0) + 1
+            self.weakest.add(shape_name)
+
+    def restore_state(self, state: dict):
+        self.total_attempts = state["total"]
+        self.correct_attempts = state["correct"]
+        self.incorrect_attempts = state["incorrect"]
+        self.attempts_by_shape = dict(state["by_shape"])
+        self.incorrect_by_shape = dict(state["wrong_by_shape"])
+        self.weakest = WeakestTracker()
+        for shape_name, wrong in self.incorrect_by_shape.items():
+            self.weakest.set(shape_name, wrong)
+
+    def progress_line(self) -> str:
+        if self.total_attempts == 0:
+            return "Progress: no attempts yet."
+        accuracy = (self.correct_attempts / self.total_attempts) * 100
+        line = f"Progress: {self.correct_attempts}/{self.total_attempts} correct ({accuracy:.1f}%)"
+        if self.incorrect_by_shape:
+            line += f" | weak area: {self.weakest.top()}"
+        return line
 
     def print_summary(self):
         print("\n=== Progress Summary (Student Model) ===")
@@ -74,72 +94,41 @@ class StudentModel:
             print(f"- {shape}: {count} attempt(s), {wrong} wrong")
 
         if self.incorrect_by_shape:
-            weakest_shape = max(self.incorrect_by_shape, key=self.incorrect_by_shape.get)
+            weakest_shape = self.weakest.top()
             print("\nWeak area detected:", weakest_shape)
             print("Recommendation: Practice more questions on", weakest_shape)
         else:
             print("\nNo weak area detected yet. Great job!")
 
 
-def main():
-    print("Loading ontology from:", ONTOLOGY_PATH)
-
-    try:
-        onto = get_ontology(ONTOLOGY_PATH).load()
-    except OwlReadyOntologyParsingError as e:
-        print("\n*** Ontology parsing failed ***")
-        print("Error:", e)
-        return
-
-    print("\nOntology loaded successfully!\n")
-
-    exercises = list(onto.Exercise.instances())
-    if not exercises:
-        print("No exercises found in the ontology.")
-        return
-
-    # Create student model
-    student_model = StudentModel()
-
-    # For now: run ONE attempt per program execution (simple prototype)
-    ex = exercises[0]
-
-    print("=== Area & Perimeter Tutor ===")
-    print("Exercise:", ex.name)
-
-    description = get_first(ex.hasDescription, "No description available.")
-    print("Question:", description)
+def run_attempt(entry, feedback_index, student_model, store=None, student_id="student", show_summary=True,
+                scheduler=None):
+    print("Exercise:", entry["exercise"])
+    print("Question:", entry["description"])
 
-    student_answer = safe_float("Your answer: ")
+    student_answer = read_answer("Your answer: ")
+    if student_answer is None:
+        return False
 
-    correct_answer = get_first(ex.hasCorrectAnswer, None)
+    correct_answer = entry["correct_answer"]
     if correct_answer is None:
         print("No correct answer stored in ontology.")
-        return
+        return True
 
-    correct_answer = float(correct_answer)
+    is_correct = abs(student_answer - correct_answer) <= TOLERANCE
 
-    tolerance = 0.01
-    is_correct = abs(student_answer - correct_answer) <= tolerance
-
-    # Find shape and formulas
-    shape = get_shape_for_exercise(onto, ex)
-    shape_name = shape.name if shape else "UnknownShape"
+    shape_name = entry["shape"] or "UnknownShape"
+    task = entry["task"]
 
     # Update student model (Step 8)
     student_model.record_attempt(shape_name, is_correct)
-
-    area_formula_text = None
-    perimeter_formula_text = None
-
-    if shape:
-        area_formula = get_first(shape.hasAreaFormula, None)
-        per_formula = get_first(shape.hasPerimeterFormula, None)
-
-        if area_formula:
-            area_formula_text = get_first(area_formula.hasDescription, None)
-        if per_formula:
-            perimeter_formula_text = get_first(per_formula.hasDescription, None)
+    if store is not None:
+        store.record(
+            student_id, shape_name, is_correct, task=task, exercise=entry["exercise"],
+            student_answer=student_answer, correct_answer=correct_answer,
+        )
+    if scheduler is not None:
+        scheduler.record(student_id, shape_name, task, is_correct)
 
     # Output feedback
     if is_correct:
@@ -150,7 +139,7 @@ def main():
         print("Your answer =", student_answer)
         print("Correct answer =", correct_answer)
 
-        fb_text, mc_text = get_feedback_from_ontology(onto)
+        fb_text, mc_text = get_feedback_from_ontology(feedback_index, shape_name, task)
 
         if mc_text:
             print("\nPossible misconception (from ontology):")
@@ -161,20 +150,160 @@ def main():
             print("-", fb_text)
 
     # Explainable AI: show formula
-    if shape:
-        print("\nLinked shape:", shape.name)
-        desc_lower = str(description).lower()
-        if "perimeter" in desc_lower or "circumference" in desc_lower:
-            if perimeter_formula_text:
-                print("Formula used (from ontology):", perimeter_formula_text)
-        else:
-            if area_formula_text:
-                print("Formula used (from ontology):", area_formula_text)
+    if entry["shape"]:
+        print("\nLinked shape:", entry["shape"])
+        if entry["formula"]:
+            print("Formula used (from ontology):", entry["formula"])
 
     print("\n--- End of attempt ---")
 
-    # Print student progress summary (Step 8)
-    student_model.print_summary()
+    if show_summary:
+        # Print student progress summary (Step 8)
+        student_model.print_summary()
+    return True
+
+
+def matching_exercises(exercise_index, shape=None, task=None):
+    return [
+        e for e in exercise_index.values()
+        if (shape is None or e["shape"] == shape) and (task is None or e["task"] == task)
+    ]
+
+
+def select_exercises(exercise_index, shape=None, task=None, order="sequential", count=0, seed=None):
+    pool = matching_exercises(exercise_index, shape, task)
+    if not pool:
+        return
+    if order == "random":
+        rng = random.Random(seed)
+        n = 0
+        while not count or n < count:
+            yield rng.choice(pool)
+            n += 1
+        return
+    n = 0
+    while not count or n < count:
+        yield pool[n % len(pool)]
+        n += 1
+
+
+def adaptive_exercises(scheduler, student_id, count=0):
+    # Next exercise chosen from the student's history; see scheduler.Scheduler.
+    n = 0
+    while not count or n < count:
+        question = scheduler.next_question(student_id)
+        if question is None or question[2] is None:
+            return
+        yield question[2]
+        n += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Area & Perimeter Tutor (command line)")
+    parser.add_argument("--no-snapshot", action="store_true", help="parse the RDF file directly instead of the compiled snapshot")
+    parser.add_argument("--snapshot-stats", action="store_true", help="print snapshot cache hit/miss and ontology load time")
+    parser.add_argument("--student", default="student", help="student id used to save and restore progress")
+    parser.add_argument("--attempt-db", default=DEFAULT_ATTEMPT_DB, help="SQLite file that stores attempt history")
+    parser.add_argument("--no-persist", action="store_true", help="keep progress in memory only")
+    parser.add_argument("--session", action="store_true", help="keep asking questions until q, end of input or --count")
+    parser.add_argument("--shape", help="only ask exercises about this shape individual (e.g. CircleShape)")
+    parser.add_argument("--task", choices=["Area", "Perimeter"], help="only ask exercises for this task")
+    parser.add_argument("--order", choices=["sequential", "random", "adaptive"], default="sequential",
+                        help="adaptive: review due and weakest shape/task first, based on your history")
+    parser.add_argument("--count", type=int, default=0, help="number of questions in a session (0 = no limit)")
+    parser.add_argument("--seed", type=int, help="random seed for --order random")
+    parser.add_argument("--watch", action="store_true",
+                        help="pick up ontology edits between questions (new exercises join the next session)")
+    parser.add_argument("--bank", help="also practise generated exercises from this JSONL file (see exercise_bank.py)")
+    parser.add_argument("--curriculum", action="append", metavar="NAME=PATH",
+                        help="register a curriculum ontology (repeatable; default: the built-in path)")
+    parser.add_argument("--use-curriculum", metavar="NAME", help="curriculum for this session (default: the first)")
+    args = parser.parse_args()
+
+    # A session uses one curriculum; --curriculum registers the variants to choose from.
+    try:
+        curricula = parse_curricula(args.curriculum, ONTOLOGY_PATH)
+    except ValueError as e:
+        parser.error(str(e))
+    curriculum = args.use_curriculum or next(iter(curricula))
+    if curriculum not in curricula:
+        parser.error(f"Unknown curriculum: {curriculum} (known: {', '.join(curricula)})")
+    ontology_path = curricula[curriculum]
+
+    print("Loading ontology from:", ontology_path)
+
+    try:
+        onto, snapshot_info = load_ontology(ontology_path, use_snapshot=not args.no_snapshot)
+    except OwlReadyOntologyParsingError as e:
+        print("\n*** Ontology parsing failed ***")
+        print("Error:", e)
+        return
+
+    print("\nOntology loaded successfully!\n")
+    if args.snapshot_stats:
+        print(snapshot_info, "\n")
+
+    # Everything a question needs is looked up once here; each question is then O(1).
+    reloads = None
+    if args.watch:
+        state = ContentState.build(onto, with_exercises=True)
+        exercise_index, feedback_index = state.exercise_index, state.feedback_index
+        reloads = queue.Queue()
+        OntologyWatcher(ontology_path, lambda: state, reloads.put, use_snapshot=not args.no_snapshot,
+                        require_tasks=False).start()
+    else:
+        exercise_index = build_exercise_index(onto)
+        feedback_index = build_feedback_index(onto)
+    if args.bank:
+        # Generated exercises carry their own answer and formula text.
+        exercise_index = {**exercise_index, **load_bank(args.bank)}
+    if not exercise_index:
+        print("No exercises found in the ontology.")
+        return
+
+    # Create student model (restored from earlier runs unless --no-persist)
+    student_model = StudentModel()
+    store = None if args.no_persist else AttemptStore(args.attempt_db)
+    if store is not None:
+        store.restore(args.student, student_model)
+
+    print("=== Area & Perimeter Tutor ===")
+
+    if not matching_exercises(exercise_index, args.shape, args.task):
+        print("No exercises match the selected shape/task.")
+
+    # Without --session: one attempt per program execution (original prototype behaviour)
+    count = args.count if args.session else 1
+    scheduler = None
+    if args.order == "adaptive":
+        pool = {e["exercise"]: e for e in matching_exercises(exercise_index, args.shape, args.task)}
+        scheduler = Scheduler.from_exercise_index(pool)
+        scheduler.seed_from_model(args.student, student_model.attempts_by_shape, student_model.incorrect_by_shape)
+        exercises = adaptive_exercises(scheduler, args.student, count)
+    else:
+        exercises = select_exercises(exercise_index, args.shape, args.task, args.order, count, args.seed)
+
+    for asked, entry in enumerate(exercises, start=1):
+        # Reloads are applied here, between questions, so an answer is always graded
+        # against the content it was asked with.
+        while reloads is not None and not reloads.empty():
+            reloaded = reloads.get_nowait()
+            exercise_index, feedback_index = reloaded.exercise_index, reloaded.feedback_index
+            print(f"\n(Ontology reloaded: {reloaded.diff})")
+        entry = exercise_index.get(entry["exercise"], entry)
+        if args.session:
+            print(f"\n--- Question {asked} ---")
+        if not run_attempt(entry, feedback_index, student_model, store, args.student,
+                           show_summary=not args.session, scheduler=scheduler):
+            break
+        if args.session:
+            print(student_model.progress_line())
+
+    if args.session:
+        student_model.print_summary()
+
+    if store is not None:
+        store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+import heapq
+import time
+
+from grading import TASKS
+
+# Adaptive next-question scheduler. A "skill" is a (shape, task) pair. Every student keeps,
+# per skill, a mastery estimate (exponentially weighted accuracy) and a spaced-repetition
+# due time (the review interval grows after correct answers and resets after mistakes).
+# Both live in per-student heaps with lazy invalidation, and a cohort-wide heap orders
+# students by their earliest due review, so choosing the next question is
+# O(log skills) and finding students with reviews due is O(log students).
+#
+# Next question for a student, in order of preference:
+#   1. the skill whose review is most overdue,
+#   2. a skill the student has not tried yet (catalog order),
+#   3. the skill with the lowest mastery.
+
+BASE_INTERVAL = 60.0        # seconds until the first review of a skill
+MAX_INTERVAL = 30 * 86400.0
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MASTERY_PRIOR = 0.5
+MASTERY_RATE = 0.3          # weight of the newest outcome in the mastery estimate
+
+
+class SkillState:
+    __slots__ = ("attempts", "mastery", "interval", "ease", "due", "version")
+
+    def __init__(self, mastery: float = MASTERY_PRIOR):
+        self.attempts = 0
+        self.mastery = mastery
+        self.interval = 0.0
+        self.ease = DEFAULT_EASE
+        self.due = 0.0
+        self.version = 0
+
+
+class StudentSchedule:
+    __slots__ = ("skills", "due_heap", "mastery_heap", "next_unseen", "cursors")
+
+    def __init__(self):
+        self.skills = {}          # skill id -> SkillState, only for skills seen so far
+        self.due_heap = []        # (due, version, skill id)
+        self.mastery_heap = []    # (mastery, due, version, skill id)
+        self.next_unseen = 0
+        self.cursors = {}         # skill id -> next exercise position
+
+    def _valid(self, skill_id: int, version: int) -> bool:
+        return self.skills[skill_id].version == version
+
+    def earliest_due(self):
+        heap = self.due_heap
+        while heap and not self._valid(heap[0][2], heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def weakest(self):
+        heap = self.mastery_heap
+        while heap and not self._valid(heap[0][3], heap[0][2]):
+            heapq.heappop(heap)
+        return heap[0][3] if heap else None
+
+    def push(self, skill_id: int):
+        state = self.skills[skill_id]
+        heapq.heappush(self.due_heap, (state.due, state.version, skill_id))
+        heapq.heappush(self.mastery_heap, (state.mastery, state.due, state.version, skill_id))
+        if len(self.due_heap) > 4 * len(self.skills) + 16:
+            self.due_heap = [(s.due, s.version, k) for k, s in self.skills.items()]
+            self.mastery_heap = [(s.mastery, s.due, s.version, k) for k, s in self.skills.items()]
+            heapq.heapify(self.due_heap)
+            heapq.heapify(self.mastery_heap)
+
+
+class Scheduler:
+    def __init__(self, skills, exercises_by_skill=None, clock=time.time, base_interval: float = BASE_INTERVAL):
+        # skills: ordered (shape, task) pairs; exercises_by_skill: (shape, task) -> [exercise entry, ...]
+        self.skills = list(skills)
+        self.skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+        exercises_by_skill = exercises_by_skill or {}
+        self.exercises = [exercises_by_skill.get(skill, []) for skill in self.skills]
+        self.clock = clock
+        self.base_interval = base_interval
+
+        self.students = {}
+        self._cohort_heap = []    # (earliest due, student id)
+
+    @classmethod
+    def from_exercise_index(cls, exercise_index: dict, **kwargs):
+        # One skill per (shape, task) that has exercises, in ontology order.
+        exercises_by_skill = {}
+        for entry in exercise_index.values():
+            if entry["shape"] is None or entry["correct_answer"] is None:
+                continue
+            exercises_by_skill.setdefault((entry["shape"], entry["task"]), []).append(entry)
+        return cls(list(exercises_by_skill), exercises_by_skill, **kwargs)
+
+    @classmethod
+    def from_core(cls, core, **kwargs):
+        # Every (shape, task) the core can grade; the student supplies the dimensions.
+        skills = [(shape, task) for shape in core.shape_names() for task in TASKS if core.required_dims(shape, task)]
+        return cls(skills, **kwargs)
+
+    def schedule(self, student_id: str) -> StudentSchedule:
+        schedule = self.students.get(student_id)
+        if schedule is None:
+            schedule = self.students[student_id] = StudentSchedule()
+        return schedule
+
+    # ---------- History ----------
+    def seed_from_model(self, student_id: str, by_shape: dict, wrong_by_shape: dict, now: float = None):
+        # Starts mastery from saved per-shape totals (StudentModel.by_shape / wrong_by_shape,
+        # or attempts_by_shape / incorrect_by_shape in the CLI). Shapes practised before
+        # count as seen and are due for review right away.
+        now = self.clock() if now is None else now
+        schedule = self.schedule(student_id)
+        for skill_id, (shape, _) in enumerate(self.skills):
+            attempts = by_shape.get(shape, 0)
+            if not attempts or skill_id in schedule.skills:
+                continue
+            correct = attempts - wrong_by_shape.get(shape, 0)
+            state = schedule.skills[skill_id] = SkillState((correct + MASTERY_PRIOR) / (attempts + 1))
+            state.attempts = attempts
+            state.interval = self.base_interval
+            state.due = now
+            schedule.push(skill_id)
+        self._push_cohort(student_id, schedule)
+
+    def record(self, student_id: str, shape_name: str, task: str, is_correct: bool, now: float = None):
+        skill_id = self.skill_ids.get((shape_name, task))
+        if skill_id is None:
+            return
+        now = self.clock() if now is None else now
+        schedule = self.schedule(student_id)
+        state = schedule.skills.get(skill_id)
+        if state is None:
+            state = schedule.skills[skill_id] = SkillState()
+
+        state.attempts += 1
+        state.mastery += MASTERY_RATE * ((1.0 if is_correct else 0.0) - state.mastery)
+        if is_correct:
+            state.interval = min(MAX_INTERVAL, max(self.base_interval, state.interval * state.ease))
+            state.ease += 0.1
+        else:
+            state.interval = self.base_interval
+            state.ease = max(MIN_EASE, state.ease - 0.2)
+        state.due = now + state.interval
+        state.version += 1
+        schedule.push(skill_id)
+        self._push_cohort(student_id, schedule)
+
+    # ---------- Selection ----------
+    def next_skill(self, student_id: str, now: float = None):
+        now = self.clock() if now is None else now
+        schedule = self.schedule(student_id)
+
+        earliest = schedule.earliest_due()
+        if earliest is not None and earliest[0] <= now:
+            return self.skills[earliest[2]]
+
+        while schedule.next_unseen < len(self.skills) and schedule.next_unseen in schedule.skills:
+            schedule.next_unseen += 1
+        if schedule.next_unseen < len(self.skills):
+            return self.skills[schedule.next_unseen]
+
+        weakest = schedule.weakest()
+        return self.skills[weakest] if weakest is not None else None
+
+    def next_question(self, student_id: str, now: float = None):
+        # Returns (shape, task, exercise entry or None), or None if there is nothing to ask.
+        skill = self.next_skill(student_id, now)
+        if skill is None:
+            return None
+        skill_id = self.skill_ids[skill]
+        pool = self.exercises[skill_id]
+        if not pool:
+            return skill[0], skill[1], None
+        cursors = self.schedule(student_id).cursors
+        position = cursors.get(skill_id, 0)
+        cursors[skill_id] = position + 1
+        return skill[0], skill[1], pool[position % len(pool)]
+
+    def mastery(self, student_id: str, shape_name: str, task: str):
+        schedule = self.students.get(student_id)
+        skill_id = self.skill_ids.get((shape_name, task))
+        if schedule is None or skill_id not in schedule.skills:
+            return None
+        return schedule.skills[skill_id].mastery
+
+    # ---------- Cohort ----------
+    def _push_cohort(self, student_id: str, schedule: StudentSchedule):
+        earliest = schedule.earliest_due()
+        if earliest is not None:
+            heapq.heappush(self._cohort_heap, (earliest[0], student_id))
+        if len(self._cohort_heap) > 4 * len(self.students) + 16:
+            rebuilt = []
+            for other_id, other in self.students.items():
+                other_earliest = other.earliest_due()
+                if other_earliest is not None:
+                    rebuilt.append((other_earliest[0], other_id))
+            heapq.heapify(rebuilt)
+            self._cohort_heap = rebuilt
+
+    def due_students(self, now: float = None, limit: int = 100):
+        # Students with at least one review due, most overdue first. Stale heap entries
+        # (the student answered since) are dropped as they surface.
+        now = self.clock() if now is None else now
+        heap = self._cohort_heap
+        found = []
+        seen = set()
+        while heap and heap[0][0] <= now and len(found) < limit:
+            due, student_id = heapq.heappop(heap)
+            earliest = self.students[student_id].earliest_due()
+            if earliest is None or earliest[0] != due or student_id in seen:
+                continue
+            seen.add(student_id)
+            found.append((student_id, due))
+        for student_id, due in found:
+            heapq.heappush(heap, (due, student_id))
+        return found
@@ -0,0 +1,188 @@
+import ast
+import math
+import re
+from functools import lru_cache
+
+from grading import FORMULAS, TASKS, shape_kind
+from ontology_index import get_first
+
+# (shape individual name, task) -> dimension names + compiled evaluator. Evaluators are
+# built once at load time from the formula individuals linked by hasAreaFormula /
+# hasPerimeterFormula: a structured hasExpression value if present, otherwise the
+# hasDescription text (e.g. "Area = ½ × base × height"). Shapes whose formula cannot be
+# compiled fall back to the built-in rules in grading.FORMULAS.
+
+FORMULA_PROPS = {"Area": "hasAreaFormula", "Perimeter": "hasPerimeterFormula"}
+
+_SYMBOLS = {
+    "×": "*", "·": "*", "∙": "*", "÷": "/", "−": "-", "–": "-",
+    "½": "0.5", "¼": "0.25", "¾": "0.75",
+    "π": " pi ", "²": "**2", "³": "**3",
+}
+_CONSTANTS = {"pi": math.pi}
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class _ExpandSquares(ast.NodeTransformer):
+    # x**2 / x**3 -> (x)*(x) / (x)*(x)*(x), as in the built-in rules: a float product
+    # overflows to inf where float ** raises OverflowError.
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if (isinstance(node.op, ast.Pow) and isinstance(node.right, ast.Constant)
+                and type(node.right.value) is int and node.right.value in (2, 3)):
+            product = node.left
+            for _ in range(node.right.value - 1):
+                product = ast.BinOp(product, ast.Mult(), node.left)
+            return product
+        return node
+
+
+def normalize_formula(text: str) -> str:
+    expr = str(text).split("=")[-1]
+    for symbol, replacement in _SYMBOLS.items():
+        expr = expr.replace(symbol, replacement)
+    expr = re.sub(r"(?<=\d)(?=[A-Za-z_(])", "*", expr)          # 2r, 2(…)
+    expr = re.sub(r"(?<=[\w)])\s*(?=\()", "*", expr)            # r (…), )(
+    expr = re.sub(r"(?<=[\w)])\s+(?=[A-Za-z_\d])", "*", expr)   # pi r, ) r
+    return " ".join(expr.split())
+
+
+@lru_cache(maxsize=None)
+def compile_formula(text: str):
+    # Returns (dimension names in order of first use, evaluator(dims) -> value). The
+    # evaluator only uses arithmetic operators, so it accepts scalars or NumPy arrays.
+    expr = normalize_formula(text)
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"Cannot parse formula {text!r}: {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"Unsupported syntax in formula {text!r}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise FormulaError(f"Unsupported constant in formula {text!r}")
+
+    dims = []
+    for name in _IDENTIFIER.findall(expr):
+        if name.startswith("_"):
+            raise FormulaError(f"{name!r} is not a dimension name in formula {text!r}")
+        if name not in _CONSTANTS and name not in dims:
+            dims.append(name)
+    if not dims:
+        raise FormulaError(f"Formula {text!r} has no dimensions")
+
+    expr = ast.unparse(_ExpandSquares().visit(tree))
+    source = _IDENTIFIER.sub(lambda m: m.group(0) if m.group(0) in _CONSTANTS else f"d[{m.group(0)!r}]", expr)
+    evaluator = eval(compile(f"lambda d: {source}", "<formula>", "eval"), {"__builtins__": {}, **_CONSTANTS})
+    return dims, evaluator
+
+
+def evaluate(evaluator, dims: dict) -> float:
+    # One scalar answer. Dimensions too large for a float answer (inf, or an overflow in
+    # x ** 4) are reported as bad input rather than graded against inf.
+    try:
+        value = evaluator(dims)
+    except ArithmeticError as e:
+        raise ValueError(f"Cannot compute the answer for these dimensions: {e}") from None
+    if not math.isfinite(value):
+        raise ValueError("These dimensions are too large to grade.")
+    return value
+
+
+class ShapeRule:
+    __slots__ = ("dims", "evaluator", "expression", "source", "kind")
+
+    def __init__(self, dims, evaluator, expression=None, source="builtin", kind=None):
+        self.dims = list(dims)
+        self.evaluator = evaluator
+        self.expression = expression
+        self.source = source
+        self.kind = kind
+
+
+class ShapeRegistry:
+    def __init__(self):
+        self._rules = {}
+
+    def register(self, shape_name: str, task: str, rule: ShapeRule):
+        self._rules[(shape_name, task)] = rule
+
+    def remove_shape(self, shape_name: str):
+        for task in TASKS:
+            self._rules.pop((shape_name, task), None)
+
+    def copy(self):
+        registry = ShapeRegistry()
+        registry._rules = dict(self._rules)
+        return registry
+
+    def get(self, shape_name: str, task: str):
+        return self._rules.get((shape_name, task))
+
+    def shape_names(self):
+        return sorted({shape for shape, _ in self._rules})
+
+    def required_dims(self, shape_name: str, task: str):
+        rule = self._rules.get((shape_name, task))
+        return list(rule.dims) if rule else []
+
+    def compute(self, shape_name: str, task: str, dims: dict):
+        rule = self._rules.get((shape_name, task))
+        if rule is None:
+            raise ValueError("Unknown shape/task")
+        return evaluate(rule.evaluator, dims)
+
+    @classmethod
+    def from_ontology(cls, onto):
+        registry = cls()
+        for sh in onto.Shape.instances():
+            for task, rule in rules_for_shape(sh):
+                registry.register(sh.name, task, rule)
+        return registry
+
+
+def rules_for_shape(sh):
+    # (task, ShapeRule) for every task the shape individual can be graded on.
+    for task in TASKS:
+        rule = _rule_from_formula(get_first(getattr(sh, FORMULA_PROPS[task], []), None))
+        if rule is None:
+            rule = _builtin_rule(_shape_kind_of(sh), task)
+        if rule is not None:
+            yield task, rule
+
+
+def _rule_from_formula(formula):
+    if formula is None:
+        return None
+    for prop in ("hasExpression", "hasDescription"):
+        text = get_first(getattr(formula, prop, []), None)
+        if not text:
+            continue
+        try:
+            dims, evaluator = compile_formula(str(text))
+        except FormulaError:
+            continue
+        return ShapeRule(dims, evaluator, str(text), "ontology")
+    return None
+
+
+def _shape_kind_of(sh):
+    # Prefer the individual's class (Rectangle, Circle, ...) over its name.
+    for cls in getattr(sh, "is_a", []):
+        kind = shape_kind(getattr(cls, "name", ""))
+        if kind:
+            return kind
+    return shape_kind(sh.name)
+
+
+def _builtin_rule(kind, task: str):
+    rule = FORMULAS.get((kind, task))
+    return ShapeRule(rule[0], rule[1], kind=kind) if rule else None
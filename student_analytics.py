@@ -0,0 +1,235 @@
+import heapq
+import time
+from array import array
+from collections import deque
+
+from grading import TASKS
+
+# Incremental progress analytics for many students at once. Every update touches a fixed
+# number of counters, and the "weak area" is kept in a lazily-pruned heap instead of being
+# recomputed with max() over every shape, so record() and summary() stay O(log shapes)
+# however many attempts a student has made.
+#
+#   analytics = ClassroomAnalytics(window=20, time_window=600)
+#   analytics.record("s42", "CircleShape", "Area", is_correct=False)
+#   analytics.summary("s42")   # totals, per-task, last-20 and last-10-minutes accuracy, weak areas
+
+DEFAULT_WINDOW = 20
+DEFAULT_TIME_WINDOW = 600.0
+TASK_IDS = {task: i for i, task in enumerate(TASKS)}
+
+
+class WeakestTracker:
+    # Max-heap of (count, first-seen order) with lazy deletion: stale entries are dropped
+    # when they reach the top. Ties go to the key seen first, which matches max() over an
+    # insertion-ordered dict. Counts may go down as well as up (sliding windows).
+    __slots__ = ("_heap", "_counts", "_order")
+
+    def __init__(self):
+        self._heap = []
+        self._counts = {}
+        self._order = {}
+
+    def set(self, key, count: int):
+        order = self._order.get(key)
+        if order is None:
+            order = self._order[key] = len(self._order)
+        self._counts[key] = count
+        if count > 0:
+            heapq.heappush(self._heap, (-count, order, key))
+        if len(self._heap) > 2 * len(self._counts) + 16:
+            self._compact()
+
+    def add(self, key, delta: int = 1):
+        self.set(key, self._counts.get(key, 0) + delta)
+
+    def count(self, key) -> int:
+        return self._counts.get(key, 0)
+
+    def top(self):
+        heap = self._heap
+        while heap:
+            neg_count, _, key = heap[0]
+            if self._counts.get(key) == -neg_count:
+                return key
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self):
+        self._heap = [(-c, self._order[k], k) for k, c in self._counts.items() if c > 0]
+        heapq.heapify(self._heap)
+
+
+class StudentStats:
+    __slots__ = (
+        "total", "correct", "attempts", "wrong", "task_attempts", "task_wrong", "weak",
+        "window", "window_correct", "window_weak",
+        "recent", "recent_correct",
+    )
+
+    def __init__(self, window: int):
+        self.total = 0
+        self.correct = 0
+        # Indexed by shape_id * len(TASKS) + task_id; grown as new shapes appear.
+        self.attempts = array("L")
+        self.wrong = array("L")
+        self.task_attempts = array("L", [0] * len(TASKS))
+        self.task_wrong = array("L", [0] * len(TASKS))
+        self.weak = WeakestTracker()
+
+        self.window = deque(maxlen=window)
+        self.window_correct = 0
+        self.window_weak = WeakestTracker()
+
+        self.recent = deque()
+        self.recent_correct = 0
+
+    def _slot(self, shape_id: int, task_id: int) -> int:
+        slot = shape_id * len(TASKS) + task_id
+        if slot >= len(self.attempts):
+            grow = (shape_id + 1) * len(TASKS) - len(self.attempts)
+            self.attempts.extend([0] * grow)
+            self.wrong.extend([0] * grow)
+        return slot
+
+    def record(self, shape_id: int, task_id: int, is_correct: bool, ts: float, time_window: float):
+        slot = self._slot(shape_id, task_id)
+        self.total += 1
+        self.attempts[slot] += 1
+        self.task_attempts[task_id] += 1
+        if is_correct:
+            self.correct += 1
+        else:
+            self.wrong[slot] += 1
+            self.task_wrong[task_id] += 1
+            self.weak.add(shape_id)
+
+        if len(self.window) == self.window.maxlen:
+            old_shape, old_correct = self.window[0]
+            if old_correct:
+                self.window_correct -= 1
+            else:
+                self.window_weak.add(old_shape, -1)
+        self.window.append((shape_id, is_correct))
+        if is_correct:
+            self.window_correct += 1
+        else:
+            self.window_weak.add(shape_id)
+
+        self.recent.append((ts, is_correct))
+        self.recent_correct += is_correct
+        self.expire(ts, time_window)
+
+    def expire(self, now: float, time_window: float):
+        recent = self.recent
+        while recent and recent[0][0] <= now - time_window:
+            _, was_correct = recent.popleft()
+            self.recent_correct -= was_correct
+
+
+def _ratio(correct: int, total: int):
+    return correct / total if total else None
+
+
+class ClassroomAnalytics:
+    def __init__(self, window: int = DEFAULT_WINDOW, time_window: float = DEFAULT_TIME_WINDOW, clock=time.time):
+        self.window = window
+        self.time_window = time_window
+        self.clock = clock
+
+        self.shape_ids = {}
+        self.shape_names = []
+        self.students = {}
+
+        self.total = 0
+        self.correct = 0
+        self.class_attempts = array("L")
+        self.class_wrong = array("L")
+        self.class_weak = WeakestTracker()
+
+    def _shape_id(self, shape_name: str) -> int:
+        shape_id = self.shape_ids.get(shape_name)
+        if shape_id is None:
+            shape_id = self.shape_ids[shape_name] = len(self.shape_names)
+            self.shape_names.append(shape_name)
+            self.class_attempts.extend([0] * len(TASKS))
+            self.class_wrong.extend([0] * len(TASKS))
+        return shape_id
+
+    def record(self, student_id: str, shape_name: str, task: str, is_correct: bool, ts: float = None):
+        task_id = TASK_IDS.get(task)
+        if task_id is None:
+            raise ValueError(f"Unknown task: {task}")
+        shape_id = self._shape_id(shape_name)
+
+        stats = self.students.get(student_id)
+        if stats is None:
+            stats = self.students[student_id] = StudentStats(self.window)
+        stats.record(shape_id, task_id, bool(is_correct), self.clock() if ts is None else ts, self.time_window)
+
+        slot = shape_id * len(TASKS) + task_id
+        self.total += 1
+        self.class_attempts[slot] += 1
+        if is_correct:
+            self.correct += 1
+        else:
+            self.class_wrong[slot] += 1
+            self.class_weak.add(shape_id)
+
+    # ---------- Queries ----------
+    def _name(self, shape_id):
+        return None if shape_id is None else self.shape_names[shape_id]
+
+    def weak_area(self, student_id: str):
+        stats = self.students.get(student_id)
+        return self._name(stats.weak.top()) if stats else None
+
+    def shape_accuracy(self, student_id: str, shape_name: str, task: str = None):
+        stats = self.students.get(student_id)
+        shape_id = self.shape_ids.get(shape_name)
+        if stats is None or shape_id is None or shape_id * len(TASKS) >= len(stats.attempts):
+            return None
+        base = shape_id * len(TASKS)
+        slots = [base + TASK_IDS[task]] if task else range(base, base + len(TASKS))
+        attempts = sum(stats.attempts[s] for s in slots)
+        return _ratio(attempts - sum(stats.wrong[s] for s in slots), attempts)
+
+    def summary(self, student_id: str, now: float = None):
+        stats = self.students.get(student_id)
+        if stats is None:
+            return None
+        stats.expire(self.clock() if now is None else now, self.time_window)
+
+        by_task = {}
+        for task, task_id in TASK_IDS.items():
+            attempts = stats.task_attempts[task_id]
+            wrong = stats.task_wrong[task_id]
+            by_task[task] = {"attempts": attempts, "accuracy": _ratio(attempts - wrong, attempts)}
+
+        return {
+            "total": stats.total,
+            "correct": stats.correct,
+            "accuracy": _ratio(stats.correct, stats.total),
+            "by_task": by_task,
+            "window_size": len(stats.window),
+            "window_accuracy": _ratio(stats.window_correct, len(stats.window)),
+            "recent_attempts": len(stats.recent),
+            "recent_accuracy": _ratio(stats.recent_correct, len(stats.recent)),
+            "weak_area": self._name(stats.weak.top()),
+            "recent_weak_area": self._name(stats.window_weak.top()),
+        }
+
+    def class_summary(self):
+        by_shape = {}
+        for shape_id, name in enumerate(self.shape_names):
+            base = shape_id * len(TASKS)
+            attempts = sum(self.class_attempts[base:base + len(TASKS)])
+            wrong = sum(self.class_wrong[base:base + len(TASKS)])
+            by_shape[name] = {"attempts": attempts, "accuracy": _ratio(attempts - wrong, attempts)}
+        return {
+            "students": len(self.students),
+            "total": self.total,
+            "accuracy": _ratio(self.correct, self.total),
+            "weak_area": self._name(self.class_weak.top()),
+            "by_shape": by_shape,
+        }
@@ -0,0 +1,90 @@
+from student_analytics import WeakestTracker
+
+
+class StudentModel:
+    def __init__(self):
+        self.total = 0
+        self.correct = 0
+        self.incorrect = 0
+        self.by_shape = {}
+        self.wrong_by_shape = {}
+
+        # The weak area is tracked as attempts come in, and the summary is kept as lines
+        # that record() updates in place: one shape line per attempt, the weak-area lines
+        # only when the weak area changes. Repeated summary_text() calls are free.
+        self._weak = WeakestTracker()
+        self._shape_lines = []      # one line per shape, in order of first attempt
+        self._shape_slots = {}      # shape -> index into _shape_lines
+        self._weak_lines = None
+        self._weak_lines_for = None
+        self._summary = None
+
+    def record(self, shape_name: str, is_correct: bool):
+        self.total += 1
+        self.by_shape[shape_name] = self.by_shape.get(shape_name, 0) + 1
+        if is_correct:
+            self.correct += 1
+        else:
+            self.incorrect += 1
+            self.wrong_by_shape[shape_name] = self.wrong_by_shape.get(shape_name, 0) + 1
+            self._weak.add(shape_name)
+        self._set_shape_line(shape_name)
+        self._summary = None
+
+    def weak_area(self):
+        return self._weak.top()
+
+    def _set_shape_line(self, shape_name: str):
+        wrong = self.wrong_by_shape.get(shape_name, 0)
+        line = f"- {shape_name}: {self.by_shape[shape_name]} attempt(s), {wrong} wrong"
+        slot = self._shape_slots.get(shape_name)
+        if slot is None:
+            self._shape_slots[shape_name] = len(self._shape_lines)
+            self._shape_lines.append(line)
+        else:
+            self._shape_lines[slot] = line
+
+    def _weak_area_lines(self):
+        weakest = self._weak.top()
+        if self._weak_lines is None or weakest != self._weak_lines_for:
+            if weakest is not None:
+                self._weak_lines = ["", f"Weak area: {weakest}", f"Recommendation: practice more {weakest} questions."]
+            else:
+                self._weak_lines = ["", "No weak area detected yet. Great job!"]
+            self._weak_lines_for = weakest
+        return self._weak_lines
+
+    def summary_lines(self) -> list:
+        if self.total == 0:
+            return ["No attempts yet."]
+        acc = (self.correct / self.total) * 100
+        return [
+            f"Total attempts: {self.total}",
+            f"Correct: {self.correct}",
+            f"Incorrect: {self.incorrect}",
+            f"Accuracy: {acc:.1f}%",
+            "",
+            "Attempts by shape:",
+        ] + self._shape_lines + self._weak_area_lines()
+
+    def summary_text(self) -> str:
+        if self._summary is None:
+            self._summary = "\n".join(self.summary_lines())
+        return self._summary
+
+    def restore_state(self, state: dict):
+        self.total = state["total"]
+        self.correct = state["correct"]
+        self.incorrect = state["incorrect"]
+        self.by_shape = dict(state["by_shape"])
+        self.wrong_by_shape = dict(state["wrong_by_shape"])
+
+        self._weak = WeakestTracker()
+        for shape_name, wrong in self.wrong_by_shape.items():
+            self._weak.set(shape_name, wrong)
+        self._shape_lines = []
+        self._shape_slots = {}
+        for shape_name in self.by_shape:
+            self._set_shape_line(shape_name)
+        self._weak_lines = None
+        self._summary = None
@@ -0,0 +1,18 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+ONTOLOGY = os.path.join(REPO, "areaperimeter.rdf")
+
+
+@pytest.fixture
+def ontology_copy(tmp_path):
+    # A private copy of the ontology, so its snapshot is built under tmp_path.
+    path = tmp_path / "areaperimeter.rdf"
+    shutil.copy(ONTOLOGY, path)
+    return str(path)
@@ -0,0 +1,104 @@
+import json
+import math
+import sys
+import time
+
+import pytest
+
+import attempt_log
+from attempt_log import HEADER, RECORD, AttemptLog, AttemptLogWriter, names_path
+
+DAY = 86400
+NOW = time.time()
+
+ATTEMPTS = [
+    # student, shape, task, dims, answer, correct answer, correct, misconception, age in days
+    ("s1", "RectangleShape", "Area", {"length": 4, "width": 5}, 20, 20, True, None, 1),
+    ("s1", "CircleShape", "Perimeter", {"radius": 1}, 3.14, 6.2832, False, "Uses the radius, not the diameter", 2),
+    ("s2", "RectangleShape", "Perimeter", {"length": 4, "width": 5}, 20, 18, False, "Confuses area and perimeter", 3),
+    ("s2", "TriangleShape", "Perimeter", {"side1": 3, "side2": 4, "side3": 5}, 12, 12, True, None, 10),
+    ("s3", "RectangleShape", "Area", {"length": 2, "width": 3}, 10, 6, False, "Confuses area and perimeter", 20),
+]
+
+
+def _write(path, attempts=ATTEMPTS):
+    writer = AttemptLogWriter(str(path), flush_every=2)
+    for student, shape, task, dims, answer, correct_answer, ok, mc, age in attempts:
+        writer.append(student, shape, task, dims, answer, correct_answer, ok, mc, ts=NOW - age * DAY)
+    writer.close()
+
+
+def test_record_layout(tmp_path):
+    path = tmp_path / "attempts.aplog"
+    _write(path)
+    data = path.read_bytes()
+    assert RECORD.size == 48
+    assert len(data) == HEADER.size + len(ATTEMPTS) * 48
+    assert HEADER.unpack_from(data)[:3] == (b"APAL", attempt_log.LOG_FORMAT, 48)
+
+    names = [json.loads(line) for line in open(names_path(str(path)), encoding="utf-8")]
+    assert names[:2] == [["student", "s1"], ["shape", "RectangleShape"]]
+    ids = {}
+    for kind, name in names:
+        ids.setdefault(kind, []).append(name)
+    assert ids["student"] == ["s1", "s2", "s3"]
+    assert ids["misconception"] == ["Uses the radius, not the diameter", "Confuses area and perimeter"]
+
+    ts, answer, correct_answer, student, mc, d1, d2, d3, shape, task, flags = RECORD.unpack_from(
+        data, HEADER.size + 2 * 48)
+    assert (answer, correct_answer, flags) == (20, 18, 0)
+    assert ids["student"][student] == "s2" and ids["shape"][shape] == "RectangleShape"
+    assert ids["misconception"][mc] == "Confuses area and perimeter"
+    assert task == attempt_log.TASK_IDS["Perimeter"]
+    assert (d1, d2) == (4, 5) and math.isnan(d3)
+    assert ts == pytest.approx(NOW - 3 * DAY)
+
+    # Correct answers never carry a misconception.
+    assert RECORD.unpack_from(data, HEADER.size)[4] == attempt_log.NONE
+
+
+def test_read_back_and_torn_last_record(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "attempts.aplog"
+    _write(path)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 20)       # a write cut short
+
+    with AttemptLog(str(path)) as log:
+        assert len(log) == len(ATTEMPTS)
+        assert list(log.column("answer")) == [a[4] for a in ATTEMPTS]
+        assert list(log.is_correct) == [a[6] for a in ATTEMPTS]
+
+    # The next writer cuts the torn record off before appending.
+    _write(path, ATTEMPTS[:1])
+    assert path.stat().st_size == HEADER.size + (len(ATTEMPTS) + 1) * RECORD.size
+    with AttemptLog(str(path)) as log:
+        assert len(log) == len(ATTEMPTS) + 1
+        assert log.accuracy_by_student()["s1"] == {"attempts": 3, "correct": 2, "accuracy": 0.6667}
+
+
+def test_task_and_days_filters(tmp_path, monkeypatch, capsys):
+    pytest.importorskip("numpy")
+    path = tmp_path / "attempts.aplog"
+    _write(path)
+
+    with AttemptLog(str(path)) as log:
+        assert log.accuracy_by_shape("Perimeter") == {
+            "CircleShape": {"attempts": 1, "correct": 0, "accuracy": 0.0},
+            "RectangleShape": {"attempts": 1, "correct": 0, "accuracy": 0.0},
+            "TriangleShape": {"attempts": 1, "correct": 1, "accuracy": 1.0},
+        }
+        assert log.accuracy_by_shape(since=NOW - 7 * DAY) == {
+            "RectangleShape": {"attempts": 2, "correct": 1, "accuracy": 0.5},
+            "CircleShape": {"attempts": 1, "correct": 0, "accuracy": 0.0},
+        }
+        assert log.misconception_frequency() == [("Confuses area and perimeter", 2),
+                                                 ("Uses the radius, not the diameter", 1)]
+        assert log.misconception_frequency("Area") == [("Confuses area and perimeter", 1)]
+
+    monkeypatch.setattr(sys, "argv", ["attempt_log.py", str(path), "--task", "Perimeter", "--days", "7"])
+    attempt_log.main()
+    out = capsys.readouterr().out
+    assert "- CircleShape: 0.0% of 1" in out and "- RectangleShape: 0.0% of 1" in out
+    assert "TriangleShape" not in out
+    assert "- 1 x Confuses area and perimeter" in out and "- 1 x Uses the radius, not the diameter" in out
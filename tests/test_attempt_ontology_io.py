@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from attempt_ontology_io import (  # noqa: E402
+    EXERCISE_PREFIX, UNKNOWN_SHAPE, open_ontology, read_ontology_attempts, store_to_ontology,
+)
+from attempt_store import SCHEMA  # noqa: E402
+from ontology_index import build_exercise_index  # noqa: E402
+
+ROWS = [
+    # student_id, shape, task, exercise, student_answer, is_correct
+    ("s1", "CircleShape", "Perimeter", None, 43.98, 1),
+    ("s1", "SquareShape", "Area", "bank-17", 25.0, 1),
+    ("s2", "RectangleShape", "Area", "RectangleExercise1", 20.0, 1),
+    ("s2", "CircleShape", "Area", None, 10.0, 0),
+    ("s3", "HexagonShape", "Area", None, 5.0, 1),
+]
+
+
+def _attempt_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO attempts (student_id, shape, task, exercise, student_answer, is_correct, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, 0)", ROWS,
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_attempts_without_exercise_keep_shape_and_task(tmp_path, ontology_copy):
+    db, quadstore = str(tmp_path / "attempts.sqlite3"), str(tmp_path / "term.sqlite3")
+    _attempt_db(db)
+
+    writer, _ = store_to_ontology(db, ontology_copy, quadstore, progress_every=0)
+    assert (writer.written, writer.unlinked, writer.lossy) == (5, 4, 1)
+    # Running the export again reuses the generated exercises.
+    writer, _ = store_to_ontology(db, ontology_copy, quadstore, progress_every=0)
+    assert (writer.unlinked, writer.lossy) == (4, 1)
+
+    onto = open_ontology(quadstore=quadstore)
+    back = {a["attempt"]: a for batch in read_ontology_attempts(onto) for a in batch}
+    # The generated exercises are not practice content.
+    assert not [name for name in build_exercise_index(onto) if name.startswith(EXERCISE_PREFIX)]
+    onto.world.close()
+    got = [(a["shape"], a["task"], a["exercise"], a["is_correct"])
+           for a in (back[f"StoreAttempt{i}"] for i in range(1, 6))]
+    assert got == [
+        ("CircleShape", "Perimeter", None, True),
+        ("SquareShape", "Area", None, True),
+        ("RectangleShape", "Area", "RectangleExercise1", True),
+        ("CircleShape", "Area", None, False),
+        (UNKNOWN_SHAPE, None, None, True),
+    ]
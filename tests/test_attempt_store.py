@@ -0,0 +1,62 @@
+import random
+import sqlite3
+
+from attempt_store import AttemptStore
+from student_model import StudentModel
+
+SHAPES = ["RectangleShape", "CircleShape", "SquareShape", "TriangleShape"]
+
+
+def _state(model):
+    return (model.total, model.correct, model.incorrect, list(model.by_shape.items()),
+            list(model.wrong_by_shape.items()), model.weak_area(), model.summary_text())
+
+
+def _record(store, live, rng, count, students=("s1", "s1", "s2")):
+    for _ in range(count):
+        student = rng.choice(students)
+        shape, ok = rng.choice(SHAPES), rng.random() < 0.6
+        store.record(student, shape, ok, task="Area")
+        live.setdefault(student, StudentModel()).record(shape, ok)
+
+
+def _snapshot_and_last(path, student_id):
+    conn = sqlite3.connect(path)
+    try:
+        snapshot = conn.execute("SELECT last_attempt_id FROM student_snapshots WHERE student_id = ?",
+                                (student_id,)).fetchone()
+        last = conn.execute("SELECT MAX(id) FROM attempts WHERE student_id = ?", (student_id,)).fetchone()[0]
+    finally:
+        conn.close()
+    return snapshot[0] if snapshot else None, last
+
+
+def test_restore_from_snapshot_and_tail(tmp_path):
+    path = str(tmp_path / "attempts.sqlite3")
+    rng = random.Random(11)
+    live = {}
+
+    store = AttemptStore(path, snapshot_every=7)
+    _record(store, live, rng, 40)
+    store.flush()
+    _record(store, live, rng, 3, students=("s1",))      # fewer than snapshot_every
+    store.flush()
+    snapshot_id, last_id = _snapshot_and_last(path, "s1")
+    assert snapshot_id is not None and snapshot_id < last_id     # a snapshot plus a tail
+    for student, model in live.items():
+        assert _state(store.restore(student, StudentModel())) == _state(model)
+    store.close()
+
+    # close() snapshots everyone, so a reopened store restores from the snapshot alone...
+    snapshot_id, last_id = _snapshot_and_last(path, "s1")
+    assert snapshot_id == last_id
+    store = AttemptStore(path, snapshot_every=7)
+    for student, model in live.items():
+        assert _state(store.restore(student, StudentModel())) == _state(model)
+
+    # ...and from that snapshot plus whatever is recorded after reopening.
+    _record(store, live, rng, 5)
+    for student, model in live.items():
+        assert _state(store.restore(student, StudentModel())) == _state(model)
+    store.close()
+    assert _state(AttemptStore(path).restore("nobody", StudentModel())) == _state(StudentModel())
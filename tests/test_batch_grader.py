@@ -0,0 +1,80 @@
+import csv
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+import batch_grader  # noqa: E402
+from ontology_snapshot import ensure_snapshot  # noqa: E402
+
+
+def _wait_at(barrier):
+    # Held until every worker has initialised, so each worker takes exactly one item.
+    barrier.wait(timeout=60)
+    return os.getpid(), batch_grader._core is not None
+
+
+def test_no_tables_workers_load_the_snapshot_together(ontology_copy):
+    # --no-tables: every worker opens the ontology snapshot itself, all at the same time.
+    ensure_snapshot(ontology_copy)
+    with multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(4)
+        with multiprocessing.Pool(4, initializer=batch_grader._init_worker,
+                                  initargs=(ontology_copy, True, None)) as pool:
+            results = pool.map(_wait_at, [barrier] * 4, chunksize=1)
+    assert len({pid for pid, _ in results}) == 4
+    assert all(loaded for _, loaded in results)
+
+
+def test_no_tables_run(ontology_copy, tmp_path):
+    submissions = tmp_path / "submissions.csv"
+    with open(submissions, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["shape", "task", "length", "width", "answer"])
+        for i in range(2000):
+            writer.writerow(["RectangleShape", "Area", i % 9 + 1, 2, (i % 9 + 1) * 2])
+
+    report = batch_grader.run(
+        str(submissions), str(tmp_path / "graded.csv"), str(tmp_path / "aggregates.json"), ontology_copy,
+        workers=2, chunk_size=250, use_tables=False,
+    )
+    assert report["rows"] == 2000 and report["errors"] == 0
+    assert 1 <= report["workers"] <= 2
+
+
+def test_bad_rows_are_reported_per_row(ontology_copy, tmp_path):
+    submissions = tmp_path / "submissions.csv"
+    submissions.write_text(
+        "shape,task,radius,answer\n"
+        "CircleShape,Area,1,3.14\n"
+        "CircleShape,Area,1e200,1\n"
+        "CircleShape,Perimeter,1,6.28\n"
+    )
+    graded_path = tmp_path / "graded.csv"
+    report = batch_grader.run(str(submissions), str(graded_path), str(tmp_path / "aggregates.json"),
+                              ontology_copy, workers=1)
+    assert report["rows"] == 3 and report["errors"] == 1
+
+    with open(graded_path, newline="") as f:
+        graded = list(csv.DictReader(f))
+    assert [bool(row["error"]) for row in graded] == [False, True, False]
+    assert graded[0]["is_correct"] == "True" and graded[2]["is_correct"] == "True"
+
+
+class _OverflowingCore:
+    def has_shape(self, shape_name):
+        return True
+
+    def required_dims(self, shape_name, task):
+        return ["side"]
+
+    def grade(self, shape_name, task, dims, student_answer):
+        raise OverflowError(34, "Numerical result out of range")
+
+
+def test_arithmetic_errors_stay_in_the_row(monkeypatch):
+    monkeypatch.setattr(batch_grader, "_core", _OverflowingCore())
+    out = batch_grader._grade_row({"shape": "SquareShape", "task": "Area", "side": "2", "answer": "4"})
+    assert out["error"] and out["is_correct"] is None
@@ -0,0 +1,70 @@
+import os
+import random
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from content_tables import ContentTables, ContentTablesError, ensure_tables  # noqa: E402
+from grading import TASKS  # noqa: E402
+from ontology_index import build_exercise_index  # noqa: E402
+from tutor_core import TutorCore  # noqa: E402
+
+
+def _assert_same_content(tables, core):
+    rng = random.Random(3)
+    assert tables.shape_names() == core.registry.shape_names()
+    for shape_name in tables.shape_names():
+        for task in TASKS:
+            dims_names = tables.required_dims(shape_name, task)
+            assert dims_names == core.required_dims(shape_name, task)
+            assert tables.formula_for(shape_name, task) == core.formula_for(shape_name, task)
+            for _ in range(20):
+                dims = {d: round(rng.uniform(0.5, 50), 2) for d in dims_names}
+                answer = core.compute_correct_answer(shape_name, task, dims)
+                assert tables.compute_correct_answer(shape_name, task, dims) == answer
+                for student_answer in (answer, answer * 2):
+                    assert (tables.grade(shape_name, task, dims, student_answer).to_dict()
+                            == core.grade(shape_name, task, dims, student_answer).to_dict())
+    assert list(tables.exercises()) == list(build_exercise_index(core.onto).values())
+
+
+def test_tables_match_tutor_core(ontology_copy):
+    tables = ContentTables(ensure_tables(ontology_copy))
+    core = TutorCore.load(ontology_copy)
+    try:
+        _assert_same_content(tables, core)
+        assert tables.exercise("CircleExercise1")["correct_answer"] == 153.94
+        assert tables.exercise("NoSuchExercise") is None
+        assert not tables.has_shape("HexagonShape")
+    finally:
+        tables.close()
+        core.onto.world.close()
+
+
+def test_tables_are_rebuilt_when_the_ontology_changes(ontology_copy):
+    path = ensure_tables(ontology_copy)
+    built = os.stat(path).st_mtime_ns
+    old_sha = ContentTables(path).source_sha256
+    assert ensure_tables(ontology_copy) == path and os.stat(path).st_mtime_ns == built
+
+    with open(ontology_copy, "r", encoding="utf-8") as f:
+        text = f.read()
+    edited = (text.replace("Perimeter = 4 × side", "Perimeter = 5 × side")
+                  .replace(">153.94<", ">154.0<"))
+    assert "Perimeter = 5 × side" in edited and ">154.0<" in edited
+    with open(ontology_copy, "w", encoding="utf-8") as f:
+        f.write(edited)
+
+    assert ensure_tables(ontology_copy) == path
+    with pytest.raises(ContentTablesError):
+        ContentTables(path, expected_sha256=old_sha)
+    tables = ContentTables(path)
+    core = TutorCore.load(ontology_copy)
+    try:
+        assert tables.compute_correct_answer("SquareShape", "Perimeter", {"side": 2.0}) == 10.0
+        assert tables.exercise("CircleExercise1")["correct_answer"] == 154.0
+        _assert_same_content(tables, core)
+    finally:
+        tables.close()
+        core.onto.world.close()
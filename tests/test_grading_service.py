@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from grading_service import GradingService  # noqa: E402
+
+
+@pytest.fixture
+def service(ontology_copy):
+    service = GradingService(ontology_copy)
+    asyncio.run(service.load())
+    return service
+
+
+def grade(service, body):
+    return service.dispatch("POST", "/grade", body if isinstance(body, bytes) else json.dumps(body).encode())
+
+
+@pytest.mark.parametrize("body", [
+    b"[1]",
+    b'"RectangleShape"',
+    b"3",
+    {"shape": ["RectangleShape"], "task": "Area"},
+    {"shape": "RectangleShape", "task": ["Area"]},
+    {"shape": "RectangleShape", "task": {"name": "Area"}},
+    {"shape": "RectangleShape", "task": "Area", "dims": [4, 5], "answer": 20},
+    {"shape": "RectangleShape", "task": "Area", "dims": {"length": [4], "width": 5}, "answer": 20},
+    {"shape": "RectangleShape", "task": "Volume", "dims": {"length": 4, "width": 5}, "answer": 20},
+    b"not json",
+    {"shape": "CircleShape", "task": "Area", "dims": {"radius": "1e200"}, "answer": "1"},
+    {"shape": "CircleShape", "task": "Area", "dims": {"radius": "nan"}, "answer": "1"},
+    {"shape": "CircleShape", "task": "Area", "dims": {"radius": "inf"}, "answer": "1"},
+    {"shape": "CircleShape", "task": "Area", "dims": {"radius": "1"}, "answer": "NaN"},
+    {"shape": "CircleShape", "task": "Area", "dims": {"radius": "1"}, "answer": "-inf"},
+])
+def test_malformed_grade_requests_get_400(service, body):
+    status, payload = grade(service, body)
+    assert status == 400
+    assert payload["error"]
+
+
+def test_valid_grade_request(service):
+    status, payload = grade(service, {"shape": "RectangleShape", "task": "Area",
+                                      "dims": {"length": 4, "width": 5}, "answer": 20})
+    assert status == 200
+    assert payload["is_correct"] is True
+
+
+def test_reload_rebinds_attempt_queries(service, ontology_copy):
+    from ontology_reload import ContentState, load_fresh, plan_reload
+
+    analytics = service.attempt_analytics
+    assert [a["student_answer"] for a in analytics.student_attempts("Student1")] == [18]
+
+    with open(ontology_copy, "r", encoding="utf-8") as f:
+        text = f.read()
+    edited = text.replace('#decimal">18</area_perimeter_ontology:hasStudentAnswer>',
+                          '#decimal">19</area_perimeter_ontology:hasStudentAnswer>')
+    assert edited != text
+    with open(ontology_copy, "w", encoding="utf-8") as f:
+        f.write(edited)
+
+    state = plan_reload(ContentState.from_core(service.core), load_fresh(ontology_copy))
+    assert state.diff
+    service.apply_reload(state)
+    assert analytics.onto is state.onto
+    assert [a["student_answer"] for a in analytics.student_attempts("Student1")] == [19]
+
+
+def test_placeholder_texts_are_not_counted_as_misconceptions(service):
+    from ontology_index import DEFAULT_MISCONCEPTION_TEXT, NO_FEEDBACK_TEXT
+
+    # Rectangle area has feedback without a misconception, rectangle perimeter none at all.
+    service.core.feedback_index = {("RectangleShape", "Area"): [("Check the formula.", None)]}
+    for task in ("Area", "Perimeter"):
+        dims = {d: 3 for d in service.core.required_dims("RectangleShape", task)}
+        status, payload = grade(service, {"shape": "RectangleShape", "task": task, "dims": dims, "answer": 0.5})
+        assert status == 200 and payload["misconception"]
+
+    status, payload = service.dispatch("GET", "/analytics/misconceptions", b"", "limit=100")
+    assert status == 200
+    texts = {m["text"] for m in payload["misconceptions"]}
+    assert not texts & {DEFAULT_MISCONCEPTION_TEXT, NO_FEEDBACK_TEXT}
+
+
+def test_handler_errors_are_answered_with_500(service, monkeypatch):
+    def broken_dispatch(*args, **kwargs):
+        raise RuntimeError("handler bug")
+
+    monkeypatch.setattr(service, "dispatch", broken_dispatch)
+
+    async def request():
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+    head, _, body = asyncio.run(request()).partition(b"\r\n\r\n")
+    assert head.split()[1] == b"500"
+    assert "RuntimeError" in json.loads(body)["error"]
+
+
+def test_misconception_window(service):
+    service.dispatch("POST", "/grade", json.dumps({"student_id": "s9", "shape": "RectangleShape", "task": "Area",
+                                                    "dims": {"length": 4, "width": 5}, "answer": 21}).encode())
+    all_time = service.dispatch("GET", "/analytics/misconceptions", b"", "")
+    assert all_time[0] == 200 and all_time[1]["students"]
+    status, payload = service.dispatch("GET", "/analytics/misconceptions", b"", "days=0")
+    assert status == 200 and payload["days"] is None
+    assert payload["students"] == all_time[1]["students"]
+    assert service.dispatch("GET", "/analytics/misconceptions", b"", "days=-1")[0] == 400
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.load_generator import load_profiles, simulate
+
+
+def test_duration_without_rate_or_think_time_is_refused():
+    profiles = load_profiles(think_time=0.0)
+    with pytest.raises(ValueError):
+        next(simulate(None, profiles, rate=0.0, duration=5.0))
+
+
+def test_duration_stops_a_rate_capped_run(ontology_copy):
+    pytest.importorskip("owlready2")
+    from tutor_core import TutorCore
+
+    core = TutorCore.load(ontology_copy)
+    attempts = list(simulate(core, load_profiles(think_time=0.0, count=5), rate=100.0, duration=2.0))
+    assert 190 <= len(attempts) <= 201
+    assert attempts[-1].offset <= 2.0
+    core.onto.world.close()
@@ -0,0 +1,93 @@
+import gc
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from ontology_manager import OntologyManager, table_bytes, world_bytes  # noqa: E402
+from ontology_reload import ContentState, load_fresh, plan_reload  # noqa: E402
+
+
+@pytest.fixture
+def curricula(ontology_copy, tmp_path):
+    (tmp_path / "g5").mkdir()
+    g5 = tmp_path / "g5" / "areaperimeter.rdf"
+    shutil.copy(ontology_copy, g5)
+    return {"g4": ontology_copy, "g5": str(g5)}
+
+
+def test_evicted_curriculum_loads_again(curricula):
+    manager = OntologyManager(curricula, max_bytes=1)
+    g4 = manager.get("g4")
+    manager.get("g5")
+    assert not manager.usage()["curricula"]["g4"]["loaded"]
+
+    start = time.perf_counter()
+    again = manager.get("g4")
+    assert time.perf_counter() - start < 5
+    assert again is not g4
+    assert again.shape_names() == g4.shape_names()
+    assert manager.stats["g4"].evictions >= 1
+
+
+def test_evicted_world_is_closed_once_released(curricula):
+    manager = OntologyManager(curricula, max_bytes=1)
+    g4 = manager.get("g4")
+    db = g4.onto.world.graph.db
+    manager.get("g5")
+
+    db.execute("SELECT 1")      # still in use by this test, so still open
+    del g4
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute("SELECT 1")
+
+
+def test_curriculum_is_sized_from_its_own_world(curricula):
+    manager = OntologyManager(curricula)
+    g4 = manager.get("g4")
+    assert world_bytes(g4.onto.world) > 0
+    assert manager.stats["g4"].resident_bytes == world_bytes(g4.onto.world) + table_bytes(g4)
+
+
+def _reload(core, path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace("Remember to square the radius.", "Square the radius first."))
+    return plan_reload(ContentState.from_core(core), load_fresh(path))
+
+
+def test_reload_closes_the_replaced_world(curricula):
+    manager = OntologyManager(curricula)
+    g4 = manager.get("g4")
+    old_db = g4.onto.world.graph.db
+    state = _reload(g4, curricula["g4"])
+    assert state.diff
+
+    manager.apply_reload("g4", g4, state)
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_db.execute("SELECT 1")
+    assert manager.stats["g4"].resident_bytes == world_bytes(state.onto.world) + table_bytes(g4)
+    assert all(sh.namespace.world is state.onto.world for sh in g4.shape_instances.values())
+    assert g4.grade("SquareShape", "Area", {"side": 3}, 9).is_correct
+
+
+def test_reload_of_an_evicted_curriculum_closes_both_worlds(curricula):
+    manager = OntologyManager(curricula, max_bytes=1)
+    g4 = manager.get("g4")
+    manager.get("g5")
+    old_db = g4.onto.world.graph.db
+    state = _reload(g4, curricula["g4"])
+    manager.apply_reload("g4", g4, state)
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_db.execute("SELECT 1")
+
+    new_db = state.onto.world.graph.db
+    del g4, state
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):
+        new_db.execute("SELECT 1")
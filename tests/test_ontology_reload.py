@@ -0,0 +1,56 @@
+import os
+import queue
+import time
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from ontology_reload import ContentState, OntologyWatcher  # noqa: E402
+from tutor_core import TutorCore  # noqa: E402
+
+INTERVAL = 0.05
+
+
+def _watch(path):
+    core = TutorCore.load(path)
+    reloads, errors = queue.Queue(), []
+    watcher = OntologyWatcher(path, lambda: ContentState.from_core(core), reloads.put,
+                              interval=INTERVAL, on_error=errors.append).start()
+    time.sleep(4 * INTERVAL)
+    return watcher, reloads, errors
+
+
+def _settle():
+    time.sleep(10 * INTERVAL)
+
+
+def test_touch_and_same_content_save_do_not_reload(ontology_copy):
+    watcher, reloads, errors = _watch(ontology_copy)
+    try:
+        later = time.time() + 5
+        os.utime(ontology_copy, (later, later))
+        _settle()
+        with open(ontology_copy, "rb") as f:
+            data = f.read()
+        with open(ontology_copy, "wb") as f:
+            f.write(data)
+        _settle()
+    finally:
+        watcher.stop()
+    assert errors == []
+    assert reloads.empty()
+
+
+def test_content_change_reloads(ontology_copy):
+    watcher, reloads, errors = _watch(ontology_copy)
+    try:
+        with open(ontology_copy, "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(ontology_copy, "w", encoding="utf-8") as f:
+            f.write(text.replace("Remember to square the radius.", "Square the radius first."))
+        state = reloads.get(timeout=30)
+    finally:
+        watcher.stop()
+    assert errors == []
+    assert state.diff
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from conftest import REPO  # noqa: E402
+from ontology_snapshot import load_ontology  # noqa: E402
+
+OPEN_SNAPSHOT = (
+    "import sys; sys.path.insert(0, sys.argv[1]);"
+    "from ontology_snapshot import load_ontology;"
+    "onto, info = load_ontology(sys.argv[2]);"
+    "assert info.hit, info;"
+    "print(len(list(onto.Exercise.instances())))"
+)
+
+
+def test_snapshot_opens_twice_in_one_process(ontology_copy):
+    onto1, info1 = load_ontology(ontology_copy)
+    onto2, info2 = load_ontology(ontology_copy)
+    assert not info1.hit and info2.hit
+    assert onto1.world is not onto2.world
+    assert len(list(onto2.Exercise.instances())) == len(list(onto1.Exercise.instances())) > 0
+
+
+def test_snapshot_opens_from_several_processes(ontology_copy):
+    onto, _ = load_ontology(ontology_copy)      # builds the snapshot and keeps it open
+    expected = str(len(list(onto.Exercise.instances())))
+
+    start = time.perf_counter()
+    procs = [
+        subprocess.Popen([sys.executable, "-c", OPEN_SNAPSHOT, REPO, ontology_copy],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(3)
+    ]
+    results = [p.communicate(timeout=60) + (p.returncode,) for p in procs]
+    for out, err, code in results:
+        assert code == 0, err
+        assert out.strip() == expected
+    # A locked snapshot makes openers wait ~10 s each before failing.
+    assert time.perf_counter() - start < 10
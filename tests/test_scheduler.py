@@ -0,0 +1,48 @@
+from scheduler import Scheduler
+
+A, B, C = ("RectangleShape", "Area"), ("CircleShape", "Area"), ("SquareShape", "Perimeter")
+
+
+def _scheduler():
+    return Scheduler([A, B, C], clock=lambda: 0.0, base_interval=60.0)
+
+
+def test_untried_skills_in_catalog_order():
+    s = _scheduler()
+    assert s.next_skill("s1", now=0) == A
+    s.record("s1", *A, True, now=0)             # A due at 60
+    assert s.next_skill("s1", now=10) == B
+    s.record("s1", *B, True, now=10)
+    assert s.next_skill("s1", now=20) == C
+
+
+def test_overdue_review_comes_before_untried_skills():
+    s = _scheduler()
+    s.record("s1", *A, True, now=0)             # A due at 60
+    assert s.next_skill("s1", now=59) == B
+    assert s.next_skill("s1", now=61) == A
+
+
+def test_weakest_skill_when_nothing_is_due_or_untried():
+    s = _scheduler()
+    s.record("s1", *A, True, now=0)
+    s.record("s1", *B, False, now=0)
+    s.record("s1", *C, True, now=0)
+    assert s.mastery("s1", *B) < s.mastery("s1", *A) == s.mastery("s1", *C)
+    assert s.next_skill("s1", now=30) == B
+
+
+def test_most_overdue_first():
+    s = _scheduler()
+    s.record("s1", *A, True, now=0)             # due 60
+    s.record("s1", *B, True, now=10)            # due 70
+    s.record("s1", *C, True, now=15)            # due 75
+    assert s.next_skill("s1", now=100) == A
+    s.record("s1", *A, True, now=100)           # interval grows: due 250
+    assert s.next_skill("s1", now=100) == B
+    s.record("s1", *B, False, now=100)          # a mistake resets the interval: due 160
+    assert s.next_skill("s1", now=100) == C
+    s.record("s1", *C, True, now=100)
+    assert s.next_skill("s1", now=170) == B
+    assert s.due_students(now=170) == [("s1", 160)]
+    assert s.due_students(now=150) == []
@@ -0,0 +1,94 @@
+import math
+import random
+
+import pytest
+
+from grading import FORMULAS
+from shape_registry import FormulaError, ShapeRegistry, compile_formula, evaluate
+
+# The formula texts of the sample ontology, by built-in rule.
+ONTOLOGY_TEXTS = {
+    ("Rectangle", "Area"): "Area = length × width",
+    ("Rectangle", "Perimeter"): "Perimeter = 2 × (length + width)",
+    ("Square", "Area"): "Area = side × side",
+    ("Square", "Perimeter"): "Perimeter = 4 × side",
+    ("Triangle", "Area"): "Area = ½ × base × height",
+    ("Triangle", "Perimeter"): "Perimeter = side1 + side2 + side3",
+    ("Circle", "Area"): "Area = π × radius²",
+    ("Circle", "Perimeter"): "Perimeter = 2 × π × radius",
+}
+
+
+@pytest.mark.parametrize("text", [
+    "Area = side.real",
+    "Area = __import__('os')",
+    "Area = side[0]",
+    "Area = 'side'",
+    "Area = side if side else 0",
+    "Area = [side]",
+    "Area = lambda: side",
+    "Area = __class__ × side",
+    "Area = _side × 2",
+    "Area = 2 × 3",
+    "Area = side ×",
+])
+def test_rejected_formulas(text):
+    with pytest.raises(FormulaError):
+        compile_formula(text)
+
+
+def test_no_function_calls():
+    # "name(" reads as implicit multiplication, so a call can never reach the evaluator.
+    dims, evaluator = compile_formula("Area = abs(side)")
+    assert dims == ["abs", "side"]
+    assert evaluator({"abs": 2, "side": -3}) == -6
+
+
+@pytest.mark.parametrize("text, dims, expected", [
+    ("Area = ½ × base × height", {"base": 3, "height": 4}, 6),
+    ("Area = ¼ × d1 × d2 ÷ 2", {"d1": 4, "d2": 6}, 3),
+    ("Area = π × radius²", {"radius": 2}, math.pi * 4),
+    ("Volume = side³", {"side": 3}, 27),
+    ("Area = (base1 + base2)²", {"base1": 1, "base2": 2}, 9),
+    ("Perimeter = 2πr", {"r": 1}, 2 * math.pi),
+    ("Perimeter = 2(length + width)", {"length": 2, "width": 3}, 10),
+    ("Area = base − height", {"base": 5, "height": 2}, 3),
+])
+def test_symbols(text, dims, expected):
+    names, evaluator = compile_formula(text)
+    assert names == list(dims)
+    assert evaluator(dims) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("key", sorted(ONTOLOGY_TEXTS))
+def test_agrees_with_builtin_formulas(key):
+    builtin_dims, builtin = FORMULAS[key]
+    dims, evaluator = compile_formula(ONTOLOGY_TEXTS[key])
+    assert sorted(dims) == sorted(builtin_dims)
+    rng = random.Random(key[0] + key[1])
+    for _ in range(100):
+        values = {d: rng.uniform(0.1, 1000) for d in dims}
+        assert evaluator(values) == pytest.approx(builtin(values))
+
+
+def test_squares_overflow_like_the_builtin_rules():
+    _, evaluator = compile_formula(ONTOLOGY_TEXTS["Circle", "Area"])
+    assert evaluator({"radius": 1e200}) == FORMULAS["Circle", "Area"][1]({"radius": 1e200}) == math.inf
+    with pytest.raises(ValueError):
+        evaluate(evaluator, {"radius": 1e200})
+    with pytest.raises(ValueError):
+        evaluate(compile_formula("Area = side ** 4")[1], {"side": 1e200})
+
+
+def test_registry_uses_the_ontology_formulas(ontology_copy):
+    pytest.importorskip("owlready2")
+    from owlready2 import World
+
+    onto = World().get_ontology(ontology_copy).load()
+    registry = ShapeRegistry.from_ontology(onto)
+    for shape_name in registry.shape_names():
+        for task in ("Area", "Perimeter"):
+            rule = registry.get(shape_name, task)
+            assert rule.source == "ontology"
+            assert rule.expression == ONTOLOGY_TEXTS[shape_name.replace("Shape", ""), task]
+    onto.world.close()
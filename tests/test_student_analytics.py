@@ -0,0 +1,38 @@
+import random
+
+from student_analytics import ClassroomAnalytics
+from student_model import StudentModel
+
+SHAPES = ["CircleShape", "RectangleShape", "SquareShape", "TriangleShape"]
+
+
+def test_by_task_matches_recorded_attempts():
+    rng = random.Random(5)
+    analytics = ClassroomAnalytics()
+    expected = {}
+    for i in range(2000):
+        shape, task, ok = rng.choice(SHAPES), rng.choice(["Area", "Perimeter"]), rng.random() < 0.6
+        analytics.record("s1", shape, task, ok, ts=i)
+        attempts, correct = expected.get(task, (0, 0))
+        expected[task] = (attempts + 1, correct + ok)
+
+    by_task = analytics.summary("s1", now=2000)["by_task"]
+    for task, (attempts, correct) in expected.items():
+        assert by_task[task]["attempts"] == attempts
+        assert by_task[task]["accuracy"] == correct / attempts
+
+
+def test_summary_lines_follow_each_attempt():
+    rng = random.Random(7)
+    model = StudentModel()
+    assert model.summary_lines() == ["No attempts yet."]
+    for _ in range(500):
+        shape, ok = rng.choice(SHAPES), rng.random() < 0.5
+        model.record(shape, ok)
+        lines = model.summary_lines()
+        assert model.summary_text() == "\n".join(lines)
+        assert lines[0] == f"Total attempts: {model.total}"
+        shown = {line.split(":")[0][2:]: line for line in lines if line.startswith("- ")}
+        assert shown[shape] == f"- {shape}: {model.by_shape[shape]} attempt(s), {model.wrong_by_shape.get(shape, 0)} wrong"
+        if model.incorrect:
+            assert f"Weak area: {model.weak_area()}" in lines
@@ -0,0 +1,195 @@
+import math
+import os
+
+from grading import TOLERANCE, within_tolerance
+from metrics import METRICS
+from ontology_index import (
+    DEFAULT_FEEDBACK_TEXT,
+    DEFAULT_MISCONCEPTION_TEXT,
+    NO_FEEDBACK_TEXT,
+    build_feedback_index,
+    get_first,
+    lookup_feedback,
+)
+from ontology_snapshot import load_ontology
+from shape_registry import ShapeRegistry
+
+# Headless grading core shared by the Tk app and the grading service. Everything the
+# grading path needs is read out of the ontology once in _index(); grade() itself only
+# touches plain dicts, so it never calls into owlready2.
+
+DEFAULT_ONTOLOGY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "areaperimeter.rdf")
+
+
+class OntologyContentError(Exception):
+    pass
+
+
+def parse_dims(raw_dims: dict, dim_names) -> dict:
+    dims = {}
+    for k in dim_names:
+        raw = str(raw_dims.get(k, "")).strip()
+        if raw == "":
+            raise ValueError(f"Missing value for {k}")
+        val = float(raw)
+        if not math.isfinite(val):
+            raise ValueError(f"{k} must be a finite number")
+        if val <= 0:
+            raise ValueError(f"{k} must be greater than 0")
+        dims[k] = val
+    return dims
+
+
+def parse_answer(raw) -> float:
+    try:
+        value = float(str(raw).strip())
+    except ValueError:
+        raise ValueError("Please enter a valid numeric answer.") from None
+    if not math.isfinite(value):
+        raise ValueError("Please enter a valid numeric answer.")
+    return value
+
+
+class GradeResult:
+    def __init__(self, shape_name, task, student_answer, correct_answer, is_correct,
+                 formula_text=None, feedback_text=None, misconception_text=None):
+        self.shape_name = shape_name
+        self.task = task
+        self.student_answer = student_answer
+        self.correct_answer = correct_answer
+        self.is_correct = is_correct
+        self.formula_text = formula_text
+        self.feedback_text = feedback_text
+        self.misconception_text = misconception_text
+
+    def lines(self):
+        lines = []
+        lines.append("✅ Correct!" if self.is_correct else "❌ Incorrect.")
+        lines.append(f"Your answer: {self.student_answer}")
+        lines.append(f"Correct answer: {self.correct_answer:.2f}")
+
+        if self.formula_text:
+            lines.append("")
+            lines.append(f"Formula used (from ontology): {self.formula_text}")
+
+        if not self.is_correct:
+            lines.append("")
+            lines.append("Possible misconception (from ontology):")
+            lines.append(f"- {self.misconception_text}")
+            lines.append("")
+            lines.append("Feedback (from ontology):")
+            lines.append(f"- {self.feedback_text}")
+        return lines
+
+    def to_dict(self):
+        return {
+            "shape": self.shape_name,
+            "task": self.task,
+            "student_answer": self.student_answer,
+            "correct_answer": self.correct_answer,
+            "is_correct": self.is_correct,
+            "formula": self.formula_text,
+            "feedback": self.feedback_text,
+            "misconception": self.misconception_text,
+        }
+
+
+def formula_texts(sh) -> dict:
+    area_f = get_first(getattr(sh, "hasAreaFormula", []), None)
+    per_f = get_first(getattr(sh, "hasPerimeterFormula", []), None)
+    return {
+        "Area": get_first(getattr(area_f, "hasDescription", []), None) if area_f else None,
+        "Perimeter": get_first(getattr(per_f, "hasDescription", []), None) if per_f else None,
+    }
+
+
+class TutorCore:
+    def __init__(self, onto):
+        self.onto = onto
+        self.snapshot_info = None
+
+        self.shape_instances = {}
+        self.formulas_by_shape = {}
+        self.feedback_index = {}
+        self.registry = ShapeRegistry()
+
+        self.area_task_ind = None
+        self.perimeter_task_ind = None
+
+        with METRICS.timer("ontology.index"):
+            self._index()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_ONTOLOGY_PATH, use_snapshot: bool = True):
+        with METRICS.timer("ontology.load"):
+            onto, snapshot_info = load_ontology(path, use_snapshot=use_snapshot)
+        core = cls(onto)
+        core.snapshot_info = snapshot_info
+        return core
+
+    # ---------- Ontology ----------
+    def _index(self):
+        self.area_task_ind = self.onto.search_one(iri="*AreaTask")
+        self.perimeter_task_ind = self.onto.search_one(iri="*PerimeterTask")
+        if self.area_task_ind is None or self.perimeter_task_ind is None:
+            raise OntologyContentError(
+                "AreaTask / PerimeterTask not found.\n\nMake sure TaskType individuals exist and are saved."
+            )
+
+        for sh in self.onto.Shape.instances():
+            self.shape_instances[sh.name] = sh
+
+        for sh_name, sh in self.shape_instances.items():
+            self.formulas_by_shape[sh_name] = formula_texts(sh)
+
+        self.feedback_index = build_feedback_index(self.onto)
+        self.registry = ShapeRegistry.from_ontology(self.onto)
+
+    def apply_reload(self, state):
+        # Swaps in an ontology_reload.ContentState. Call it from the thread that grades so
+        # no grade runs between these assignments.
+        self.onto = state.onto
+        self.area_task_ind = state.area_task_ind
+        self.perimeter_task_ind = state.perimeter_task_ind
+        self.shape_instances = state.shape_instances
+        self.formulas_by_shape = state.formulas_by_shape
+        self.feedback_index = state.feedback_index
+        self.registry = state.registry
+
+    def shape_names(self):
+        return sorted(self.shape_instances.keys())
+
+    def has_shape(self, shape_name: str) -> bool:
+        return shape_name in self.shape_instances
+
+    # ---------- Grading ----------
+    def required_dims(self, shape_name: str, task: str):
+        return self.registry.required_dims(shape_name, task)
+
+    def compute_correct_answer(self, shape_name: str, task: str, dims: dict) -> float:
+        return self.registry.compute(shape_name, task, dims)
+
+    def formula_for(self, shape_name: str, task: str):
+        return self.formulas_by_shape.get(shape_name, {}).get(task)
+
+    def feedback_for(self, shape_name: str, task: str):
+        fb_text, mc_text = lookup_feedback(self.feedback_index, shape_name, task)
+        if fb_text:
+            return fb_text, (mc_text or DEFAULT_MISCONCEPTION_TEXT)
+        return DEFAULT_FEEDBACK_TEXT, NO_FEEDBACK_TEXT
+
+    def grade(self, shape_name: str, task: str, dims: dict, student_answer: float) -> GradeResult:
+        with METRICS.timer("grade.compute"):
+            correct_answer = self.compute_correct_answer(shape_name, task, dims)
+        is_correct = within_tolerance(student_answer, correct_answer, TOLERANCE)
+        METRICS.inc("grade.correct" if is_correct else "grade.incorrect")
+
+        fb_text = mc_text = None
+        if not is_correct:
+            with METRICS.timer("grade.feedback"):
+                fb_text, mc_text = self.feedback_for(shape_name, task)
+
+        return GradeResult(
+            shape_name, task, student_answer, correct_answer, is_correct,
+            self.formula_for(shape_name, task), fb_text, mc_text,
+        )